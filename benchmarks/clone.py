@@ -0,0 +1,35 @@
+"""
+Compare the cost of cloning shapes with a deep copy against the shallow,
+buffer-sharing Clonable.clone.
+
+    poetry run python benchmarks/clone.py
+"""
+import copy
+import timeit
+
+import numpy
+
+from igs.graphics.shape import Polyline
+
+SIZES = [10, 1_000, 100_000, 1_000_000]
+
+
+def measure(function, repeat=5):
+    number = 10
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    print(f"{'vertices':>10} {'deepcopy (s)':>14} {'clone (s)':>14}")
+
+    for size in SIZES:
+        shape = Polyline(numpy.random.rand(size, 2))
+
+        deep = measure(lambda: copy.deepcopy(shape))
+        shallow = measure(shape.clone)
+
+        print(f"{size:>10} {deep:>14.2e} {shallow:>14.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Measure the cost of geometry, transforms, window movement and rendering over
+scenes of several sizes, and compare the results against a baseline.
+
+    poetry run python benchmarks/suite.py
+    poetry run python benchmarks/suite.py --output benchmarks/baseline.json
+
+Rendering runs under the offscreen Qt platform unless another one is set, so
+no display is needed. Results are compared against the baseline stored next
+to this script, or another one given, and the script exits with status 1 if
+any measurement got slower than the threshold allows. Timings only compare
+on the machine they were taken on, so the stored baseline is meant to be
+rewritten with --output on the machine the suite runs on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy  # noqa: E402
+from PyQt5 import QtCore, QtWidgets  # noqa: E402
+
+from igs.graphics.displayfile import DisplayFile  # noqa: E402
+from igs.graphics.render import Renderer  # noqa: E402
+from igs.graphics.shape import Polyline, Position  # noqa: E402
+from igs.graphics.transform import (  # noqa: E402
+    Rotation,
+    Scaling,
+    Translation,
+    combine,
+)
+from igs.graphics.window import Movement, Window  # noqa: E402
+from igs.ui.view import Viewport  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Vertices per shape of the generated scenes.
+SHAPE_SIZE = 50
+
+# Size of the rendered frames, in pixels.
+FRAME_SIZE = 512
+
+
+def measure(function, number=1, repeat=5):
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def scene(size, seed=0):
+    """
+    Return the vertices of a scene of random walks spread over the world.
+
+    Parameters
+    ----------
+    size : int
+        The number of vertices of the scene.
+    seed : int, optional
+        Seed of the random numbers, by default 0.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        The vertices of every shape.
+    """
+    rng = numpy.random.default_rng(seed)
+    shapes = max(size // SHAPE_SIZE, 1)
+
+    starts = rng.uniform(-1000, 1000, (shapes, 1, 2))
+    steps = rng.normal(0, 5, (shapes, SHAPE_SIZE, 2))
+
+    return list(starts + numpy.cumsum(steps, axis=1))
+
+
+def geometry(size):
+    vertices = scene(size)
+    positions = [[Position(x, y) for x, y in coords] for coords in vertices]
+    shapes = [Polyline(coords) for coords in vertices]
+    points = [position for shape in positions for position in shape]
+
+    rotation = Rotation(30)
+
+    def apply():
+        for shape in shapes:
+            shape.clone().apply(rotation).coordinates()
+
+    def transform_call():
+        for point in points:
+            rotation(point)
+
+    return {
+        "construct": measure(lambda: [Polyline(shape) for shape in positions]),
+        "transform_call": measure(transform_call, repeat=3),
+        "apply": measure(apply),
+        "clone": measure(lambda: [shape.clone() for shape in shapes]),
+    }
+
+
+def transforms():
+    transforms = [Translation(1, 2), Scaling(2, 2), Rotation(45)]
+
+    return {
+        "transform_combine": measure(lambda: combine(*transforms), number=1000),
+    }
+
+
+def window_movement():
+    window = Window(Position(-50, 50), 100, 100)
+
+    def zoom():
+        window.zoom_in()
+        window.zoom_out()
+
+    def pan():
+        window.move_left()
+        window.move_right()
+
+    return {
+        "window_zoom": measure(zoom, number=100),
+        "window_pan": measure(pan, number=100),
+    }
+
+
+def rendering(size):
+    display_file = DisplayFile()
+
+    for coords in scene(size):
+        display_file.add(Polyline(coords))
+
+    renderer = Renderer(display_file)
+    window = Window(Position(-1000, 1000), 2000, 2000)
+
+    def render():
+        window.move_right()
+        renderer.render(window, FRAME_SIZE, FRAME_SIZE)
+
+    viewport = Viewport()
+    viewport.set_display_file(display_file)
+    viewport.setFixedSize(FRAME_SIZE, FRAME_SIZE)
+    viewport.show()
+
+    # Offscreen widgets are never exposed, so repaint() wouldn't draw them,
+    # while grab() goes through paintEvent like an exposed widget does. The
+    # viewport renders missing tiles in slices on the thread pool, so a frame
+    # is only done once nothing is left to refine.
+    pool = QtCore.QThreadPool.globalInstance()
+
+    def settle():
+        viewport.grab()
+
+        while viewport._renderer.refining():
+            pool.waitForDone()
+            QtCore.QCoreApplication.processEvents()
+
+        viewport.grab()
+
+    # Movement is scheduled like input does, and applied in one frame
+    # rather than eased in over the frames of the viewport's timer. A pan
+    # moves the window by a few pixels, so enough are averaged over for new
+    # tiles to come into view.
+    def pan():
+        viewport._window.schedule_move(Movement.Direction.Right)
+        viewport.schedule_navigation()
+        viewport.step_navigation(1)
+        settle()
+
+    def zoom():
+        viewport._window.schedule_zoom(Movement.Direction.In)
+        viewport.schedule_navigation()
+        viewport.step_navigation(1)
+        settle()
+
+    settle()
+
+    results = {
+        "render": measure(render),
+        "viewport_pan": measure(pan, number=25),
+        "viewport_zoom": measure(zoom),
+    }
+
+    viewport.close()
+
+    return results
+
+
+def run(sizes):
+    results = {}
+    results.update(transforms())
+    results.update(window_movement())
+
+    for size in sizes:
+        for name, seconds in {**geometry(size), **rendering(size)}.items():
+            results[f"{name}/{size}"] = seconds
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare measurements against a baseline.
+
+    Parameters
+    ----------
+    results : dict
+        Seconds taken by every benchmark.
+    baseline : dict
+        Seconds taken by the same benchmarks before.
+    threshold : float
+        How much slower a benchmark can get, as a fraction of its baseline,
+        before it counts as a regression.
+
+    Returns
+    -------
+    list of str
+        The names of the benchmarks that regressed.
+    """
+    regressions = []
+
+    for name, seconds in results.items():
+        before = baseline.get(name)
+
+        if before is not None and seconds > before * (1 + threshold):
+            regressions.append(name)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=SIZES,
+        help="numbers of vertices of the scenes measured",
+    )
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE,
+        help="results to compare against, by default the stored baseline, or "
+        "none if empty",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="slowdown over the baseline counted as a regression (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    # Widgets need an application, which must outlive them.
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    results = run(args.sizes)
+    baseline = {}
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+    regressions = compare(results, baseline, args.threshold)
+
+    print(f"{'benchmark':<28} {'time (s)':>12} {'baseline (s)':>14} {'change':>8}")
+
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        line = f"{name:<28} {seconds:>12.3e}"
+
+        if before is not None:
+            line += f" {before:>14.3e} {seconds / before - 1:>+8.1%}"
+
+        if name in regressions:
+            line += "  REGRESSION"
+
+        print(line)
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "qt": QtCore.QT_VERSION_STR,
+            "qt_platform": app.platformName(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "results": results,
+        }
+
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
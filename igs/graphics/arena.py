@@ -0,0 +1,325 @@
+import numpy
+
+
+def _address(array):
+    return array.__array_interface__["data"][0]
+
+
+def gather_ranges(offsets, lengths):
+    # The indices of every element in a set of ranges, concatenated.
+    total = lengths.sum()
+    starts = numpy.cumsum(lengths) - lengths
+
+    return numpy.repeat(offsets - starts, lengths) + numpy.arange(total)
+
+
+def extents(vertices, lengths):
+    # The bounds of sets of vertices concatenated into one array, as
+    # (xmin, ymin, xmax, ymax) rows, with nan for empty ones.
+    bounds = numpy.full((len(lengths), 4), numpy.nan)
+    filled = lengths > 0
+
+    if filled.any():
+        starts = (numpy.cumsum(lengths) - lengths)[filled]
+
+        bounds[filled, :2] = numpy.minimum.reduceat(vertices, starts)
+        bounds[filled, 2:] = numpy.maximum.reduceat(vertices, starts)
+
+    return bounds
+
+
+def _new_vertices(capacity):
+    return numpy.empty((capacity, 2), dtype=numpy.float64)
+
+
+class VertexArena:
+    """
+    Vertices of many shapes in one contiguous, growable (N, 2) array.
+
+    Each shape gets a slot holding the offset and length of its vertices plus
+    its primitive and style codes, so a whole set of shapes can be gathered
+    and transformed with a single numpy operation.
+
+    Ranges are append-only: storing new vertices for a slot always writes
+    them past the end, and the old range becomes garbage until the arena is
+    compacted into a new array. This means no range is ever overwritten, so
+    read-only views of the arena handed out to shapes stay valid.
+    """
+
+    def __init__(self, capacity=1024, slots=64):
+        self._allocate = _new_vertices
+        self._vertices = self._allocate(capacity)
+        self._end = 0
+        self._garbage = 0
+
+        self._offsets = numpy.zeros(slots, dtype=numpy.intp)
+        self._lengths = numpy.zeros(slots, dtype=numpy.intp)
+        self._kinds = numpy.zeros(slots, dtype=numpy.int8)
+        self._styles = numpy.zeros(slots, dtype=numpy.intp)
+        self._live = numpy.zeros(slots, dtype=bool)
+
+        # Bumped whenever a slot gets new vertices, so that caches derived
+        # from them can tell they are stale.
+        self._versions = numpy.zeros(slots, dtype=numpy.int64)
+
+        self._num_slots = 0
+        self._free_slots = []
+
+        # Bumped whenever vertices move to a new array, telling holders of
+        # views that they should take new ones.
+        self._generation = 0
+
+    def __len__(self):
+        return self._num_slots - len(self._free_slots)
+
+    def generation(self):
+        return self._generation
+
+    def num_vertices(self):
+        return self._end - self._garbage
+
+    def num_slots(self):
+        return self._num_slots
+
+    def capacity(self):
+        return len(self._vertices)
+
+    def vertices(self):
+        vertices = self._vertices[: self._end]
+        vertices.flags.writeable = False
+
+        return vertices
+
+    def set_allocator(self, allocate):
+        """
+        Set how the arrays vertices are kept in are created, and move the
+        vertices into a new one.
+
+        The allocator is called with a number of vertices and returns an
+        empty (N, 2) array of float64 for them, or is None for a plain numpy
+        array.
+        """
+        self._allocate = allocate or _new_vertices
+        self._reallocate(max(2 * self.num_vertices(), 1024))
+
+    def allocate(self):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = self._num_slots
+            self._num_slots += 1
+
+            if slot == len(self._live):
+                self._grow_tables(2 * len(self._live))
+
+        self._offsets[slot] = self._end
+        self._lengths[slot] = 0
+        self._kinds[slot] = 0
+        self._styles[slot] = 0
+        self._live[slot] = True
+        self._versions[slot] += 1
+
+        return slot
+
+    def adopt(self, vertices, offsets, lengths, kinds, styles):
+        """
+        Replace all slots with ones over vertices held elsewhere, such as in a
+        memory-mapped file, numbered from zero.
+
+        The vertices are never written to: storing any new vertices moves the
+        live ones into an array of the arena's own first.
+        """
+        slots = len(offsets)
+
+        self._vertices = vertices
+        self._end = len(vertices)
+        self._garbage = len(vertices) - int(numpy.sum(lengths))
+
+        self._num_slots = slots
+        self._free_slots = []
+
+        for name in ["_offsets", "_lengths", "_kinds", "_styles", "_live", "_versions"]:
+            table = getattr(self, name)
+            setattr(self, name, numpy.zeros(max(slots, 64), dtype=table.dtype))
+
+        self._offsets[:slots] = offsets
+        self._lengths[:slots] = lengths
+        self._kinds[:slots] = kinds
+        self._styles[:slots] = styles
+        self._live[:slots] = True
+        self._generation += 1
+
+    def free(self, slot):
+        self.free_many([slot])
+
+    def free_many(self, slots):
+        slots = numpy.asarray(slots, dtype=numpy.intp)
+
+        self._garbage += self._lengths[slots].sum()
+        self._lengths[slots] = 0
+        self._live[slots] = False
+        self._free_slots.extend(slots.tolist())
+
+        self._maybe_compact()
+
+    def store(self, slot, coords, kind=0, style=0):
+        """
+        Store the vertices of a slot and return a read-only view of them.
+
+        Storing the view previously returned for the same slot is free.
+        """
+        self._kinds[slot] = kind
+        self._styles[slot] = style
+
+        if self._is_current(slot, coords):
+            return self.view(slot)
+
+        size = len(coords)
+
+        if self._end + size > len(self._vertices):
+            self._garbage += self._lengths[slot]
+            self._lengths[slot] = 0
+            self._reallocate(2 * (self.num_vertices() + size))
+
+        self._garbage += self._lengths[slot]
+        self._offsets[slot] = self._end
+        self._lengths[slot] = size
+        self._vertices[self._end : self._end + size] = coords
+        self._versions[slot] += 1
+        self._end += size
+
+        self._maybe_compact()
+
+        return self.view(slot)
+
+    def store_many(self, slots, coords, kinds, styles, lengths=None):
+        """
+        Store the vertices of several distinct slots at once and return
+        read-only views of them.
+
+        The vertices are given either per slot or, along with the number of
+        vertices of every slot, concatenated into a single array.
+        """
+        slots = numpy.asarray(slots, dtype=numpy.intp)
+
+        if lengths is None:
+            lengths = numpy.array(
+                [len(vertices) for vertices in coords], dtype=numpy.intp
+            )
+        else:
+            lengths = numpy.asarray(lengths, dtype=numpy.intp)
+
+        size = lengths.sum()
+
+        self._garbage += self._lengths[slots].sum()
+        self._lengths[slots] = 0
+
+        if self._end + size > len(self._vertices):
+            self._reallocate(2 * (self.num_vertices() + size))
+
+        if size:
+            if isinstance(coords, numpy.ndarray):
+                self._vertices[self._end : self._end + size] = coords
+            else:
+                self._vertices[self._end : self._end + size] = numpy.concatenate(coords)
+
+        self._offsets[slots] = self._end + numpy.cumsum(lengths) - lengths
+        self._lengths[slots] = lengths
+        self._kinds[slots] = kinds
+        self._styles[slots] = styles
+        self._versions[slots] += 1
+        self._end += size
+
+        self._maybe_compact()
+
+        return [self.view(slot) for slot in slots]
+
+    def rewrite_many(self, slots, rewrite):
+        """
+        Store new vertices for several distinct slots, written straight into
+        the arena from their current ones, and return read-only views of them
+        along with whatever rewrite returned.
+
+        Every slot keeps its number of vertices. The new ones are written by
+        rewrite(vertices, sources, destination), called with the arena's
+        array, the offsets of the current vertices of the slots and the
+        offset past which the new ones go, one slot after the other.
+        """
+        slots = numpy.asarray(slots, dtype=numpy.intp)
+        lengths = self._lengths[slots]
+        size = lengths.sum()
+
+        # Making room moves the current vertices, so they are only located
+        # afterwards.
+        if self._end + size > len(self._vertices):
+            self._reallocate(2 * (self.num_vertices() + size))
+
+        result = rewrite(self._vertices, self._offsets[slots], self._end)
+
+        self._garbage += size
+        self._offsets[slots] = self._end + numpy.cumsum(lengths) - lengths
+        self._versions[slots] += 1
+        self._end += size
+
+        self._maybe_compact()
+
+        return [self.view(slot) for slot in slots], result
+
+    def view(self, slot):
+        offset = self._offsets[slot]
+        view = self._vertices[offset : offset + self._lengths[slot]]
+        view.flags.writeable = False
+
+        return view
+
+    def offsets(self, slots):
+        return self._offsets[slots]
+
+    def lengths(self, slots):
+        return self._lengths[slots]
+
+    def kinds(self, slots):
+        return self._kinds[slots]
+
+    def styles(self, slots):
+        return self._styles[slots]
+
+    def versions(self, slots):
+        return self._versions[slots]
+
+    def gather(self, slots):
+        return self._vertices[gather_ranges(self._offsets[slots], self._lengths[slots])]
+
+    def _is_current(self, slot, coords):
+        length = self._lengths[slot]
+
+        return (
+            len(coords) == length
+            and length > 0
+            and _address(coords) == _address(self._vertices[self._offsets[slot]])
+        )
+
+    def _grow_tables(self, size):
+        for name in ["_offsets", "_lengths", "_kinds", "_styles", "_live", "_versions"]:
+            table = getattr(self, name)
+            grown = numpy.zeros(size, dtype=table.dtype)
+            grown[: len(table)] = table
+            setattr(self, name, grown)
+
+    def _maybe_compact(self):
+        if self._garbage > max(self.num_vertices(), 1024):
+            self._reallocate(max(2 * self.num_vertices(), 1024))
+
+    def _reallocate(self, capacity):
+        (slots,) = numpy.nonzero(self._live[: self._num_slots])
+        slots = slots[numpy.argsort(self._offsets[slots], kind="stable")]
+
+        lengths = self._lengths[slots]
+        vertices = self._allocate(max(capacity, lengths.sum()))
+        vertices[: lengths.sum()] = self.gather(slots)
+
+        self._offsets[slots] = numpy.cumsum(lengths) - lengths
+        self._vertices = vertices
+        self._end = lengths.sum()
+        self._garbage = 0
+        self._generation += 1
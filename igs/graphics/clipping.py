@@ -0,0 +1,162 @@
+import numpy
+
+
+def clip_points(coords, rect):
+    """
+    Return the mask of points inside a rectangle.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        An (N, 2) array of points.
+    rect : tuple
+        The clipping rectangle as (xmin, ymin, xmax, ymax).
+
+    Returns
+    -------
+    numpy.ndarray
+        A boolean array with N elements.
+    """
+    xmin, ymin, xmax, ymax = rect
+    x = coords[:, 0]
+    y = coords[:, 1]
+
+    return (xmin <= x) & (x <= xmax) & (ymin <= y) & (y <= ymax)
+
+
+def clip_segments(segments, rect):
+    """
+    Clip line segments against a rectangle with Liang-Barsky.
+
+    All segments are clipped at once, so the cost per segment is a handful of
+    numpy operations instead of Python code.
+
+    Parameters
+    ----------
+    segments : numpy.ndarray
+        An (M, 4) array of segments as (x0, y0, x1, y1) rows.
+    rect : tuple
+        The clipping rectangle as (xmin, ymin, xmax, ymax).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The (K, 4) array of visible, clipped segments and the boolean mask of
+        the input segments they come from.
+    """
+    xmin, ymin, xmax, ymax = rect
+    x0, y0, x1, y1 = segments.T
+
+    # Segments with both ends inside are accepted as they are and segments
+    # with both ends past the same edge are rejected, as in Cohen-Sutherland;
+    # only the rest go through the parametric test.
+    visible = clip_points(segments[:, :2], rect) & clip_points(segments[:, 2:], rect)
+    rejected = (
+        ((x0 < xmin) & (x1 < xmin))
+        | ((x0 > xmax) & (x1 > xmax))
+        | ((y0 < ymin) & (y1 < ymin))
+        | ((y0 > ymax) & (y1 > ymax))
+    )
+    (partial,) = numpy.nonzero(~(visible | rejected))
+
+    clipped = segments.copy()
+    clipped[partial], visible[partial] = _liang_barsky(segments[partial], rect)
+
+    return clipped[visible], visible
+
+
+def _liang_barsky(segments, rect):
+    xmin, ymin, xmax, ymax = rect
+
+    x0 = segments[:, 0]
+    y0 = segments[:, 1]
+    dx = segments[:, 2] - x0
+    dy = segments[:, 3] - y0
+
+    p = numpy.stack([-dx, dx, -dy, dy])
+    q = numpy.stack([x0 - xmin, xmax - x0, y0 - ymin, ymax - y0])
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        r = q / p
+
+    u0 = numpy.max(numpy.where(p < 0, r, 0), axis=0, initial=0)[:, None]
+    u1 = numpy.min(numpy.where(p > 0, r, 1), axis=0, initial=1)[:, None]
+
+    visible = (u0[:, 0] <= u1[:, 0]) & ~numpy.any((p == 0) & (q < 0), axis=0)
+
+    start = segments[:, :2]
+    end = segments[:, 2:]
+    delta = end - start
+
+    # Endpoints that aren't clipped are kept bit for bit, so callers can tell
+    # whether consecutive segments still share a vertex.
+    clipped = numpy.hstack(
+        [
+            numpy.where(u0 == 0, start, start + u0 * delta),
+            numpy.where(u1 == 1, end, start + u1 * delta),
+        ]
+    )
+
+    return clipped, visible
+
+
+def _clip_polygon_edge(coords, axis, bound, keep_above):
+    current = coords
+    previous = numpy.roll(coords, 1, axis=0)
+
+    if keep_above:
+        inside = current[:, axis] >= bound
+    else:
+        inside = current[:, axis] <= bound
+
+    crossing = inside != numpy.roll(inside, 1)
+
+    start = previous[crossing]
+    end = current[crossing]
+
+    t = (bound - start[:, axis]) / (end[:, axis] - start[:, axis])
+    intersections = start + t[:, None] * (end - start)
+    intersections[:, axis] = bound
+
+    # Each input edge (previous, current) emits its intersection with the
+    # boundary, if any, followed by its end vertex, if it is inside.
+    counts = crossing.astype(numpy.intp) + inside
+    offsets = numpy.cumsum(counts) - counts
+
+    result = numpy.empty((counts.sum(), 2))
+    result[offsets[crossing]] = intersections
+    result[offsets[inside] + crossing[inside]] = current[inside]
+
+    return result
+
+
+def clip_polygon(coords, rect):
+    """
+    Clip a polygon against a rectangle with Sutherland-Hodgman.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        An (N, 2) array with the polygon vertices.
+    rect : tuple
+        The clipping rectangle as (xmin, ymin, xmax, ymax).
+
+    Returns
+    -------
+    numpy.ndarray
+        The vertices of the clipped polygon, empty if nothing is visible.
+    """
+    xmin, ymin, xmax, ymax = rect
+
+    for axis, bound, keep_above in [
+        (0, xmin, True),
+        (0, xmax, False),
+        (1, ymin, True),
+        (1, ymax, False),
+    ]:
+        if not len(coords):
+            break
+
+        coords = _clip_polygon_edge(coords, axis, bound, keep_above)
+
+    return coords
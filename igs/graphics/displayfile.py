@@ -1,12 +1,66 @@
+import itertools
+
+import numpy
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt
 
+from igs.graphics.arena import VertexArena, extents, gather_ranges
+from igs.graphics.engine import transform_shapes
+from igs.graphics.scene import SceneFile, write_scene
+from igs.graphics.shape import Position, similarity_scale
+from igs.graphics.spatial import GridIndex
+
+# Past this many runs of rows, inserting or removing rows resets the model
+# rather than telling views about every run.
+_MAX_RUNS = 16
+
+# Rows are described a chunk of this many at a time.
+_SAVED_CHUNK_SIZE = 4096
+
 
 class DisplayFile(QtCore.QAbstractListModel):
+    # Emitted with the bounds, as (xmin, ymin, xmax, ymax) tuples in world
+    # coordinates, of the regions whose drawing changed: where shapes were
+    # before a change and where they are after it.
+    regionsChanged = QtCore.pyqtSignal(list)
+
+    # Emitted with the row, the old name and the new name of a renamed shape.
+    nameChanged = QtCore.pyqtSignal(int, str, str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._shapes = []
 
+        # Every row owns a slot in the vertex arena, which holds the
+        # vertices of all shapes, and is known by it to the spatial index.
+        # Slots stay the same while their rows exist, so neither needs
+        # updating when rows shift.
+        self._handles = []
+        self._by_handle = {}
+
+        # The row of every slot, found when first needed after rows change.
+        self._slot_rows = None
+        self._arena = VertexArena()
+        self._index = GridIndex()
+
+        # Slots whose shapes still have a pending transform, which the arena
+        # doesn't know about.
+        self._pending = {}
+
+        self._styles = []
+        self._style_codes = {}
+
+        # The scene file shapes were loaded from. Until a loaded shape is
+        # asked for, it is only known by its slot, which is also its record
+        # in the file, and the arena holds its vertices.
+        self._scene = None
+        self._lazy = numpy.zeros(0, dtype=bool)
+
+        self._generation = self._arena.generation()
+
+        # Where large transforms are done, if not in this process.
+        self._engine = None
+
     def add(self, shape):
         position = self.rowCount()
 
@@ -20,14 +74,14 @@ class DisplayFile(QtCore.QAbstractListModel):
         if index.row() >= len(self._shapes):
             return QtCore.QVariant()
 
-        object = self._shapes[index.row()]
+        object = self._row_shape(index.row())
 
         if role == Qt.DisplayRole:
             hash_value = hex(hash(object))
             return f"{object} ({hash_value[2:8]})"
 
         elif role == Qt.EditRole:
-            return f"{self._shapes[index.row()]}"
+            return f"{object}"
 
         elif role == Qt.UserRole:
             return object.clone()
@@ -48,24 +102,16 @@ class DisplayFile(QtCore.QAbstractListModel):
             position + rows - 1,
         )
 
-        for _ in range(rows):
-            self._shapes.insert(position, None)
+        self._shapes[position:position] = [None] * rows
+        self._handles[position:position] = [self._arena.allocate() for _ in range(rows)]
+        self._slot_rows = None
 
         self.endInsertRows()
 
         return True
 
     def removeRows(self, position, rows, parent=QtCore.QModelIndex()):
-        self.beginRemoveRows(
-            QtCore.QModelIndex(),
-            position,
-            position + rows - 1,
-        )
-
-        for _ in range(rows):
-            self._shapes.pop(position)
-
-        self.endRemoveRows()
+        self.remove_many(range(position, position + rows))
 
         return True
 
@@ -77,19 +123,652 @@ class DisplayFile(QtCore.QAbstractListModel):
             return False
 
         if role == Qt.EditRole:
-            shape = self._shapes[index.row()]
+            shape = self._row_shape(index.row())
+            name = str(shape)
             shape.set_name(value)
 
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+            self.nameChanged.emit(index.row(), name, str(value))
+
             return True
 
         elif role == Qt.UserRole:
             self._shapes[index.row()] = value
+
+            regions = self._store(self._handles[index.row()], value)
+            self._rebind_if_moved()
+
             self.dataChanged.emit(index, index, [role])
+            self.regionsChanged.emit(regions)
 
             return True
 
         else:
             return False
 
+    def add_many(self, shapes):
+        """
+        Append shapes, with a single row insertion.
+
+        Parameters
+        ----------
+        shapes : iterable of Shape
+            The shapes to append.
+        """
+        shapes = list(shapes)
+
+        if not shapes:
+            return
+
+        position = len(self._shapes)
+
+        self.beginInsertRows(
+            QtCore.QModelIndex(),
+            position,
+            position + len(shapes) - 1,
+        )
+
+        handles = [self._arena.allocate() for _ in shapes]
+        regions = self._store_many(handles, shapes)
+
+        self._shapes.extend(shapes)
+        self._handles.extend(handles)
+        self._slot_rows = None
+
+        self.endInsertRows()
+
+        self.regionsChanged.emit(regions)
+
+    def insert_many(self, rows, shapes):
+        """
+        Insert shapes so that they end up at some rows.
+
+        Like removing rows, runs of consecutive rows are inserted together,
+        and the model is reset instead when there are many of them.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows of the shapes once inserted, in any order.
+        shapes : iterable of Shape
+            The shape of every row.
+        """
+        inserted = sorted(zip(rows, shapes), key=lambda item: item[0])
+
+        if not inserted:
+            return
+
+        rows = numpy.array([row for row, _ in inserted], dtype=numpy.intp)
+        shapes = [shape for _, shape in inserted]
+
+        runs = _runs(rows)
+        reset = len(runs) > _MAX_RUNS
+
+        handles = [self._arena.allocate() for _ in shapes]
+        regions = self._store_many(handles, shapes)
+
+        if reset:
+            self.beginResetModel()
+
+            added = numpy.zeros(len(self._shapes) + len(rows), dtype=bool)
+            added[rows] = True
+
+            old_shapes, new_shapes = iter(self._shapes), iter(shapes)
+            old_handles, new_handles = iter(self._handles), iter(handles)
+
+            self._shapes = [
+                next(new_shapes) if new else next(old_shapes) for new in added.tolist()
+            ]
+            self._handles = [
+                next(new_handles) if new else next(old_handles)
+                for new in added.tolist()
+            ]
+
+            self.endResetModel()
+
+        else:
+            # Inserting from the first run on puts the rows of every run where
+            # they belong, as the rows before them are in place already.
+            done = 0
+
+            for first, last in runs:
+                count = last - first + 1
+
+                self.beginInsertRows(QtCore.QModelIndex(), first, last)
+
+                self._shapes[first:first] = shapes[done : done + count]
+                self._handles[first:first] = handles[done : done + count]
+
+                self.endInsertRows()
+
+                done += count
+
+        self._slot_rows = None
+        self.regionsChanged.emit(regions)
+
+    def remove_many(self, rows):
+        """
+        Remove rows, in any order.
+
+        Runs of consecutive rows are removed together. When there are many
+        of them, the model is reset instead, which views handle in one go.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows to remove.
+        """
+        rows = numpy.unique(numpy.fromiter(rows, dtype=numpy.intp))
+
+        if not len(rows):
+            return
+
+        runs = _runs(rows)
+        reset = len(runs) > _MAX_RUNS
+
+        handles = [self._handles[row] for row in rows]
+        regions = [
+            self._index.bounds(handle) for handle in handles if handle in self._index
+        ]
+
+        if reset:
+            self.beginResetModel()
+
+            kept = numpy.ones(len(self._shapes), dtype=bool)
+            kept[rows] = False
+
+            self._shapes = list(itertools.compress(self._shapes, kept))
+            self._handles = list(itertools.compress(self._handles, kept))
+
+        else:
+            # Removing from the last run on keeps the rows of the other runs
+            # where they are.
+            for first, last in reversed(runs):
+                self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+
+                del self._shapes[first : last + 1]
+                del self._handles[first : last + 1]
+
+                self.endRemoveRows()
+
+        for handle in handles:
+            self._by_handle.pop(handle, None)
+            self._pending.pop(handle, None)
+            self._index.remove(handle)
+
+        self._settle(handles)
+
+        self._arena.free_many(handles)
+        self._slot_rows = None
+        self._rebind_if_moved()
+
+        if reset:
+            self.endResetModel()
+
+        if regions:
+            self.regionsChanged.emit(regions)
+
+    def replace_many(self, rows, shapes):
+        """
+        Replace the shapes of rows.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows to replace, in any order.
+        shapes : iterable of Shape
+            The new shape of every row.
+        """
+        replaced = dict(zip(rows, shapes))
+
+        if not replaced:
+            return
+
+        rows = list(replaced)
+        shapes = list(replaced.values())
+        handles = [self._handles[row] for row in rows]
+
+        regions = [
+            self._index.bounds(handle) for handle in handles if handle in self._index
+        ]
+        regions += self._store_many(handles, shapes)
+
+        for row, shape in zip(rows, shapes):
+            self._shapes[row] = shape
+
+        for first, last in _runs(numpy.unique(rows)):
+            self.dataChanged.emit(self.index(first), self.index(last), [Qt.UserRole])
+
+        self.regionsChanged.emit(regions)
+
+    def transform_rows(self, rows, transform, pivot=None):
+        """
+        Transform the shapes of rows, all at once.
+
+        The vertices of every shape are transformed together with a single
+        numpy operation, and views are told about the change once per run of
+        rows.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows to transform, in any order.
+        transform : Transform
+            An affine transform.
+        pivot : Position or str, optional
+            The point the transform is applied around: the origin if None, a
+            fixed point if a position, or the center of every shape if
+            "center". By default None.
+        """
+        rows = numpy.unique(numpy.fromiter(rows, dtype=numpy.intp))
+
+        if not len(rows):
+            return
+
+        handles = [self._handles[row] for row in rows]
+        regions = [
+            self._index.bounds(handle) for handle in handles if handle in self._index
+        ]
+
+        # The arena holds vertices before any pending transform, so shapes
+        # with one are brought up to date first.
+        pending = [handle for handle in handles if handle in self._pending]
+
+        if pending:
+            self._store_many(
+                pending, [self._by_handle[handle].flush() for handle in pending]
+            )
+
+        handles = numpy.array(handles, dtype=numpy.intp)
+        handles = handles[self._arena.lengths(handles) > 0]
+
+        if not len(handles):
+            return
+
+        if isinstance(pivot, Position):
+            pivot = (pivot.x(), pivot.y())
+
+        matrix = transform.matrix()
+        lengths = self._arena.lengths(handles)
+        engine = self._engine
+
+        def rewrite(vertices, sources, destination):
+            if engine is not None and lengths.sum() >= engine.min_vertices():
+                return engine.transform(
+                    vertices, sources, lengths, destination, matrix, pivot
+                )
+
+            transformed, bounds, centers = transform_shapes(
+                vertices[gather_ranges(sources, lengths)], lengths, matrix, pivot
+            )
+            vertices[destination : destination + len(transformed)] = transformed
+
+            return bounds, centers
+
+        # The new vertices are written straight into the arena, by the
+        # engine if there is one and they are enough to be worth it.
+        views, (bounds, centers) = self._arena.rewrite_many(handles, rewrite)
+        self._index.insert_many(handles, bounds)
+
+        scale = similarity_scale(matrix)
+        boxes = [tuple(box) for box in bounds.tolist()]
+
+        for handle, view, box, center in zip(
+            handles.tolist(), views, boxes, centers.tolist()
+        ):
+            shape = self._by_handle.get(handle)
+
+            # Shapes not built yet will be built from the arena anyway.
+            if shape is not None:
+                shape.reset(view, box, Position(*center), scale)
+
+        self._rebind_if_moved()
+
+        for first, last in _runs(rows):
+            self.dataChanged.emit(self.index(first), self.index(last), [Qt.UserRole])
+
+        self.regionsChanged.emit(regions + boxes)
+
+    def _store_many(self, handles, shapes):
+        # Like _store, for many shapes, whose vertices are all stored and
+        # indexed at once.
+        deferred = [shape.deferred() for shape in shapes]
+        coords = [vertices for vertices, _ in deferred]
+        bounds = _bounds(coords)
+
+        for row, (shape, (_, pending)) in enumerate(zip(shapes, deferred)):
+            if pending is not None or not len(coords[row]):
+                bounds[row] = shape.loose_bounds()
+
+        views = self._arena.store_many(
+            handles,
+            coords,
+            [shape.primitive().value for shape in shapes],
+            [self._style_code(shape.style()) for shape in shapes],
+        )
+
+        # Shapes without vertices are left out of the index, like they are
+        # when loaded.
+        filled = ~numpy.isnan(bounds).any(axis=1)
+
+        for handle in itertools.compress(handles, ~filled):
+            self._index.remove(handle)
+
+        self._index.insert_many(itertools.compress(handles, filled), bounds[filled])
+        self._settle(handles)
+
+        for handle, shape, view, (_, pending) in zip(handles, shapes, views, deferred):
+            shape.rebind(view)
+            self._by_handle[handle] = shape
+
+            if pending is None:
+                self._pending.pop(handle, None)
+            else:
+                self._pending[handle] = pending
+
+        self._rebind_if_moved()
+
+        return [tuple(box) for box in bounds[filled].tolist()]
+
+    def _store(self, handle, shape):
+        # Puts a shape in the index and its vertices in the arena, returning
+        # the regions whose drawing changed.
+        coords, pending = shape.deferred()
+        bounds = shape.loose_bounds()
+
+        regions = []
+        if handle in self._index:
+            regions.append(self._index.bounds(handle))
+
+        self._by_handle[handle] = shape
+
+        if numpy.isnan(bounds).any():
+            self._index.remove(handle)
+        else:
+            self._index.insert(handle, bounds)
+            regions.append(bounds)
+
+        self._settle([handle])
+
+        view = self._arena.store(
+            handle,
+            coords,
+            shape.primitive().value,
+            self._style_code(shape.style()),
+        )
+
+        # The shape takes the stored vertices as its own, so they are kept
+        # only once.
+        shape.rebind(view)
+
+        if pending is None:
+            self._pending.pop(handle, None)
+        else:
+            self._pending[handle] = pending
+
+        return regions
+
+    def load(self, path):
+        """
+        Replace all shapes with those of a scene file.
+
+        The file is memory-mapped and shapes are indexed by the bounds it
+        records, so no vertices are read until they are drawn or edited, and
+        shapes are only built once they are asked for.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Raises
+        ------
+        ValueError
+            If the file isn't a scene file.
+        """
+        scene = SceneFile(path)
+        table = scene.table()
+        count = len(scene)
+
+        regions = [
+            self._index.bounds(handle)
+            for handle in self._handles
+            if handle in self._index
+        ]
+
+        self.beginResetModel()
+
+        self._arena.adopt(
+            scene.vertices(),
+            table["offset"],
+            table["length"],
+            table["kind"],
+            table["style"],
+        )
+        self._generation = self._arena.generation()
+
+        (filled,) = numpy.nonzero(table["length"] > 0)
+        bounds = table["bounds"][filled]
+
+        self._index = GridIndex()
+        self._index.insert_many(filled.tolist(), bounds)
+
+        self._shapes = [None] * count
+        self._handles = list(range(count))
+        self._slot_rows = None
+        self._by_handle = {}
+        self._pending = {}
+
+        self._styles = scene.styles()
+        self._style_codes = {style: code for code, style in enumerate(self._styles)}
+
+        self._scene = scene
+        self._lazy = numpy.ones(count, dtype=bool)
+
+        self.endResetModel()
+
+        # Everything drawn changed, so the regions are merged into the extent
+        # of the shapes before and after loading.
+        regions = [_union(boxes) for boxes in (regions, bounds) if len(boxes)]
+
+        if regions:
+            self.regionsChanged.emit(regions)
+
+    def save(self, path):
+        """
+        Write all shapes to a scene file, streaming them out, so that the
+        vertices are never copied in memory as a whole.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        """
+        write_scene(path, self.records(), self._styles)
+
+    def records(self, rows=None):
+        """
+        Describe the shapes of rows the way scene files store them.
+
+        Parameters
+        ----------
+        rows : iterable of int, optional
+            The rows, by default all of them.
+
+        Yields
+        ------
+        tuple
+            The type name, name, primitive value, style code and vertices of
+            the shape of every row.
+        """
+        arena = self._arena
+        slots = self._handles if rows is None else [self._handles[row] for row in rows]
+
+        for first in range(0, len(slots), _SAVED_CHUNK_SIZE):
+            handles = slots[first : first + _SAVED_CHUNK_SIZE]
+            kinds = arena.kinds(handles).tolist()
+            styles = arena.styles(handles).tolist()
+
+            # Shapes never built are described by the scene file they were
+            # loaded from, a chunk at a time.
+            lazy = [
+                handle
+                for handle in handles
+                if handle not in self._by_handle and self._is_lazy(handle)
+            ]
+            types = names = {}
+
+            if lazy:
+                types = dict(zip(lazy, self._scene.types(lazy)))
+                names = dict(zip(lazy, self._scene.names(lazy)))
+
+            for handle, kind, style in zip(handles, kinds, styles):
+                shape = self._by_handle.get(handle)
+
+                if shape is not None:
+                    coords, pending = shape.deferred()
+
+                    if pending is not None:
+                        coords = pending.map(coords)
+
+                    yield type(shape).__name__, str(shape), kind, style, coords
+
+                elif handle in types:
+                    yield (
+                        types[handle].__name__,
+                        names[handle],
+                        kind,
+                        style,
+                        arena.view(handle),
+                    )
+
+    def _is_lazy(self, handle):
+        return handle < len(self._lazy) and self._lazy[handle]
+
+    def _settle(self, handles):
+        # Slots that were stored or freed no longer refer to the scene file.
+        if len(self._lazy):
+            handles = numpy.asarray(handles, dtype=numpy.intp)
+            self._lazy[handles[handles < len(self._lazy)]] = False
+
+    def _row_shape(self, row):
+        shape = self._shapes[row]
+
+        if shape is None:
+            handle = self._handles[row]
+
+            # The shape may have been built already, when asked for by slot.
+            if handle in self._by_handle or self._is_lazy(handle):
+                shape = self._shapes[row] = self.shape_at(handle)
+
+        return shape
+
+    def _style_code(self, style):
+        code = self._style_codes.get(style)
+
+        if code is None:
+            code = self._style_codes[style] = len(self._styles)
+            self._styles.append(style)
+
+        return code
+
+    def _rebind_if_moved(self):
+        # Vertices moved to a new array, so the shapes' views of the old one
+        # would keep it alive.
+        generation = self._arena.generation()
+
+        if generation == self._generation:
+            return
+
+        self._generation = generation
+
+        for handle, shape in self._by_handle.items():
+            shape.rebind(self._arena.view(handle))
+
+    def arena(self):
+        return self._arena
+
+    def engine(self):
+        return self._engine
+
+    def set_engine(self, engine):
+        """
+        Set where large transforms are done.
+
+        Parameters
+        ----------
+        engine : ProcessEngine or None
+            An engine, whose arrays the vertices are moved into, or None to
+            do every transform in this process.
+        """
+        self._engine = engine
+        self._arena.set_allocator(None if engine is None else engine.allocate)
+        self._rebind_if_moved()
+
+    def style(self, code):
+        return self._styles[code]
+
+    def styles(self):
+        return list(self._styles)
+
+    def slots(self, rows):
+        return numpy.array([self._handles[row] for row in rows], dtype=numpy.intp)
+
+    def rows(self, slots):
+        if self._slot_rows is None:
+            self._slot_rows = numpy.full(self._arena.num_slots(), -1, dtype=numpy.intp)
+            self._slot_rows[self._handles] = numpy.arange(len(self._handles))
+
+        return self._slot_rows[slots]
+
+    def shape_at(self, slot):
+        shape = self._by_handle.get(slot)
+
+        if shape is None:
+            shape = self._by_handle[slot] = self._scene.shape(
+                slot, self._arena.view(slot)
+            )
+            self._lazy[slot] = False
+
+        return shape
+
+    def pending(self, slots):
+        return numpy.isin(slots, list(self._pending))
+
+    def query_slots(self, xmin, ymin, xmax, ymax):
+        return numpy.array(self._index.query(xmin, ymin, xmax, ymax), dtype=numpy.intp)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        handles = self._index.query(xmin, ymin, xmax, ymax)
+
+        return [self.shape_at(handle) for handle in handles]
+
     def __iter__(self):
-        return iter(self._shapes)
+        return (self._row_shape(row) for row in range(len(self._shapes)))
+
+
+def _runs(rows):
+    # The first and last rows of every run of consecutive rows, which must be
+    # sorted and unique.
+    (breaks,) = numpy.nonzero(numpy.diff(rows) != 1)
+
+    firsts = numpy.append(rows[:1], rows[breaks + 1])
+    lasts = numpy.append(rows[breaks], rows[-1:])
+
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+def _bounds(coords):
+    # The bounds of many sets of vertices, with nan for empty ones.
+    lengths = numpy.array([len(vertices) for vertices in coords], dtype=numpy.intp)
+
+    if not lengths.any():
+        return numpy.full((len(coords), 4), numpy.nan)
+
+    return extents(numpy.concatenate(coords), lengths)
+
+
+def _union(boxes):
+    boxes = numpy.asarray(boxes, dtype=numpy.float64).reshape(-1, 4)
+
+    return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
@@ -0,0 +1,241 @@
+import multiprocessing
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy
+
+from igs.graphics.arena import extents, gather_ranges
+
+
+def transform_shapes(vertices, lengths, matrix, pivot=None):
+    """
+    Transform the vertices of many shapes at once, each around a pivot.
+
+    Parameters
+    ----------
+    vertices : numpy.ndarray
+        The vertices of all shapes, one after the other.
+    lengths : numpy.ndarray
+        The number of vertices of every shape, none of them zero.
+    matrix : numpy.ndarray
+        The 3x3 matrix of an affine transform.
+    pivot : tuple or str, optional
+        The point the transform is applied around: the origin if None, a
+        point if an (x, y) pair, or the center of every shape if "center". By
+        default None.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The transformed vertices, the bounds of every shape as (xmin, ymin,
+        xmax, ymax) rows, and the transformed center of every shape, the
+        mean of its vertices.
+    """
+    starts = numpy.cumsum(lengths) - lengths
+    centers = numpy.add.reduceat(vertices, starts) / lengths[:, None]
+
+    if pivot is None:
+        origins = numpy.zeros((1, 2))
+    elif isinstance(pivot, str) and pivot == "center":
+        origins = centers
+    else:
+        origins = numpy.array([pivot], dtype=numpy.float64)
+
+    # Moving every shape to its pivot, transforming it and moving it back
+    # only changes the translation of the transform.
+    linear = matrix[:2, :2]
+    shifts = matrix[2, :2] + origins - origins @ linear
+
+    if len(shifts) > 1:
+        vertices = vertices @ linear + numpy.repeat(shifts, lengths, axis=0)
+    else:
+        vertices = vertices @ linear + shifts
+
+    return vertices, extents(vertices, lengths), centers @ linear + shifts
+
+
+class ProcessEngine:
+    """
+    Transforms the shapes of a display file on a pool of processes.
+
+    Display files given the engine keep their vertices in arrays from
+    `allocate`, which live in shared memory the worker processes map too. A
+    transform sends the workers only offsets and a matrix, and they write the
+    transformed vertices straight into the display file's array, so no
+    vertices are copied between processes either way.
+
+    Starting processes and splitting work has a cost, so transforms of fewer
+    vertices than a threshold are left to the display file.
+    """
+
+    def __init__(self, processes=None, min_vertices=2**20):
+        """
+        Create a new engine, starting its processes.
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of worker processes, by default one per CPU.
+        min_vertices : int, optional
+            The fewest vertices transformed on the workers, by default 2**20.
+        """
+        self._processes = processes or os.cpu_count() or 1
+        self._min_vertices = min_vertices
+
+        # Workers are spawned rather than forked, since forking a process
+        # with Qt's threads running isn't safe.
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(self._processes)
+
+    def processes(self):
+        return self._processes
+
+    def min_vertices(self):
+        return self._min_vertices
+
+    def close(self):
+        """
+        Stop the worker processes. Arrays already allocated stay valid.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def allocate(self, capacity):
+        """
+        Create an array of vertices in shared memory.
+
+        The memory is released once neither the array nor any view of it is
+        left.
+
+        Parameters
+        ----------
+        capacity : int
+            The number of vertices.
+
+        Returns
+        -------
+        numpy.ndarray
+            An uninitialized (capacity, 2) array of float64.
+        """
+        return numpy.asarray(_SharedBlock(capacity))
+
+    def transform(self, vertices, sources, lengths, destination, matrix, pivot=None):
+        """
+        Transform the vertices of many shapes, as `transform_shapes` does,
+        writing them back into the array they are in.
+
+        Parameters
+        ----------
+        vertices : numpy.ndarray
+            An array from `allocate`.
+        sources : numpy.ndarray
+            The offset of the vertices of every shape.
+        lengths : numpy.ndarray
+            The number of vertices of every shape, none of them zero.
+        destination : int
+            The offset past which the transformed vertices are written, one
+            shape after the other.
+        matrix : numpy.ndarray
+            The 3x3 matrix of an affine transform.
+        pivot : tuple or str, optional
+            The point the transform is applied around, by default None.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The bounds and the transformed centers of every shape.
+        """
+        block = _block_of(vertices)
+
+        if block is None:
+            raise ValueError("vertices are not in shared memory")
+
+        # Shapes are split into about as many vertices per chunk, a few
+        # chunks per process so that none is left waiting on a slow one.
+        ends = numpy.cumsum(lengths)
+        chunks = numpy.linspace(0, ends[-1], 4 * self._processes + 1)[1:-1]
+        splits = numpy.unique(numpy.searchsorted(ends, chunks, side="right"))
+        splits = splits[(splits > 0) & (splits < len(lengths))]
+
+        jobs = []
+
+        for first, last in zip([0, *splits.tolist()], [*splits.tolist(), len(lengths)]):
+            start = destination + (ends[first - 1] if first else 0)
+
+            jobs.append(
+                (
+                    block.name(),
+                    block.capacity(),
+                    sources[first:last],
+                    lengths[first:last],
+                    start,
+                    matrix,
+                    pivot,
+                )
+            )
+
+        results = self._pool.starmap(_transform_chunk, jobs)
+
+        bounds = numpy.concatenate([bounds for bounds, _ in results])
+        centers = numpy.concatenate([centers for _, centers in results])
+
+        return bounds, centers
+
+
+class _SharedBlock:
+    """
+    A shared memory block of vertices, closed and unlinked once no array is
+    left using it.
+    """
+
+    def __init__(self, capacity):
+        self._memory = SharedMemory(create=True, size=max(16 * capacity, 1))
+        self._capacity = capacity
+        self._array = _map_vertices(self._memory, capacity)
+
+        # Arrays made from the block reference it rather than the memory, so
+        # it lives as long as they do.
+        self.__array_interface__ = self._array.__array_interface__
+
+    def __del__(self):
+        self._array = None
+        self._memory.close()
+        self._memory.unlink()
+
+    def name(self):
+        return self._memory.name
+
+    def capacity(self):
+        return self._capacity
+
+
+def _block_of(array):
+    base = array
+
+    while isinstance(base, numpy.ndarray):
+        base = base.base
+
+    return base if isinstance(base, _SharedBlock) else None
+
+
+def _map_vertices(memory, capacity):
+    return numpy.ndarray((capacity, 2), dtype=numpy.float64, buffer=memory.buf)
+
+
+def _transform_chunk(name, capacity, sources, lengths, destination, matrix, pivot):
+    # Runs on a worker process, which maps the block for the time of a chunk.
+    memory = SharedMemory(name)
+
+    try:
+        vertices = _map_vertices(memory, capacity)
+        transformed, bounds, centers = transform_shapes(
+            vertices[gather_ranges(sources, lengths)], lengths, matrix, pivot
+        )
+        vertices[destination : destination + len(transformed)] = transformed
+
+        # The memory can't be closed while arrays still use it.
+        del vertices
+    finally:
+        memory.close()
+
+    return bounds, centers
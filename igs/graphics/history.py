@@ -0,0 +1,315 @@
+import numpy
+from PyQt5.QtCore import Qt
+
+from igs.graphics.scene import SHAPE_TYPES
+from igs.graphics.shape import restore_shape
+from igs.graphics.transform import Transform
+
+
+class History:
+    """
+    Undoable edits of a display file.
+
+    Edits are recorded by what they did rather than by copies of the shapes
+    they touched: a transform by its matrix, pivot and rows, undone by
+    applying the inverse matrix, a rename by both names, and only deletions
+    and creations by the geometry of their shapes.
+
+    Undoing many transforms with inverse matrices piles up rounding errors,
+    so every few transforms also keep the geometry they replaced, which undo
+    restores exactly. Once all records take more memory than allowed, the
+    oldest are forgotten.
+
+    Edits are recorded by row, so they stay valid as long as rows are only
+    changed through the history, or appended after the rows it knows about.
+    """
+
+    def __init__(self, display_file, memory_limit=64 * 2**20, checkpoint_interval=16):
+        """
+        Create a new history.
+
+        Parameters
+        ----------
+        display_file : DisplayFile
+            The display file edited.
+        memory_limit : int, optional
+            Bytes records can take, by default 64 MiB.
+        checkpoint_interval : int, optional
+            Number of transforms between those that keep the geometry they
+            replaced, by default 16.
+        """
+        self._display_file = display_file
+        self._memory_limit = memory_limit
+        self._checkpoint_interval = checkpoint_interval
+
+        self._undone = []
+        self._done = []
+        self._memory = 0
+        self._transforms = 0
+        self._replaying = False
+
+        # Renames come from views editing the display file directly.
+        display_file.nameChanged.connect(self._renamed)
+
+    def memory(self):
+        return self._memory
+
+    def memory_limit(self):
+        return self._memory_limit
+
+    def can_undo(self):
+        return bool(self._done)
+
+    def can_redo(self):
+        return bool(self._undone)
+
+    def clear(self):
+        self._done = []
+        self._undone = []
+        self._memory = 0
+        self._transforms = 0
+
+    def add(self, shape):
+        """
+        Append a shape.
+
+        Parameters
+        ----------
+        shape : Shape
+            The shape.
+        """
+        display_file = self._display_file
+        row = display_file.rowCount()
+
+        display_file.add(shape)
+        self._push(_Insertion([row], _Geometry(display_file, [row])))
+
+    def remove_many(self, rows):
+        """
+        Remove rows, in any order.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows.
+        """
+        rows = numpy.unique(numpy.fromiter(rows, dtype=numpy.intp))
+
+        if not len(rows):
+            return
+
+        geometry = _Geometry(self._display_file, rows)
+
+        self._display_file.remove_many(rows)
+        self._push(_Removal(rows, geometry))
+
+    def transform_rows(self, rows, transform, pivot=None):
+        """
+        Transform the shapes of rows, as DisplayFile.transform_rows does.
+
+        Parameters
+        ----------
+        rows : iterable of int
+            The rows, in any order.
+        transform : Transform
+            An affine transform.
+        pivot : Position or str, optional
+            The point the transform is applied around, by default None.
+        """
+        display_file = self._display_file
+        rows = numpy.unique(numpy.fromiter(rows, dtype=numpy.intp))
+
+        if not len(rows):
+            return
+
+        matrix = numpy.array(transform.matrix(), dtype=numpy.float64)
+        geometry = None
+
+        # A transform that can't be inverted is always kept along with the
+        # geometry it replaces. Checkpoints that would take a large part of
+        # the memory allowed are put off until a transform of fewer vertices.
+        singular = numpy.isclose(numpy.linalg.det(matrix), 0)
+        due = self._transforms + 1 >= self._checkpoint_interval
+
+        if singular or due:
+            vertices = display_file.arena().lengths(display_file.slots(rows)).sum()
+
+            if singular or 16 * vertices <= self._memory_limit // 4:
+                geometry = _Geometry(display_file, rows)
+
+        display_file.transform_rows(rows, transform, pivot)
+
+        self._transforms = 0 if geometry is not None else self._transforms + 1
+        self._push(_Transformation(rows, matrix, pivot, geometry))
+
+    def undo(self):
+        """
+        Undo the last edit.
+
+        Returns
+        -------
+        bool
+            Whether there was an edit to undo.
+        """
+        if not self._done:
+            return False
+
+        edit = self._done.pop()
+        self._replay(edit.undo)
+        self._undone.append(edit)
+
+        return True
+
+    def redo(self):
+        """
+        Redo the last edit undone.
+
+        Returns
+        -------
+        bool
+            Whether there was an edit to redo.
+        """
+        if not self._undone:
+            return False
+
+        edit = self._undone.pop()
+        self._replay(edit.redo)
+        self._done.append(edit)
+
+        return True
+
+    def _replay(self, action):
+        self._replaying = True
+
+        try:
+            action(self._display_file)
+        finally:
+            self._replaying = False
+
+    def _renamed(self, row, old, new):
+        if not self._replaying and old != new:
+            self._push(_Renaming(row, old, new))
+
+    def _push(self, edit):
+        # Edits undone can't be redone past a new edit.
+        for undone in self._undone:
+            self._memory -= undone.memory()
+
+        self._undone = []
+        self._done.append(edit)
+        self._memory += edit.memory()
+
+        forgotten = 0
+
+        while self._memory > self._memory_limit and forgotten < len(self._done):
+            self._memory -= self._done[forgotten].memory()
+            forgotten += 1
+
+        del self._done[:forgotten]
+
+
+class _Geometry:
+    """
+    The shapes of some rows, with their vertices packed into a single array.
+    """
+
+    def __init__(self, display_file, rows):
+        records = list(display_file.records(rows))
+
+        self._types = [record[0] for record in records]
+        self._names = [record[1] for record in records]
+        self._styles = [display_file.style(record[3]) for record in records]
+
+        lengths = [len(record[4]) for record in records]
+        self._ends = numpy.cumsum(lengths).tolist()
+        self._vertices = numpy.concatenate(
+            [record[4] for record in records] + [numpy.empty((0, 2))]
+        )
+
+    def memory(self):
+        names = sum(len(name) for name in self._names)
+
+        return self._vertices.nbytes + 8 * len(self._ends) + names
+
+    def shapes(self):
+        shapes = []
+        start = 0
+
+        for kind, name, style, end in zip(
+            self._types, self._names, self._styles, self._ends
+        ):
+            shape = restore_shape(SHAPE_TYPES[kind], self._vertices[start:end])
+            shape.set_name(name)
+            shape.set_style(style.color, style.width)
+
+            shapes.append(shape)
+            start = end
+
+        return shapes
+
+
+class _Transformation:
+    def __init__(self, rows, matrix, pivot, geometry):
+        self._rows = rows
+        self._matrix = matrix
+        self._pivot = pivot
+        self._geometry = geometry
+
+    def memory(self):
+        geometry = 0 if self._geometry is None else self._geometry.memory()
+
+        return self._rows.nbytes + self._matrix.nbytes + geometry
+
+    def undo(self, display_file):
+        if self._geometry is not None:
+            display_file.replace_many(self._rows.tolist(), self._geometry.shapes())
+            return
+
+        inverse = Transform(numpy.linalg.inv(self._matrix))
+        display_file.transform_rows(self._rows, inverse, self._pivot)
+
+    def redo(self, display_file):
+        transform = Transform(self._matrix)
+        display_file.transform_rows(self._rows, transform, self._pivot)
+
+
+class _Insertion:
+    def __init__(self, rows, geometry):
+        self._rows = rows
+        self._geometry = geometry
+
+    def memory(self):
+        return 8 * len(self._rows) + self._geometry.memory()
+
+    def undo(self, display_file):
+        display_file.remove_many(self._rows)
+
+    def redo(self, display_file):
+        display_file.insert_many(self._rows, self._geometry.shapes())
+
+
+class _Removal(_Insertion):
+    def undo(self, display_file):
+        super().redo(display_file)
+
+    def redo(self, display_file):
+        super().undo(display_file)
+
+
+class _Renaming:
+    def __init__(self, row, old, new):
+        self._row = row
+        self._old = old
+        self._new = new
+
+    def memory(self):
+        return len(self._old) + len(self._new)
+
+    def undo(self, display_file):
+        self._rename(display_file, self._old)
+
+    def redo(self, display_file):
+        self._rename(display_file, self._new)
+
+    def _rename(self, display_file, name):
+        display_file.setData(display_file.index(self._row), name, Qt.EditRole)
@@ -0,0 +1,310 @@
+import json
+import os
+import re
+
+import numpy
+
+from igs.graphics.shape import ClosedPolyline, Line, Point, Polyline, Position
+
+FORMATS = ["csv", "wkt", "geojson"]
+
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".wkt": "wkt",
+    ".geojson": "geojson",
+    ".geojsonl": "geojson",
+    ".json": "geojson",
+    ".jsonl": "geojson",
+    ".ndjson": "geojson",
+}
+
+# The innermost parenthesized lists of a WKT geometry, and the first ring of
+# every polygon in one.
+_WKT_LISTS = re.compile(r"\(([^()]*)\)")
+_WKT_OUTER_RINGS = re.compile(r"\(\s*\(([^()]*)\)")
+
+
+def shape_from_coordinates(coords):
+    """
+    Create the simplest shape with some vertices.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        The vertices, as an (N, 2) array.
+
+    Returns
+    -------
+    Shape or None
+        A point for one vertex, a line for two, a closed polyline if the last
+        vertex repeats the first, a polyline otherwise, or None if there are
+        no vertices.
+    """
+    if len(coords) == 0:
+        return None
+
+    if len(coords) == 1:
+        return Point(Position(*coords[0]))
+
+    if len(coords) == 2:
+        return Line(Position(*coords[0]), Position(*coords[1]))
+
+    if len(coords) > 3 and numpy.array_equal(coords[0], coords[-1]):
+        return ClosedPolyline(coords[:-1])
+
+    return Polyline(coords)
+
+
+def guess_format(path, first_line=""):
+    """
+    Guess the format of a file from its name or, failing that, from its first
+    line.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    first_line : str, optional
+        The first line of the file, by default empty.
+
+    Returns
+    -------
+    str
+        One of the supported formats.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+
+    line = first_line.lstrip()
+
+    if line.startswith("{"):
+        return "geojson"
+
+    if line[:1].isalpha():
+        return "wkt"
+
+    return "csv"
+
+
+def parse_csv(line):
+    """
+    Parse a line of comma-separated coordinates, as in "x0,y0,x1,y1,...".
+
+    Returns
+    -------
+    list of Shape
+        The shape of the line.
+    """
+    coords = numpy.array(line.split(","), dtype=numpy.float64)
+
+    if len(coords) % 2:
+        raise ValueError("odd number of coordinates")
+
+    return [shape_from_coordinates(coords.reshape(-1, 2))]
+
+
+def _wkt_coordinates(text):
+    vertices = text.split(",")
+    dimensions = len(vertices[0].split())
+    coords = numpy.array(text.replace(",", " ").split(), dtype=numpy.float64)
+
+    # Any z and m values are dropped.
+    return coords.reshape(-1, dimensions)[:, :2]
+
+
+def parse_wkt(line):
+    """
+    Parse a line holding a WKT point, line string or polygon, or a multi
+    geometry of one of them. Polygons are read without their holes.
+
+    Returns
+    -------
+    list of Shape
+        The shapes of the line.
+    """
+    kind = line.split("(", 1)[0].strip().split()[0].upper()
+
+    if kind in ("POINT", "LINESTRING", "POLYGON"):
+        lists = _WKT_LISTS.findall(line)[:1]
+    elif kind in ("MULTIPOINT", "MULTILINESTRING"):
+        lists = _WKT_LISTS.findall(line)
+    elif kind == "MULTIPOLYGON":
+        lists = _WKT_OUTER_RINGS.findall(line)
+    else:
+        raise ValueError(f"unsupported geometry {kind}")
+
+    if kind == "MULTIPOINT":
+        # Points can be listed with or without parentheses of their own.
+        lists = [point for text in lists for point in text.split(",")]
+
+    shapes = [shape_from_coordinates(_wkt_coordinates(text)) for text in lists]
+
+    if kind in ("POLYGON", "MULTIPOLYGON"):
+        shapes = [_closed(shape) for shape in shapes]
+
+    return shapes
+
+
+def _closed(shape):
+    if isinstance(shape, ClosedPolyline) or shape is None:
+        return shape
+
+    return ClosedPolyline(shape.coordinates())
+
+
+def parse_geojson(line):
+    """
+    Parse a line holding a GeoJSON geometry, feature or feature collection.
+    Features are named after their "name" property, if any, and polygons are
+    read without their holes.
+
+    Returns
+    -------
+    list of Shape
+        The shapes of the line.
+    """
+    return _geojson_shapes(json.loads(line))
+
+
+def _geojson_shapes(object, name=None):
+    kind = object.get("type")
+
+    if kind == "FeatureCollection":
+        return [
+            shape
+            for feature in object["features"]
+            for shape in _geojson_shapes(feature)
+        ]
+
+    if kind == "Feature":
+        properties = object.get("properties") or {}
+        geometry = object.get("geometry")
+
+        if geometry is None:
+            return []
+
+        return _geojson_shapes(geometry, properties.get("name"))
+
+    if kind == "GeometryCollection":
+        return [
+            shape
+            for geometry in object["geometries"]
+            for shape in _geojson_shapes(geometry, name)
+        ]
+
+    coordinates = object["coordinates"]
+
+    if kind == "Point":
+        parts, closed = [[coordinates]], False
+    elif kind in ("LineString", "MultiPoint"):
+        parts, closed = [coordinates], False
+    elif kind == "MultiLineString":
+        parts, closed = coordinates, False
+    elif kind == "Polygon":
+        parts, closed = coordinates[:1], True
+    elif kind == "MultiPolygon":
+        parts, closed = [polygon[0] for polygon in coordinates if polygon], True
+    else:
+        raise ValueError(f"unsupported geometry {kind}")
+
+    if kind == "MultiPoint":
+        parts = [[point] for point in coordinates]
+
+    shapes = []
+
+    for part in parts:
+        if not part:
+            continue
+
+        coords = numpy.array([vertex[:2] for vertex in part], dtype=numpy.float64)
+        shape = shape_from_coordinates(coords)
+
+        if closed:
+            shape = _closed(shape)
+        if name is not None:
+            shape.set_name(str(name))
+
+        shapes.append(shape)
+
+    return shapes
+
+
+_PARSERS = {"csv": parse_csv, "wkt": parse_wkt, "geojson": parse_geojson}
+
+
+def read_chunks(file, format, chunk_size=10000):
+    """
+    Read shapes from a file, one or more per line, in chunks.
+
+    Empty lines, lines starting with "#", and, in CSV files, a header line
+    are skipped.
+
+    Parameters
+    ----------
+    file : binary file
+        The file, opened for reading in binary mode.
+    format : str
+        One of the supported formats.
+    chunk_size : int, optional
+        The number of lines read per chunk, by default 10000.
+
+    Yields
+    ------
+    tuple
+        The shapes of a chunk, as a list, and the number of bytes read so
+        far.
+
+    Raises
+    ------
+    ValueError
+        If a line can't be parsed, with the line number in the message.
+    """
+    parse = _PARSERS[format]
+    shapes = []
+    read = reported = 0
+
+    for number, line in enumerate(file, 1):
+        read += len(line)
+        text = line.decode().strip()
+
+        if text and not text.startswith("#"):
+            try:
+                shapes.extend(shape for shape in parse(text) if shape is not None)
+            except (ValueError, KeyError, TypeError, IndexError) as error:
+                if not (format == "csv" and number == 1):
+                    raise ValueError(f"line {number}: {error}") from error
+
+        if number % chunk_size == 0:
+            yield shapes, read
+            shapes = []
+            reported = read
+
+    if read != reported:
+        yield shapes, read
+
+
+def read_shapes(path, format=None):
+    """
+    Read all shapes of a file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    format : str, optional
+        One of the supported formats, by default guessed from the file.
+
+    Returns
+    -------
+    list of Shape
+        The shapes.
+    """
+    with open(path, "rb") as file:
+        if format is None:
+            format = guess_format(path, file.readline().decode())
+            file.seek(0)
+
+        return [shape for shapes, _ in read_chunks(file, format) for shape in shapes]
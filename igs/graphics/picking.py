@@ -0,0 +1,164 @@
+import numpy
+
+from igs.graphics.clipping import clip_segments
+from igs.graphics.shape import Primitive
+
+# Primitives whose vertices aren't connected to each other.
+_UNCONNECTED = [Primitive.Point.value, Primitive.Mark.value]
+
+
+def point_segment_distances(point, segments):
+    """
+    Return the distances from a point to many line segments at once.
+
+    Parameters
+    ----------
+    point : tuple
+        The point as (x, y).
+    segments : numpy.ndarray
+        An (M, 4) array of segments as (x0, y0, x1, y1) rows, which may have
+        no length.
+
+    Returns
+    -------
+    numpy.ndarray
+        The distance to every segment.
+    """
+    point = numpy.asarray(point, dtype=numpy.float64)
+    start = segments[:, :2]
+    delta = segments[:, 2:] - start
+
+    squared_lengths = (delta * delta).sum(axis=1)
+    projections = ((point - start) * delta).sum(axis=1)
+
+    # The nearest point of a segment is where the point projects onto it,
+    # clamped to its ends, or its start if it has no length.
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = numpy.where(squared_lengths > 0, projections / squared_lengths, 0)
+
+    nearest = start + numpy.clip(t, 0, 1)[:, None] * delta
+
+    return numpy.hypot(*(point - nearest).T)
+
+
+def shape_segments(display_file, slots):
+    """
+    Return the segments shapes are drawn with.
+
+    Polygons include the segment closing them, and every vertex of points
+    and marks is a segment with no length.
+
+    Parameters
+    ----------
+    display_file : DisplayFile
+        The display file the shapes are in.
+    slots : numpy.ndarray
+        The arena slots of the shapes.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        The (M, 4) array of segments as (x0, y0, x1, y1) rows and, for every
+        segment, the index in slots of the shape it belongs to.
+    """
+    arena = display_file.arena()
+    lengths = arena.lengths(slots)
+    kinds = arena.kinds(slots)
+    starts = numpy.cumsum(lengths) - lengths
+
+    vertices = arena.gather(slots)
+
+    # The arena holds shapes with a pending transform as they were before it.
+    for index in numpy.nonzero(display_file.pending(slots))[0]:
+        shape = display_file.shape_at(slots[index])
+        vertices[starts[index] : starts[index] + lengths[index]] = shape.simplified(0)
+
+    owners = numpy.repeat(numpy.arange(len(slots)), lengths)
+    connected = ~numpy.isin(kinds, _UNCONNECTED)
+
+    joined = (owners[:-1] == owners[1:]) & connected[owners[:-1]]
+    joined_segments = numpy.hstack([vertices[:-1][joined], vertices[1:][joined]])
+
+    loose = ~connected[owners] | (lengths[owners] == 1)
+    loose_segments = numpy.hstack([vertices[loose], vertices[loose]])
+
+    (closed,) = numpy.nonzero((kinds == Primitive.Polygon.value) & (lengths > 2))
+    closing_segments = numpy.hstack(
+        [vertices[starts[closed] + lengths[closed] - 1], vertices[starts[closed]]]
+    )
+
+    segments = numpy.concatenate([joined_segments, loose_segments, closing_segments])
+    segment_owners = numpy.concatenate([owners[:-1][joined], owners[loose], closed])
+
+    return segments.reshape(-1, 4), segment_owners
+
+
+def pick(display_file, point, tolerance):
+    """
+    Find the shape nearest to a point.
+
+    Only shapes the spatial index finds near the point are measured, all at
+    once.
+
+    Parameters
+    ----------
+    display_file : DisplayFile
+        The display file to pick from.
+    point : tuple
+        The point as (x, y), in world coordinates.
+    tolerance : float
+        How far from the point a shape can be, in world units.
+
+    Returns
+    -------
+    int or None
+        The arena slot of the nearest shape, or None if no shape is close
+        enough.
+    """
+    x, y = point
+    slots = display_file.query_slots(
+        x - tolerance, y - tolerance, x + tolerance, y + tolerance
+    )
+
+    if not len(slots):
+        return None
+
+    segments, owners = shape_segments(display_file, slots)
+
+    distances = numpy.full(len(slots), numpy.inf)
+    numpy.minimum.at(distances, owners, point_segment_distances(point, segments))
+
+    nearest = numpy.argmin(distances)
+
+    return int(slots[nearest]) if distances[nearest] <= tolerance else None
+
+
+def pick_box(display_file, rect):
+    """
+    Find the shapes drawn across a rectangle.
+
+    Parameters
+    ----------
+    display_file : DisplayFile
+        The display file to pick from.
+    rect : tuple
+        The rectangle as (xmin, ymin, xmax, ymax), in world coordinates.
+
+    Returns
+    -------
+    numpy.ndarray
+        The arena slots of the shapes with a segment or a vertex inside the
+        rectangle.
+    """
+    slots = display_file.query_slots(*rect)
+
+    if not len(slots):
+        return slots
+
+    segments, owners = shape_segments(display_file, slots)
+    _, visible = clip_segments(segments, rect)
+
+    picked = numpy.zeros(len(slots), dtype=bool)
+    picked[owners[visible]] = True
+
+    return slots[picked]
@@ -0,0 +1,199 @@
+import numpy
+
+from igs.graphics.arena import gather_ranges
+from igs.graphics.transform import Transform
+
+
+class _Projected:
+    def __init__(self, coords, pending, view, projected):
+        self.coords = coords
+        self.pending = pending
+        self.view = view
+        self.projected = projected
+
+
+class ProjectionCache:
+    """
+    Projected coordinates of shapes, kept between frames.
+
+    Every projection a cache is asked for gets a view number, and projected
+    coordinates remember the view they were computed for. When the view
+    changes, coordinates are carried over from the old view with the
+    transform between both views, which is a plain offset for a pan and a
+    scale about a point for a zoom, instead of being projected again from
+    world coordinates. Only shapes whose vertices changed in the meantime
+    are projected from scratch.
+    """
+
+    # Views older than this are forgotten, and so is everything computed for
+    # them, which also bounds the rounding error carried from view to view.
+    _MAX_VIEWS = 64
+
+    def __init__(self, arena):
+        self._arena = arena
+        self._views = {}
+        self._view = -1
+        self._key = None
+        self._deltas = {}
+        self._reset()
+
+    def _reset(self):
+        arena = self._arena
+
+        self._generation = arena.generation()
+        self._projected = numpy.empty((arena.capacity(), 2))
+        self._slot_views = numpy.full(arena.num_slots(), -1, dtype=numpy.intp)
+        self._slot_versions = numpy.zeros(arena.num_slots(), dtype=numpy.int64)
+        self._shapes = {}
+
+    def set_projection(self, key, projection):
+        """
+        Set the projection of the following frames.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the projection, like the window version and the
+            viewport size it is made of.
+        projection : Transform
+            The projection itself.
+        """
+        if key == self._key:
+            return
+
+        self._key = key
+        self._view += 1
+        self._views[self._view] = projection
+        self._views.pop(self._view - self._MAX_VIEWS, None)
+        self._deltas = {}
+
+        if self._view % self._MAX_VIEWS == 0:
+            self._reset()
+
+    def _delta(self, view):
+        # The transform taking coordinates projected for an older view to the
+        # current one, or None when the older view was forgotten.
+        if view not in self._views:
+            return None
+
+        delta = self._deltas.get(view)
+
+        if delta is None:
+            matrix = numpy.linalg.inv(self._views[view].matrix())
+            matrix = matrix @ self._views[self._view].matrix()
+            delta = self._deltas[view] = Transform(matrix)
+
+        return delta
+
+    def project(self, slots):
+        """
+        Return the projected vertices of arena slots.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray
+            The slots to project.
+
+        Returns
+        -------
+        numpy.ndarray
+            The projected vertices of all slots, one after the other.
+        """
+        arena = self._arena
+
+        if arena.generation() != self._generation or arena.capacity() != len(
+            self._projected
+        ):
+            self._reset()
+
+        if len(self._slot_views) < arena.num_slots():
+            missing = arena.num_slots() - len(self._slot_views)
+            self._slot_views = numpy.append(self._slot_views, numpy.full(missing, -1))
+            self._slot_versions = numpy.append(
+                self._slot_versions, numpy.zeros(missing, dtype=numpy.int64)
+            )
+
+        versions = arena.versions(slots)
+        views = self._slot_views[slots]
+
+        edited = versions != self._slot_versions[slots]
+        stale = edited | (views != self._view)
+
+        for view in numpy.unique(views[stale & ~edited]):
+            delta = self._delta(view)
+            update = stale & ~edited & (views == view)
+
+            if delta is None:
+                edited |= update
+            else:
+                self._carry(slots[update], delta)
+
+        updated = slots[edited]
+        indices = gather_ranges(arena.offsets(updated), arena.lengths(updated))
+        self._projected[indices] = self._views[self._view].map(
+            arena.vertices()[indices]
+        )
+
+        self._slot_views[slots[stale]] = self._view
+        self._slot_versions[slots[stale]] = versions[stale]
+
+        indices = gather_ranges(arena.offsets(slots), arena.lengths(slots))
+
+        return self._projected[indices]
+
+    def _carry(self, slots, delta):
+        indices = gather_ranges(self._arena.offsets(slots), self._arena.lengths(slots))
+        matrix = delta.matrix()
+
+        if numpy.allclose(matrix[:2, :2], numpy.identity(2), rtol=0, atol=1e-12):
+            self._projected[indices] += matrix[2, :2]
+
+        elif matrix[0, 1] == 0 and matrix[1, 0] == 0:
+            scale = matrix.diagonal()[:2]
+            self._projected[indices] = self._projected[indices] * scale + matrix[2, :2]
+
+        else:
+            self._projected[indices] = delta.map(self._projected[indices])
+
+    def project_shape(self, slot, coords, pending):
+        """
+        Return the projected coordinates of a shape drawn on its own.
+
+        Parameters
+        ----------
+        slot : int
+            The slot of the shape.
+        coords : numpy.ndarray
+            The coordinates to project, before the pending transform. They
+            are compared by identity to tell whether they changed.
+        pending : Transform or None
+            The pending transform of the shape.
+
+        Returns
+        -------
+        numpy.ndarray
+            The projected coordinates.
+        """
+        entry = self._shapes.get(slot)
+        projection = self._views[self._view]
+
+        if entry is not None and entry.coords is coords and entry.pending is pending:
+            if entry.view == self._view:
+                return entry.projected
+
+            delta = self._delta(entry.view)
+
+            if delta is not None:
+                entry.projected = delta.map(entry.projected)
+                entry.view = self._view
+
+                return entry.projected
+
+        if pending is not None:
+            projection = pending.clone()
+            projection.combine(self._views[self._view])
+
+        projected = projection.map(coords)
+        self._shapes[slot] = _Projected(coords, pending, self._view, projected)
+
+        return projected
@@ -0,0 +1,1188 @@
+import time
+from collections import OrderedDict
+
+import numpy
+from PyQt5 import QtCore, QtGui
+
+from igs.graphics.arena import extents, gather_ranges
+from igs.graphics.clipping import clip_points, clip_polygon, clip_segments
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.projection import ProjectionCache
+from igs.graphics.shape import MIN_SIMPLIFIED_POINTS, Primitive, as_polygon, map_bounds
+from igs.graphics.stats import Stats
+from igs.graphics.tiles import TileCache, new_tile_image
+from igs.graphics.transform import Scaling, Translation, combine
+
+
+def projection(window, width, height):
+    """
+    Return the transform from world coordinates to the pixels of an image.
+
+    Parameters
+    ----------
+    window : Window
+        The region of the world shown in the image.
+    width, height : int
+        The size of the image in pixels.
+
+    Returns
+    -------
+    Transform
+        The transform, which maps the top left corner of the window to the
+        origin of the image.
+    """
+    return combine(window.normalization(), Scaling(width, height))
+
+
+class Renderer(QtCore.QObject):
+    """
+    Draws the shapes of a display file as seen through a window.
+
+    A renderer only needs a QPainter to draw on, so it works the same for a
+    widget on screen and for an image, including under the offscreen Qt
+    platform, with no display at all.
+
+    Given a thread pool, `draw` doesn't render missing tiles itself. Each is
+    rendered on the pool instead, from a snapshot of its shapes, and drawn
+    once `tilesRendered` says it is ready.
+
+    Given a slice budget, `draw` only draws tiles already rendered, and
+    stands in for missing ones with tiles of another zoom level, stretched,
+    or with sketches of their shapes' bounding boxes. Missing tiles are
+    sketched, then rendered, or queued on the pool, in slices of the event
+    loop, each stopping after the first tile past the budget, so input is
+    handled in between. Any change to the window drawn or to the display file
+    cancels what is left of that.
+    """
+
+    # The most zoom levels missing tiles are stood in for from.
+    _COARSE_LEVELS = 3
+
+    # How many times coarser than tiles sketches are, and how opaque every
+    # box sketched is.
+    _SKETCH_SCALE = 4
+    _SKETCH_OPACITY = 0.25
+
+    # Emitted with the world regions of tiles rendered outside of `draw`,
+    # once they can be drawn.
+    tilesRendered = QtCore.pyqtSignal(list)
+
+    # Emitted from the thread pool with the level, tile, epoch and image of a
+    # tile rendered and how long it took, queued to the renderer's thread.
+    _tileRendered = QtCore.pyqtSignal(object, object, int, object, float)
+
+    def __init__(
+        self,
+        shapes,
+        tile_budget=64 * 2**20,
+        stats=None,
+        thread_pool=None,
+        slice_budget=None,
+    ):
+        """
+        Create a new renderer.
+
+        Parameters
+        ----------
+        shapes : DisplayFile or iterable of Shape
+            The shapes to draw. A display file is followed as it changes,
+            while other shapes are copied into a display file of their own.
+        tile_budget : int, optional
+            The most memory the tiles kept by `draw` can take, in bytes, by
+            default 64 MiB.
+        stats : Stats, optional
+            Where to record how long frames take and what they draw, by
+            default disabled stats of its own.
+        thread_pool : QThreadPool, optional
+            The pool to render the tiles of `draw` on, by default None, which
+            renders them while drawing.
+        slice_budget : float, optional
+            How long a slice of rendering missing tiles goes on for, in
+            seconds, by default None, which renders them all while drawing.
+        """
+        super().__init__()
+
+        if not isinstance(shapes, DisplayFile):
+            display_file = DisplayFile()
+
+            for shape in shapes:
+                display_file.add(shape.clone())
+
+            shapes = display_file
+
+        self._display_file = shapes
+        self._projections = ProjectionCache(shapes.arena())
+        self._tiles = TileCache(budget=tile_budget)
+        self._stats = stats or Stats()
+
+        # Tiles being rendered on the pool, the jobs rendering them by their
+        # epoch, and how many times tiles were invalidated, which tells tiles
+        # rendered since apart from stale ones.
+        self._thread_pool = thread_pool
+        self._rendering = set()
+        self._jobs = {}
+        self._epoch = 0
+        self._block = None
+
+        # Tiles missing from the view last drawn, rendered slice by slice.
+        self._slice_budget = slice_budget
+        self._wanted = OrderedDict()
+        self._view = None
+
+        # Tiles sketched but not rendered yet, with the snapshots they were
+        # sketched from, which rendering them takes on.
+        self._ready = OrderedDict()
+        self._sketches = {}
+
+        self._refiner = QtCore.QTimer(self)
+        self._refiner.setSingleShot(True)
+        self._refiner.timeout.connect(self._refine)
+
+        shapes.regionsChanged.connect(self.invalidate)
+        self._tileRendered.connect(self._put_tile)
+
+    def display_file(self):
+        """
+        Return the display file drawn.
+
+        Returns
+        -------
+        DisplayFile
+            The display file.
+        """
+        return self._display_file
+
+    def stats(self):
+        """
+        Return the stats frames are recorded in.
+
+        Returns
+        -------
+        Stats
+            The stats.
+        """
+        return self._stats
+
+    def tiles(self):
+        """
+        Return the tiles kept by `draw`.
+
+        Returns
+        -------
+        TileCache
+            The tiles.
+        """
+        return self._tiles
+
+    def padding(self):
+        """
+        Return how far beyond their vertices drawn shapes can reach.
+
+        Returns
+        -------
+        int
+            A distance in pixels, which accounts for pen widths and marks.
+        """
+        widths = [style.width for style in self._display_file.styles()]
+
+        return max(widths, default=1) + 2
+
+    def invalidate(self, regions):
+        """
+        Forget what was drawn of some world regions.
+
+        Parameters
+        ----------
+        regions : list of tuple
+            Regions as (xmin, ymin, xmax, ymax) tuples in world coordinates.
+        """
+        self._tiles.invalidate(regions, self.padding())
+
+        self.cancel()
+        self._rendering.clear()
+        self._sketches.clear()
+        self._epoch += 1
+
+    def refining(self):
+        """
+        Return whether tiles drawn by `draw` are still to be rendered.
+
+        Returns
+        -------
+        bool
+            True if tiles are waiting for a slice or for the thread pool.
+        """
+        return bool(self._wanted or self._ready or self._rendering)
+
+    def cancel(self):
+        """
+        Stop rendering the tiles missing from what was drawn, including those
+        queued on the thread pool that haven't started.
+        """
+        self._wanted.clear()
+        self._ready.clear()
+        self._refiner.stop()
+
+        for key, job in list(self._jobs.items()):
+            if self._thread_pool.tryTake(job):
+                del self._jobs[key]
+                self._rendering.discard(key[:2])
+
+        # Sketches are only kept for tiles that will still be rendered.
+        self._sketches = {
+            key: image
+            for key, image in self._sketches.items()
+            if key in self._rendering
+        }
+
+    def render(self, window, width, height, background="white"):
+        """
+        Draw the shapes on a new image.
+
+        Parameters
+        ----------
+        window : Window
+            The region of the world to draw.
+        width, height : int
+            The size of the image in pixels.
+        background : str or None, optional
+            The color of the background, or None for a transparent one, by
+            default white.
+
+        Returns
+        -------
+        QImage
+            The image, in RGBA8888 format.
+        """
+        with self._stats.frame():
+            image = QtGui.QImage(width, height, QtGui.QImage.Format_RGBA8888)
+            image.fill(QtGui.QColor(background or QtCore.Qt.transparent))
+
+            transform = projection(window, width, height)
+            self._projections.set_projection(transform.matrix().tobytes(), transform)
+
+            painter = QtGui.QPainter(image)
+            self._draw_shapes(
+                painter,
+                transform,
+                (0, 0, width, height),
+                _pixel_size(window, width, height),
+            )
+            painter.end()
+
+        return image
+
+    def render_array(self, window, width, height, background="white"):
+        """
+        Draw the shapes on a new raster.
+
+        Parameters
+        ----------
+        window : Window
+            The region of the world to draw.
+        width, height : int
+            The size of the raster in pixels.
+        background : str or None, optional
+            The color of the background, or None for a transparent one, by
+            default white.
+
+        Returns
+        -------
+        numpy.ndarray
+            The raster, as an array of RGBA bytes of shape (height, width,
+            4).
+        """
+        image = self.render(window, width, height, background)
+
+        pixels = image.constBits()
+        pixels.setsize(image.sizeInBytes())
+
+        raster = numpy.frombuffer(pixels, dtype=numpy.uint8)
+        raster = raster.reshape(height, image.bytesPerLine())[:, : 4 * width]
+
+        return raster.reshape(height, width, 4).copy()
+
+    def draw(self, painter, window, width, height, rect=None):
+        """
+        Draw the shapes with a painter, from tiles kept between calls.
+
+        Panning the window only draws the tiles that come into view, so this
+        is meant for views drawn over and over.
+
+        Parameters
+        ----------
+        painter : QPainter
+            The painter to draw with.
+        window : Window
+            The region of the world to draw.
+        width, height : int
+            The size of the region drawn in pixels.
+        rect : tuple, optional
+            The part of that region to draw, as (xmin, ymin, xmax, ymax) in
+            pixels, by default all of it.
+        """
+        with self._stats.frame():
+            xmin, ymin, xmax, ymax = rect or (0, 0, width, height)
+
+            # Tiles are laid out in the pixels of the zoom level, which only
+            # differ from the ones drawn by a whole number of pixels.
+            level = self._tiles.level(
+                window.width() / width,
+                window.height() / height,
+            )
+            xoffset = round(window.xmin() / level[0])
+            yoffset = round(-window.ymax() / level[1])
+
+            tiles = self._tiles.covering(
+                (xmin + xoffset, ymin + yoffset, xmax + xoffset, ymax + yoffset)
+            )
+
+            images = {tile: self._tiles.get(level, tile) for tile in tiles}
+            missing = [tile for tile, image in images.items() if image is None]
+
+            # Looking at anything else cancels the slices left for the last
+            # view, before the ones for this view are added.
+            view = (level, xoffset, yoffset, width, height)
+
+            if self._slice_budget is not None and view != self._view:
+                self.cancel()
+                self._view = view
+
+            # Tiles rendered later are left out until they are ready.
+            if self._slice_budget is not None:
+                self._want(level, missing)
+
+            elif self._thread_pool is not None:
+                self._queue_tiles(level, missing)
+                self._stats.count("tiles_queued", len(missing))
+
+            elif missing:
+                images.update(self._render_tiles(level, missing))
+                self._stats.count("tiles_rendered", len(missing))
+                missing = []
+
+            size = self._tiles.tile_size()
+
+            with self._stats.stage("blit"):
+                painter.save()
+                painter.setClipRect(QtCore.QRect(xmin, ymin, xmax - xmin, ymax - ymin))
+
+                for (column, row), image in images.items():
+                    if image is not None:
+                        painter.drawImage(
+                            column * size - xoffset, row * size - yoffset, image
+                        )
+
+                if missing and self._slice_budget is not None:
+                    coarse = self._draw_coarse(
+                        painter, level, missing, xoffset, yoffset
+                    )
+                    self._stats.count("tiles_coarse", coarse)
+
+                painter.restore()
+
+            self._stats.count("tiles_drawn", len(images) - len(missing))
+
+    def _render_tiles(self, level, tiles, snapshot=None):
+        # Missing tiles are rendered together, in one image covering all of
+        # them, which is then cut into tiles.
+        size = self._tiles.tile_size()
+        columns = [column for column, _ in tiles]
+        rows = [row for _, row in tiles]
+
+        left = min(columns) * size
+        top = min(rows) * size
+        width = (max(columns) + 1) * size - left
+        height = (max(rows) + 1) * size - top
+
+        image = new_tile_image(width, height)
+
+        painter = QtGui.QPainter(image)
+        painter.translate(-left, -top)
+
+        transform = self._tiles.projection(level)
+        self._projections.set_projection(level, transform)
+
+        self._draw_shapes(
+            painter,
+            transform,
+            (left, top, left + width, top + height),
+            max(level),
+            snapshot,
+        )
+
+        painter.end()
+
+        rendered = {}
+
+        for column, row in tiles:
+            tile = image.copy(column * size - left, row * size - top, size, size)
+
+            self._tiles.put(level, (column, row), tile)
+            self._sketches.pop((level, (column, row)), None)
+            rendered[column, row] = tile
+
+        return rendered
+
+    def _draw_coarse(self, painter, level, tiles, xoffset, yoffset):
+        # Stands in for missing tiles with the tiles of the few levels closest
+        # in scale, stretched to this one, which is cheap enough to draw right
+        # away. Farther levels only fill what closer ones left uncovered, like
+        # the levels passed while zooming, which are only partly rendered.
+        # Levels too far away would take too many tiles. What no level covers
+        # is left to the sketches of the tiles, once a slice drew them.
+        def distance(other):
+            return abs(numpy.log2(other[0] / level[0]))
+
+        others = [
+            other
+            for other in self._tiles.levels()
+            if other != level and distance(other) <= 3
+        ]
+        others = sorted(others, key=distance)[: self._COARSE_LEVELS]
+
+        size = self._tiles.tile_size()
+        region = QtGui.QRegion()
+
+        for column, row in tiles:
+            region += QtCore.QRect(
+                column * size - xoffset, row * size - yoffset, size, size
+            )
+
+        columns = [column for column, _ in tiles]
+        rows = [row for _, row in tiles]
+        drawn = 0
+
+        for other in others:
+            if region.isEmpty():
+                break
+
+            xscale = other[0] / level[0]
+            yscale = other[1] / level[1]
+
+            covered = self._tiles.covering(
+                (
+                    min(columns) * size / xscale,
+                    min(rows) * size / yscale,
+                    (max(columns) + 1) * size / xscale,
+                    (max(rows) + 1) * size / yscale,
+                )
+            )
+
+            painter.save()
+            painter.setClipRegion(region, QtCore.Qt.IntersectClip)
+
+            for column, row in covered:
+                image = self._tiles.get(other, (column, row))
+
+                if image is not None:
+                    target = QtCore.QRectF(
+                        column * size * xscale - xoffset,
+                        row * size * yscale - yoffset,
+                        size * xscale,
+                        size * yscale,
+                    )
+                    painter.drawImage(target, image)
+                    region -= QtGui.QRegion(target.toAlignedRect())
+                    drawn += 1
+
+            painter.restore()
+
+        painter.save()
+        painter.setClipRegion(region, QtCore.Qt.IntersectClip)
+
+        for column, row in tiles:
+            image = self._sketches.get((level, (column, row)))
+
+            if image is not None:
+                target = QtCore.QRect(
+                    column * size - xoffset, row * size - yoffset, size, size
+                )
+                painter.drawImage(target, image)
+                drawn += 1
+
+        painter.restore()
+
+        return drawn
+
+    def _want(self, level, tiles):
+        for tile in tiles:
+            key = (level, tile)
+
+            if key not in self._rendering and key not in self._ready:
+                self._wanted[key] = None
+
+        wanted = [tile for other, tile in self._wanted if other == level]
+
+        if self._thread_pool is not None and wanted:
+            self._block_for(level, wanted)
+
+        if self._wanted and not self._refiner.isActive():
+            self._refiner.start(0)
+
+    def _refine(self):
+        # Sketches the tiles wanted by the last draws until the budget of a
+        # slice is spent, leaving the rest to the next slice, after the
+        # events waiting in between. Tiles sketched are queued on the pool
+        # right away, or else rendered in the slices after all are sketched.
+        deadline = time.perf_counter() + self._slice_budget
+        regions = []
+
+        with self._stats.frame("refine"):
+            if self._wanted:
+                while self._wanted and time.perf_counter() < deadline:
+                    (level, tile), _ = self._wanted.popitem(last=False)
+
+                    snapshot = self._tile_snapshot(level, tile)
+                    self._sketch(level, tile, snapshot)
+                    self._stats.count("tiles_sketched")
+
+                    if self._thread_pool is not None:
+                        self._queue_tiles(level, [tile], [snapshot])
+                        self._stats.count("tiles_queued")
+                    else:
+                        self._ready[level, tile] = snapshot
+
+                    regions.append(self._tile_region(level, tile))
+            else:
+                while self._ready and time.perf_counter() < deadline:
+                    (level, tile), snapshot = self._ready.popitem(last=False)
+
+                    self._render_tiles(level, [tile], snapshot)
+                    self._stats.count("tiles_rendered")
+                    regions.append(self._tile_region(level, tile))
+
+        if regions:
+            self.tilesRendered.emit(regions)
+
+        if self._wanted or self._ready:
+            self._refiner.start(0)
+
+    def _sketch(self, level, tile, snapshot):
+        # Shades the bounding boxes of the shapes of a tile, darker where
+        # more of them overlap, at a fraction of its resolution. Boxes are
+        # added up on a grid from their corners rather than drawn, since a
+        # painter call per box would cost about as much as drawing the shapes.
+        scale = self._SKETCH_SCALE
+        size = self._tiles.tile_size() // scale
+        column, row = tile
+
+        transform = combine(
+            self._tiles.projection(level),
+            Translation(-column * size * scale, -row * size * scale),
+            Scaling(1 / scale, 1 / scale),
+        )
+
+        color = numpy.zeros((size, size, 3))
+        alpha = numpy.zeros((size, size))
+
+        for style, bounds in snapshot.bounds().items():
+            corners = transform.map(bounds.reshape(-1, 2)).reshape(-1, 4)
+
+            xmin = numpy.minimum(corners[:, 0], corners[:, 2])
+            xmax = numpy.maximum(corners[:, 0], corners[:, 2])
+            ymin = numpy.minimum(corners[:, 1], corners[:, 3])
+            ymax = numpy.maximum(corners[:, 1], corners[:, 3])
+
+            # Every box covers at least the pixel it starts in.
+            left = numpy.clip(numpy.floor(xmin), 0, size).astype(numpy.intp)
+            top = numpy.clip(numpy.floor(ymin), 0, size).astype(numpy.intp)
+            right = numpy.clip(numpy.maximum(numpy.ceil(xmax), left + 1), 0, size)
+            bottom = numpy.clip(numpy.maximum(numpy.ceil(ymax), top + 1), 0, size)
+            right = right.astype(numpy.intp)
+            bottom = bottom.astype(numpy.intp)
+
+            width = size + 1
+            corners = numpy.concatenate(
+                [top * width + left, bottom * width + right],
+            )
+            opposite = numpy.concatenate(
+                [top * width + right, bottom * width + left],
+            )
+            counts = numpy.bincount(corners, minlength=width * width)
+            counts -= numpy.bincount(opposite, minlength=width * width)
+
+            coverage = counts.reshape(width, width).cumsum(0).cumsum(1)
+            coverage = coverage[:size, :size]
+
+            opacity = 1 - (1 - self._SKETCH_OPACITY) ** coverage
+            rgb = QtGui.QColor(style.color).getRgbF()[:3]
+
+            color = color * (1 - opacity[..., None]) + opacity[..., None] * rgb
+            alpha = alpha * (1 - opacity) + opacity
+
+        # Pixels are packed as premultiplied 0xAARRGGBB.
+        channels = numpy.round(numpy.dstack([color, alpha]) * 255).astype(numpy.uint32)
+        pixels = (
+            channels[..., 3] << 24
+            | channels[..., 0] << 16
+            | channels[..., 1] << 8
+            | channels[..., 2]
+        )
+
+        self._sketches[level, tile] = QtGui.QImage(
+            pixels.tobytes(),
+            size,
+            size,
+            4 * size,
+            QtGui.QImage.Format_ARGB32_Premultiplied,
+        ).copy()
+
+    def _tile_region(self, level, tile):
+        size = self._tiles.tile_size()
+        column, row = tile
+        rect = (column * size, row * size, (column + 1) * size, (row + 1) * size)
+
+        return map_bounds(self._tiles.projection(level).inverse(), rect)
+
+    def _block_for(self, level, tiles):
+        # Tiles are rendered on the last block if it covers them, so tiles
+        # queued slice by slice are still painted on one image.
+        block = self._block
+
+        if block is None or not block.covers(level, self._epoch, tiles):
+            block = self._block = _TileBlock(
+                level, self._epoch, tiles, self._tiles.tile_size()
+            )
+
+        return block
+
+    def _tile_snapshot(self, level, tile):
+        size = self._tiles.tile_size()
+        column, row = tile
+        rect = (column * size, row * size, (column + 1) * size, (row + 1) * size)
+
+        with self._stats.stage("query"):
+            return self._snapshot(self._tiles.projection(level), rect, max(level))
+
+    def _queue_tiles(self, level, tiles, snapshots=None):
+        transform = self._tiles.projection(level)
+        snapshots = snapshots or [None] * len(tiles)
+
+        queued = [
+            (tile, snapshot)
+            for tile, snapshot in zip(tiles, snapshots)
+            if (level, tile) not in self._rendering
+        ]
+
+        if not queued:
+            return
+
+        block = self._block_for(level, [tile for tile, _ in queued])
+
+        for tile, snapshot in queued:
+            if snapshot is None:
+                snapshot = self._tile_snapshot(level, tile)
+
+            # Jobs are kept until they are done, so they can be taken back
+            # from the pool before they start.
+            job = _TileJob(
+                self._tileRendered, level, tile, self._epoch, block, snapshot, transform
+            )
+            job.setAutoDelete(False)
+
+            self._rendering.add((level, tile))
+            self._jobs[level, tile, self._epoch] = job
+            self._thread_pool.start(job)
+
+    def _put_tile(self, level, tile, epoch, image, seconds):
+        if self._stats.enabled():
+            self._stats.record("raster", seconds)
+
+        self._jobs.pop((level, tile, epoch), None)
+
+        # Tiles may have been invalidated while this one was being rendered,
+        # in which case it is dropped, but still announced so it is drawn
+        # and queued again.
+        if epoch == self._epoch:
+            self._rendering.discard((level, tile))
+            self._sketches.pop((level, tile), None)
+            self._tiles.put(level, tile, image)
+
+        self.tilesRendered.emit([self._tile_region(level, tile)])
+
+    def _draw_shapes(self, painter, transform, rect, tolerance, snapshot=None):
+        if snapshot is None:
+            with self._stats.stage("query"):
+                snapshot = self._snapshot(transform, rect, tolerance)
+
+        snapshot.draw(painter, transform, rect, self._projections, self._stats)
+
+    def _snapshot(self, transform, rect, tolerance):
+        # Takes a snapshot of the shapes in a region, in the coordinates of a
+        # projection. The padding keeps wide pens of shapes just outside the
+        # region from being left out.
+        padding = self.padding()
+        xmin, ymin, xmax, ymax = rect
+        region = (xmin - padding, ymin - padding, xmax + padding, ymax + padding)
+
+        return Snapshot(
+            self._display_file, map_bounds(transform.inverse(), region), tolerance
+        )
+
+
+class Snapshot:
+    """
+    The shapes of a region of a display file, as they were when taken.
+
+    Drawing a snapshot doesn't read the display file, so it can be drawn on
+    any thread while the display file keeps changing. Vertices aren't copied:
+    ranges of the arena are never overwritten, so holding on to its array
+    keeps them as they were.
+    """
+
+    def __init__(self, display_file, region, tolerance):
+        """
+        Take a snapshot.
+
+        Parameters
+        ----------
+        display_file : DisplayFile
+            The display file.
+        region : tuple
+            The region as (xmin, ymin, xmax, ymax) in world coordinates.
+        tolerance : float
+            How far shapes with enough vertices can be simplified, in world
+            units.
+        """
+        arena = display_file.arena()
+        slots = display_file.query_slots(*region)
+
+        self._num_shapes = len(slots)
+        self._num_vertices = int(arena.lengths(slots).sum())
+
+        # Shapes with a pending transform or enough vertices to be simplified
+        # are drawn one by one, from coordinates resolved now, since shapes
+        # build their simplified levels on demand.
+        individual = display_file.pending(slots)
+        individual |= arena.lengths(slots) >= MIN_SIMPLIFIED_POINTS
+
+        self._shapes = []
+
+        for slot in slots[individual]:
+            shape = display_file.shape_at(slot)
+            coords, pending = shape.deferred(tolerance)
+
+            self._shapes.append(
+                (
+                    slot,
+                    shape.style(),
+                    shape.primitive(),
+                    coords,
+                    pending,
+                    shape.loose_bounds(),
+                )
+            )
+
+        # Everything else is sorted into runs of shapes sharing a style and a
+        # primitive.
+        slots = slots[~individual]
+        styles = arena.styles(slots)
+        kinds = arena.kinds(slots)
+
+        order = numpy.lexsort((kinds, styles))
+
+        self._slots = slots[order]
+        self._codes = styles[order]
+        self._kinds = kinds[order]
+        self._offsets = arena.offsets(self._slots)
+        self._lengths = arena.lengths(self._slots)
+        self._vertices = arena.vertices()
+        self._styles = display_file.styles()
+
+    def num_shapes(self):
+        return self._num_shapes
+
+    def num_vertices(self):
+        return self._num_vertices
+
+    def draw(self, painter, transform, rect, projections=None, stats=None):
+        """
+        Draw the shapes with a painter.
+
+        Parameters
+        ----------
+        painter : QPainter
+            The painter to draw with.
+        transform : Transform
+            The projection to draw in.
+        rect : tuple
+            The region drawn as (xmin, ymin, xmax, ymax), in the coordinates
+            of the projection.
+        projections : ProjectionCache, optional
+            A cache set to the projection to take projected vertices from,
+            which is only right as long as the display file hasn't changed
+            since the snapshot was taken, by default None, which projects
+            them all.
+        stats : Stats, optional
+            Where to record what is drawn, by default nowhere.
+        """
+        stats = stats or Stats()
+
+        if stats.enabled():
+            stats.count("shapes", self._num_shapes)
+            stats.count("vertices", self._num_vertices)
+
+        batches = {}
+
+        def batch(style):
+            if style not in batches:
+                batches[style] = _Batch()
+
+            return batches[style]
+
+        # Pending transforms are folded into the projection, so the vertices
+        # of shapes drawn one by one are only rewritten once.
+        with stats.stage("shapes"):
+            for slot, style, primitive, coords, pending, bounds in self._shapes:
+                if projections is not None:
+                    coords = projections.project_shape(slot, coords, pending)
+                elif pending is not None:
+                    coords = combine(pending, transform).map(coords)
+                else:
+                    coords = transform.map(coords)
+
+                corners = transform.map(numpy.reshape(bounds, (2, 2)))
+                inside = clip_points(corners, rect).all()
+
+                batch(style).add(primitive, coords, inside, rect)
+
+        # Everything else is projected at once, or carried over from the last
+        # frame, then added run by run.
+        lengths = self._lengths
+        starts = numpy.cumsum(lengths) - lengths
+
+        with stats.stage("project"):
+            if projections is not None:
+                coords = projections.project(self._slots)
+            else:
+                indices = gather_ranges(self._offsets, lengths)
+                coords = transform.map(self._vertices[indices])
+
+        styles, kinds = self._codes, self._kinds
+        (changes,) = numpy.nonzero((numpy.diff(styles) != 0) | (numpy.diff(kinds) != 0))
+        groups = numpy.concatenate([[0], changes + 1, [len(styles)]])
+
+        with stats.stage("batch"):
+            for first, last in zip(groups[:-1], groups[1:]):
+                if first == last:
+                    continue
+
+                begin = starts[first]
+                end = starts[last - 1] + lengths[last - 1]
+
+                batch(self._styles[styles[first]]).add_many(
+                    Primitive(kinds[first]),
+                    coords[begin:end],
+                    lengths[first:last],
+                    rect,
+                )
+
+        # Shapes are grouped by style so the pen changes once per style
+        # rather than once per shape.
+        with stats.stage("paint"):
+            calls = 0
+
+            for style, style_batch in batches.items():
+                painter.setPen(QtGui.QPen(QtGui.QColor(style.color), style.width))
+                calls += style_batch.draw(painter, rect)
+
+        stats.count("draw_calls", calls)
+
+    def bounds(self):
+        """
+        Return the bounding boxes of the shapes.
+
+        Returns
+        -------
+        dict
+            The (xmin, ymin, xmax, ymax) rows of the bounds of the shapes of
+            every style, by style, in world coordinates.
+        """
+        runs = {}
+
+        for _, style, _, _, _, bounds in self._shapes:
+            runs.setdefault(style, []).append([bounds])
+
+        # Shapes are sorted by style already, so their bounds are split into
+        # runs of a style.
+        if len(self._slots):
+            indices = gather_ranges(self._offsets, self._lengths)
+            bounds = extents(self._vertices[indices], self._lengths)
+            codes, firsts = numpy.unique(self._codes, return_index=True)
+
+            for code, run in zip(codes, numpy.split(bounds, firsts[1:])):
+                runs.setdefault(self._styles[code], []).append(run)
+
+        return {style: numpy.concatenate(run) for style, run in runs.items()}
+
+
+class _TileBlock:
+    """
+    An image covering a block of tiles of a zoom level, which the jobs
+    rendering them paint on together, each only within its own tile.
+
+    QPainter clips lines to the bounds of the image it paints on, and draws
+    them from where they were clipped, so lines crossing tiles painted on
+    images of their own would be drawn a pixel off here and there, leaving
+    seams. Painting tiles on one image draws them as if they were rendered
+    at once.
+    """
+
+    def __init__(self, level, epoch, tiles, size):
+        columns = [column for column, _ in tiles]
+        rows = [row for _, row in tiles]
+
+        self._level = level
+        self._epoch = epoch
+        self._columns = (min(columns), max(columns))
+        self._rows = (min(rows), max(rows))
+        self._size = size
+
+        left, top, right, bottom = self.rect()
+        self._image = new_tile_image(right - left, bottom - top)
+        self._bits = self._image.bits()
+
+    def covers(self, level, epoch, tiles):
+        return (
+            level == self._level
+            and epoch == self._epoch
+            and all(
+                self._columns[0] <= column <= self._columns[1]
+                and self._rows[0] <= row <= self._rows[1]
+                for column, row in tiles
+            )
+        )
+
+    def tile_size(self):
+        return self._size
+
+    def rect(self):
+        # The pixels of the zoom level covered, as (xmin, ymin, xmax, ymax).
+        size = self._size
+
+        return (
+            self._columns[0] * size,
+            self._rows[0] * size,
+            (self._columns[1] + 1) * size,
+            (self._rows[1] + 1) * size,
+        )
+
+    def image(self):
+        # Another image on the same pixels, since each QImage can only be
+        # painted on by one painter at a time.
+        image = self._image
+
+        return QtGui.QImage(
+            self._bits,
+            image.width(),
+            image.height(),
+            image.bytesPerLine(),
+            image.format(),
+        )
+
+
+class _TileJob(QtCore.QRunnable):
+    """
+    Renders a tile on a thread pool, on its part of a block of tiles.
+    """
+
+    def __init__(self, rendered, level, tile, epoch, block, snapshot, transform):
+        super().__init__()
+
+        self._rendered = rendered
+        self._level = level
+        self._tile = tile
+        self._epoch = epoch
+        self._block = block
+        self._snapshot = snapshot
+        self._transform = transform
+
+    def run(self):
+        start = time.perf_counter()
+
+        rect = self._block.rect()
+        size = self._block.tile_size()
+        column, row = self._tile
+        tile = QtCore.QRect(column * size - rect[0], row * size - rect[1], size, size)
+
+        image = self._block.image()
+
+        # The tile may have been rendered on the block before, when it was
+        # dropped from the cache and wanted again.
+        painter = QtGui.QPainter(image)
+        painter.setClipRect(tile)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        painter.fillRect(tile, QtCore.Qt.transparent)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
+        painter.translate(-rect[0], -rect[1])
+        self._snapshot.draw(painter, self._transform, rect)
+        painter.end()
+
+        self._rendered.emit(
+            self._level,
+            self._tile,
+            self._epoch,
+            image.copy(tile),
+            time.perf_counter() - start,
+        )
+
+
+def _pixel_size(window, width, height):
+    return max(window.width() / width, window.height() / height)
+
+
+# Shorter runs of connected segments are cheaper to add to a drawLines call
+# than to submit as polylines of their own.
+_MIN_POLYLINE_POINTS = 8
+
+
+class _Batch:
+    """
+    The primitives of a frame sharing a style, buffered for submission with
+    as few painter calls as possible.
+
+    QPainter rasterizes a polyline much faster than the same segments passed
+    to drawLines, so long runs of connected segments are drawn as polylines,
+    while everything else is drawn with a single drawLines or drawPoints call.
+    """
+
+    def __init__(self):
+        self._polylines = []
+        self._segments = []
+        self._joined = []
+        self._points = []
+
+    def add(self, primitive, coords, inside, rect):
+        if primitive is Primitive.Polygon:
+            if not inside:
+                coords = clip_polygon(coords, rect)
+
+            if len(coords):
+                self._polylines.append(numpy.vstack([coords, coords[:1]]))
+
+        elif primitive is Primitive.Polyline and inside:
+            self._polylines.append(coords)
+
+        else:
+            self.add_many(primitive, coords, numpy.array([len(coords)]), rect)
+
+    def add_many(self, primitive, coords, lengths, rect):
+        """
+        Add several shapes of the same primitive at once.
+
+        Parameters
+        ----------
+        primitive : Primitive
+            The primitive of every shape.
+        coords : numpy.ndarray
+            The vertices of all shapes, one after the other.
+        lengths : numpy.ndarray
+            The number of vertices of each shape.
+        rect : tuple
+            The clipping rectangle as (xmin, ymin, xmax, ymax).
+        """
+        starts = numpy.cumsum(lengths) - lengths
+
+        first = numpy.zeros(len(coords), dtype=bool)
+        first[starts] = True
+
+        if primitive is Primitive.Point:
+            self._points.append(coords)
+
+        elif primitive is Primitive.Mark:
+            x = coords[:, :1]
+            y = coords[:, 1:]
+            crosses = numpy.hstack([x - 1, y, x + 1, y, x, y - 1, x, y + 1])
+
+            self._segments.append(crosses.reshape(-1, 4))
+            self._joined.append(numpy.zeros(2 * len(coords), dtype=bool))
+
+        elif primitive is Primitive.Polyline:
+            # Every vertex starts a segment, except the last one of a shape.
+            (segment,) = numpy.nonzero(~first[1:])
+
+            self._segments.append(numpy.hstack([coords[segment], coords[segment + 1]]))
+            self._joined.append(~first[segment])
+
+        elif primitive is Primitive.Polygon:
+            inside = numpy.logical_and.reduceat(clip_points(coords, rect), starts)
+
+            for start, length in zip(starts[~inside], lengths[~inside]):
+                self.add(primitive, coords[start : start + length], False, rect)
+
+            # Every vertex of a polygon inside starts a segment to the next
+            # one, with the last one wrapping around to close the polygon.
+            following = numpy.arange(1, len(coords) + 1)
+            following[starts + lengths - 1] = starts
+            segment = gather_ranges(starts[inside], lengths[inside])
+
+            self._segments.append(
+                numpy.hstack([coords[segment], coords[following[segment]]])
+            )
+            self._joined.append(~first[segment])
+
+    def draw(self, painter, rect):
+        """
+        Draw the primitives with a painter.
+
+        Returns
+        -------
+        int
+            The number of painter calls made.
+        """
+        lines = []
+        calls = 0
+
+        for polyline in self._polylines:
+            if len(polyline) < _MIN_POLYLINE_POINTS:
+                lines.append(numpy.hstack([polyline[:-1], polyline[1:]]))
+            else:
+                painter.drawPolyline(as_polygon(polyline))
+                calls += 1
+
+        if self._segments:
+            segments = numpy.concatenate(self._segments)
+            joined = numpy.concatenate(self._joined)
+
+            clipped, visible = clip_segments(segments, rect)
+            joined = _still_joined(clipped, joined, visible)
+
+            (starts,) = numpy.nonzero(~joined)
+            ends = numpy.append(starts[1:], len(clipped))
+            long = ends - starts >= _MIN_POLYLINE_POINTS - 1
+
+            for start, end in zip(starts[long], ends[long]):
+                polyline = numpy.vstack([clipped[start:end, :2], clipped[end - 1, 2:]])
+                painter.drawPolyline(as_polygon(polyline))
+                calls += 1
+
+            lines.append(clipped[~numpy.repeat(long, ends - starts)])
+
+        if lines:
+            lines = numpy.concatenate(lines)
+            painter.drawLines(as_polygon(lines.reshape(-1, 2)))
+            calls += 1
+
+        if self._points:
+            points = numpy.concatenate(self._points)
+            painter.drawPoints(as_polygon(points[clip_points(points, rect)]))
+            calls += 1
+
+        return calls
+
+
+def _still_joined(clipped, joined, visible):
+    # A clipped segment still continues the one before it if both survived
+    # clipping and they still share the vertex between them.
+    (kept,) = numpy.nonzero(visible)
+
+    result = numpy.zeros(len(kept), dtype=bool)
+    result[1:] = (
+        joined[kept[1:]]
+        & (kept[1:] == kept[:-1] + 1)
+        & (clipped[1:, 0] == clipped[:-1, 2])
+        & (clipped[1:, 1] == clipped[:-1, 3])
+    )
+
+    return result
@@ -0,0 +1,330 @@
+import json
+import os
+
+import numpy
+
+from igs.graphics.shape import (
+    ClosedPolyline,
+    Line,
+    Mark,
+    Point,
+    Polyline,
+    Rectangle,
+    Square,
+    Style,
+    restore_shape,
+)
+
+MAGIC = b"IGSSCENE"
+VERSION = 1
+
+SHAPE_TYPES = {
+    cls.__name__: cls
+    for cls in [ClosedPolyline, Line, Mark, Point, Polyline, Rectangle, Square]
+}
+
+# A scene file is laid out as follows, in little-endian byte order:
+#
+#   header        one HEADER record
+#   vertices      float64 (x, y) pairs of all shapes, one after the other,
+#                 starting on a page boundary
+#   table         one TABLE record per shape
+#   names         the UTF-8 names of all shapes, one after the other
+#   metadata      JSON with the shape types and styles the table refers to
+#
+# The header comes first but is written last, once the sizes of the other
+# sections are known, so that shapes can be streamed out one chunk at a time.
+HEADER = numpy.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("reserved", "<u4"),
+        ("shapes", "<u8"),
+        ("vertices", "<u8"),
+        ("vertex_offset", "<u8"),
+        ("table_offset", "<u8"),
+        ("names_offset", "<u8"),
+        ("names_size", "<u8"),
+        ("metadata_offset", "<u8"),
+        ("metadata_size", "<u8"),
+    ]
+)
+
+TABLE = numpy.dtype(
+    [
+        ("offset", "<i8"),
+        ("length", "<i8"),
+        ("type", "<u2"),
+        ("kind", "<u1"),
+        ("style", "<u4"),
+        ("name_offset", "<i8"),
+        ("name_size", "<u4"),
+        ("bounds", "<f8", (4,)),
+    ]
+)
+
+_PAGE_SIZE = 4096
+
+# Shapes are written this many at a time.
+_CHUNK_SIZE = 4096
+
+
+class SceneFile:
+    """
+    A scene file opened for reading.
+
+    Its table and vertices are memory-mapped rather than read, so opening a
+    file takes the same time whatever its size, and the pages holding the
+    vertices of a shape are only read once they are accessed.
+    """
+
+    def __init__(self, path):
+        """
+        Open a scene file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Raises
+        ------
+        ValueError
+            If the file isn't a scene file, or one of an unsupported version.
+        """
+        with open(path, "rb") as file:
+            data = file.read(HEADER.itemsize)
+
+        if len(data) < HEADER.itemsize or not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a scene file")
+
+        header = numpy.frombuffer(data, dtype=HEADER)[0]
+
+        if header["version"] != VERSION:
+            raise ValueError(f"unsupported scene file version {header['version']}")
+
+        self._path = path
+        self._table = _map(path, TABLE, header["table_offset"], header["shapes"])
+        self._vertices = _map(
+            path, "<f8", header["vertex_offset"], (header["vertices"], 2)
+        )
+        self._names = _map(path, "u1", header["names_offset"], header["names_size"])
+
+        with open(path, "rb") as file:
+            file.seek(int(header["metadata_offset"]))
+            metadata = json.loads(file.read(int(header["metadata_size"])))
+
+        try:
+            self._types = [SHAPE_TYPES[name] for name in metadata["types"]]
+        except KeyError as error:
+            raise ValueError(f"unknown shape type {error}") from error
+
+        self._styles = [Style(*style) for style in metadata["styles"]]
+
+    def __len__(self):
+        return len(self._table)
+
+    def path(self):
+        return self._path
+
+    def table(self):
+        return self._table
+
+    def vertices(self):
+        return self._vertices
+
+    def styles(self):
+        return list(self._styles)
+
+    def type(self, record):
+        return self._types[self._table["type"][record]]
+
+    def types(self, records):
+        return [self._types[code] for code in self._table["type"][records].tolist()]
+
+    def name(self, record):
+        offset = self._table["name_offset"][record]
+        size = self._table["name_size"][record]
+
+        return bytes(self._names[offset : offset + size]).decode()
+
+    def names(self, records):
+        offsets = self._table["name_offset"][records]
+        ends = offsets + self._table["name_size"][records]
+
+        if not len(offsets):
+            return []
+
+        # The names are read in one go, rather than one page access each.
+        start = offsets.min()
+        names = bytes(self._names[start : ends.max()])
+
+        return [
+            names[offset:end].decode()
+            for offset, end in zip((offsets - start).tolist(), (ends - start).tolist())
+        ]
+
+    def shape(self, record, coords=None):
+        """
+        Build the shape of a record.
+
+        Parameters
+        ----------
+        record : int
+            The record.
+        coords : numpy.ndarray, optional
+            The vertices of the shape, by default read from the file.
+
+        Returns
+        -------
+        Shape
+            The shape, with its name and style.
+        """
+        if coords is None:
+            offset = self._table["offset"][record]
+            length = self._table["length"][record]
+            coords = self._vertices[offset : offset + length]
+
+        shape = restore_shape(self.type(record), coords)
+        shape.set_name(self.name(record))
+
+        style = self._styles[self._table["style"][record]]
+        shape.set_style(style.color, style.width)
+
+        return shape
+
+
+def _map(path, dtype, offset, shape):
+    # numpy can't map an empty range of a file.
+    if not numpy.prod(shape):
+        return numpy.zeros(shape, dtype=dtype)
+
+    return numpy.memmap(path, dtype=dtype, mode="r", offset=int(offset), shape=shape)
+
+
+def write_scene(path, records, styles):
+    """
+    Write a scene file, streaming the shapes out a chunk at a time.
+
+    Only the table and the names of the shapes are kept in memory until the
+    end, never their vertices. The file is written next to its destination
+    and then moved over it, so a file being read, even through a memory map,
+    can be overwritten safely.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    records : iterable of tuple
+        The type name, name, primitive value, style code and vertices of every
+        shape.
+    styles : list of Style
+        The styles the style codes refer to.
+    """
+    partial = f"{path}.partial"
+
+    try:
+        with open(partial, "wb") as file:
+            _write(file, records, styles)
+
+        os.replace(partial, path)
+
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        raise
+
+
+def _write(file, records, styles):
+    types = {}
+    tables = []
+    names = []
+    names_size = 0
+    vertices = 0
+
+    vertex_offset = _aligned(HEADER.itemsize, _PAGE_SIZE)
+    file.write(bytes(vertex_offset))
+
+    chunk = []
+
+    def flush():
+        nonlocal names_size, vertices
+
+        table = numpy.zeros(len(chunk), dtype=TABLE)
+        coords = [numpy.asarray(record[4], dtype="<f8") for record in chunk]
+        lengths = numpy.array([len(c) for c in coords], dtype=numpy.int64)
+
+        table["length"] = lengths
+        table["offset"] = vertices + numpy.cumsum(lengths) - lengths
+        table["bounds"] = numpy.nan
+
+        encoded = [record[1].encode() for record in chunk]
+        sizes = numpy.array([len(name) for name in encoded], dtype=numpy.int64)
+
+        table["type"] = [types.setdefault(record[0], len(types)) for record in chunk]
+        table["kind"] = [record[2] for record in chunk]
+        table["style"] = [record[3] for record in chunk]
+        table["name_offset"] = names_size + numpy.cumsum(sizes) - sizes
+        table["name_size"] = sizes
+
+        names.extend(encoded)
+        names_size += int(sizes.sum())
+
+        filled = lengths > 0
+
+        if filled.any():
+            block = numpy.concatenate(coords)
+            starts = (numpy.cumsum(lengths) - lengths)[filled]
+
+            table["bounds"][filled, :2] = numpy.minimum.reduceat(block, starts)
+            table["bounds"][filled, 2:] = numpy.maximum.reduceat(block, starts)
+
+            file.write(block.tobytes())
+
+        vertices += int(lengths.sum())
+        tables.append(table)
+        chunk.clear()
+
+    for record in records:
+        chunk.append(record)
+
+        if len(chunk) == _CHUNK_SIZE:
+            flush()
+
+    if chunk:
+        flush()
+
+    header = numpy.zeros(1, dtype=HEADER)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["vertices"] = vertices
+    header["vertex_offset"] = vertex_offset
+
+    header["table_offset"] = file.tell()
+    for table in tables:
+        file.write(table.tobytes())
+    header["shapes"] = sum(len(table) for table in tables)
+
+    header["names_offset"] = file.tell()
+    header["names_size"] = names_size
+    for name in names:
+        file.write(name)
+
+    metadata = json.dumps(
+        {
+            "types": sorted(types, key=types.get),
+            "styles": [list(style) for style in styles],
+        }
+    ).encode()
+
+    header["metadata_offset"] = file.tell()
+    header["metadata_size"] = len(metadata)
+    file.write(metadata)
+
+    file.seek(0)
+    file.write(header.tobytes())
+
+
+def _aligned(offset, alignment):
+    return -(-offset // alignment) * alignment
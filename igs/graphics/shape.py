@@ -1,5 +1,12 @@
+import math
 from abc import ABC
+from collections import namedtuple
+from enum import Enum, auto
 
+import numpy
+from PyQt5 import QtCore, QtGui
+
+from igs.graphics.simplify import Pyramid
 from igs.graphics.traits import Clonable, Drawable
 
 
@@ -15,63 +22,320 @@ class Position(Clonable):
         return self._y
 
 
+class Primitive(Enum):
+    Point = auto()
+    Polyline = auto()
+    Polygon = auto()
+    Mark = auto()
+
+
+# The pen a shape is drawn with. Styles are compared and hashed by value, so
+# the viewport can group shapes sharing one and set up the painter once.
+Style = namedtuple("Style", ["color", "width"])
+
+DEFAULT_STYLE = Style("black", 1)
+
+# Below this many vertices simplifying a polyline costs more than drawing it.
+MIN_SIMPLIFIED_POINTS = 256
+
+
+def as_coordinates(points):
+    if not isinstance(points, numpy.ndarray):
+        points = list(points)
+
+        if points and isinstance(points[0], Position):
+            points = [(p.x(), p.y()) for p in points]
+
+    coords = numpy.array(points, dtype=numpy.float64).reshape(-1, 2)
+
+    return numpy.ascontiguousarray(coords)
+
+
+def as_polygon(coords):
+    # Write straight into the polygon buffer instead of creating a QPointF per
+    # vertex, which is what makes drawing large shapes slow.
+    size = len(coords)
+    polygon = QtGui.QPolygonF(size)
+
+    if size:
+        buffer = polygon.data()
+        buffer.setsize(size * 2 * numpy.dtype(numpy.float64).itemsize)
+        numpy.frombuffer(buffer, dtype=numpy.float64).reshape(size, 2)[:] = coords
+
+    return polygon
+
+
+def _is_axis_aligned(matrix):
+    return matrix[0, 1] == 0 and matrix[1, 0] == 0
+
+
+def map_bounds(transform, bounds):
+    xmin, ymin, xmax, ymax = bounds
+    corners = transform.map(
+        numpy.array([[xmin, ymin], [xmin, ymax], [xmax, ymin], [xmax, ymax]])
+    )
+
+    xmin, ymin = corners.min(axis=0)
+    xmax, ymax = corners.max(axis=0)
+
+    return (xmin, ymin, xmax, ymax)
+
+
+def similarity_scale(matrix):
+    # The factor a transform scales every distance by, or None when it
+    # distorts shapes.
+    (a, b), (c, d) = matrix[:2, :2]
+
+    if numpy.isclose(a * a + b * b, c * c + d * d) and numpy.isclose(a * c + b * d, 0):
+        return math.sqrt(a * a + b * b)
+
+    return None
+
+
+def restore_shape(cls, coords):
+    # A shape of some class with the given vertices, built without the class
+    # constructor, which might not be able to describe them, as for a
+    # rectangle after a rotation.
+    shape = cls.__new__(cls)
+    Shape.__init__(shape)
+    shape._set_coords(coords)
+
+    return shape
+
+
 class Shape(ABC, Clonable, Drawable):
     def __init__(self):
-        self._points = []
+        self._set_coords(numpy.empty((0, 2), dtype=numpy.float64))
         self._name = self.__class__.__name__
+        self._style = DEFAULT_STYLE
 
     def __str__(self):
         return self._name
 
+    def _set_coords(self, coords):
+        # Clones share the coordinate buffer, so it is frozen and every
+        # mutation installs a new one instead of writing in place.
+        coords.flags.writeable = False
+        self._coords = coords
+        self._pending = None
+        self._bounds = None
+        self._centroid = None
+        self._pyramid = None
+
     def apply(self, transform):
-        self._points = [transform(p) for p in self._points]
+        if not hasattr(transform, "map"):
+            self.flush()
+            self._set_coords(
+                as_coordinates(
+                    transform(self.point_at(i)) for i in range(self.num_of_points())
+                )
+            )
+            return self
+
+        # Affine transforms are only composed here and the coordinates are
+        # rewritten once, when they are actually needed. The pending transform
+        # is copied so that neither the caller nor clones can change it.
+        if self._pending is None:
+            self._pending = transform.clone()
+        else:
+            self._pending = self._pending.clone()
+            self._pending.combine(transform)
+
         return self
 
+    def flush(self):
+        transform = self._pending
+
+        if transform is None:
+            return self
+
+        bounds = self._bounds
+        centroid = self._centroid
+        pyramid = self._pyramid
+
+        self._set_coords(transform.map(self._coords))
+
+        # Affine transforms map the centroid to the centroid, and those
+        # without shear or rotation map the bounding box to the bounding box,
+        # so the caches can follow the geometry instead of being rebuilt.
+        if centroid is not None:
+            self._centroid = transform(centroid)
+
+        if bounds is not None and _is_axis_aligned(transform.matrix()):
+            self._bounds = map_bounds(transform, bounds)
+
+        scale = similarity_scale(transform.matrix())
+
+        if pyramid is not None and scale is not None:
+            self._pyramid = pyramid.transformed(self._coords, scale)
+
+        return self
+
+    def pending(self):
+        return self._pending
+
+    def rebind(self, coords):
+        # Swap the coordinate buffer, before any pending transform, for
+        # another one holding the same values, such as a view of shared
+        # storage. Unlike other mutations this keeps every cache.
+        coords.flags.writeable = False
+        self._coords = coords
+
+        if self._pyramid is not None:
+            self._pyramid = self._pyramid.rebound(coords)
+
+    def reset(self, coords, bounds=None, centroid=None, scale=None):
+        # Take coordinates transformed elsewhere, such as along with those of
+        # many other shapes. Their bounds and centroid can be given when they
+        # are known already, and the scale factor when the transform was a
+        # similarity, which lets the pyramid follow like it does in flush().
+        pyramid = self._pyramid
+
+        self._set_coords(coords)
+        self._bounds = bounds
+        self._centroid = centroid
+
+        if pyramid is not None and scale is not None:
+            self._pyramid = pyramid.transformed(coords, scale)
+
     def add(self, point):
-        self._points.append(point)
+        self.flush()
+
+        bounds = self._bounds
+        centroid = self._centroid
+        size = self.num_of_points()
+
+        self._set_coords(numpy.append(self._coords, [[point.x(), point.y()]], axis=0))
+
+        if bounds is not None:
+            xmin, ymin, xmax, ymax = bounds
+            self._bounds = (
+                min(xmin, point.x()),
+                min(ymin, point.y()),
+                max(xmax, point.x()),
+                max(ymax, point.y()),
+            )
+
+        if centroid is not None:
+            self._centroid = Position(
+                (centroid.x() * size + point.x()) / (size + 1),
+                (centroid.y() * size + point.y()) / (size + 1),
+            )
 
     def set_name(self, name):
         self._name = name
 
+    def set_style(self, color=None, width=None):
+        self._style = Style(
+            self._style.color if color is None else color,
+            self._style.width if width is None else width,
+        )
+
+    def style(self):
+        return self._style
+
+    def _untransformed_bounds(self):
+        # Shapes without vertices have no extent, which nan bounds overlap
+        # with nothing.
+        if self._bounds is None and not len(self._coords):
+            self._bounds = (numpy.nan,) * 4
+
+        if self._bounds is None:
+            xmin, ymin = self._coords.min(axis=0)
+            xmax, ymax = self._coords.max(axis=0)
+            self._bounds = (xmin, ymin, xmax, ymax)
+
+        return self._bounds
+
+    def bounds(self):
+        if self._pending is None:
+            return self._untransformed_bounds()
+
+        if not _is_axis_aligned(self._pending.matrix()):
+            return self.flush()._untransformed_bounds()
+
+        return map_bounds(self._pending, self._untransformed_bounds())
+
+    def loose_bounds(self):
+        # A box containing the shape, found without applying a pending
+        # rotation or shear to the coordinates.
+        if self._pending is None:
+            return self._untransformed_bounds()
+
+        return map_bounds(self._pending, self._untransformed_bounds())
+
     def center(self):
-        center_x = sum(p.x() for p in self._points) / self.num_of_points()
-        center_y = sum(p.y() for p in self._points) / self.num_of_points()
+        if self._centroid is None:
+            center_x, center_y = self._coords.mean(axis=0)
+            self._centroid = Position(center_x, center_y)
+
+        if self._pending is None:
+            return self._centroid
+
+        return self._pending(self._centroid)
+
+    def coordinates(self):
+        return self.flush()._coords
+
+    def primitive(self):
+        return Primitive.Polyline
+
+    def _level(self, tolerance):
+        return self._coords
+
+    def deferred(self, tolerance=0):
+        # The coordinates before the pending transform, simplified up to a
+        # tolerance given after it, and the pending transform itself, so that
+        # callers can fold it into their own transform.
+        pending = self._pending
+
+        if pending is not None and tolerance > 0:
+            scale = numpy.linalg.norm(pending.matrix()[:2, :2], 2)
+            tolerance = tolerance / scale if scale > 0 else 0
 
-        return Position(center_x, center_y)
+        return self._level(tolerance), pending
+
+    def simplified(self, tolerance):
+        coords, pending = self.deferred(tolerance)
+
+        return coords if pending is None else pending.map(coords)
 
     def point_at(self, index):
-        return self._points[index]
+        x, y = self.coordinates()[index]
+
+        return Position(x, y)
 
     def num_of_points(self):
-        return len(self._points)
+        return len(self._coords)
 
 
 class Line(Shape):
     def __init__(self, p0, p1):
         super().__init__()
-        self.add(p0)
-        self.add(p1)
+        self._set_coords(as_coordinates([p0, p1]))
 
     def draw(self, painter):
-        p0 = self.point_at(0)
-        p1 = self.point_at(1)
+        (x0, y0), (x1, y1) = self.coordinates()
 
-        painter.drawLine(p0.x(), p0.y(), p1.x(), p1.y())
+        painter.drawLine(QtCore.QLineF(x0, y0, x1, y1))
 
 
 class Polyline(Shape):
     def __init__(self, points):
         super().__init__()
-
-        for p in points:
-            self.add(p)
+        self._set_coords(as_coordinates(points))
 
     def draw(self, painter):
-        for i in range(1, self.num_of_points()):
-            p0 = self.point_at(i - 1)
-            p1 = self.point_at(i)
+        painter.drawPolyline(as_polygon(self.coordinates()))
+
+    def _level(self, tolerance):
+        if tolerance <= 0 or self.num_of_points() < MIN_SIMPLIFIED_POINTS:
+            return self._coords
 
-            painter.drawLine(p0.x(), p0.y(), p1.x(), p1.y())
+        if self._pyramid is None:
+            self._pyramid = Pyramid(self._coords)
+
+        return self._pyramid.level(tolerance)
 
 
 class ClosedPolyline(Polyline):
@@ -79,12 +343,10 @@ class ClosedPolyline(Polyline):
         super().__init__(points)
 
     def draw(self, painter):
-        super().draw(painter)
-
-        p0 = self.point_at(0)
-        p1 = self.point_at(self.num_of_points() - 1)
+        painter.drawPolygon(as_polygon(self.coordinates()))
 
-        painter.drawLine(p0.x(), p0.y(), p1.x(), p1.y())
+    def primitive(self):
+        return Primitive.Polygon
 
 
 class Point(Shape):
@@ -94,8 +356,11 @@ class Point(Shape):
         self.add(p)
 
     def draw(self, painter):
-        p = self.point_at(0)
-        painter.drawLine(p.x(), p.y(), p.x(), p.y())
+        x, y = self.coordinates()[0]
+        painter.drawPoint(QtCore.QPointF(x, y))
+
+    def primitive(self):
+        return Primitive.Point
 
 
 class Rectangle(ClosedPolyline):
@@ -129,8 +394,11 @@ class Mark(Shape):
         x = self.center().x()
         y = self.center().y()
 
-        painter.drawLine(x - 1, y, x + 1, y)
-        painter.drawLine(x, y - 1, x, y + 1)
+        painter.drawLine(QtCore.QLineF(x - 1, y, x + 1, y))
+        painter.drawLine(QtCore.QLineF(x, y - 1, x, y + 1))
 
     def center(self):
         return self.point_at(0)
+
+    def primitive(self):
+        return Primitive.Mark
@@ -0,0 +1,128 @@
+import math
+
+import numpy
+
+
+def importance(coords):
+    """
+    Rank the vertices of a polyline with Douglas-Peucker.
+
+    Douglas-Peucker with a tolerance keeps exactly the vertices whose rank is
+    greater than the tolerance, so a single pass ranks the polyline for every
+    tolerance at once. All ranges at the same depth of the recursion are
+    split together, so the number of Python iterations is the depth of the
+    recursion rather than the number of vertices.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        An (N, 2) array with the polyline vertices.
+
+    Returns
+    -------
+    numpy.ndarray
+        The rank of each vertex. The endpoints are always kept, so their rank
+        is infinite.
+    """
+    size = len(coords)
+    x = coords[:, 0]
+    y = coords[:, 1]
+    ranks = numpy.zeros(size)
+    ranks[[0, -1]] = numpy.inf
+
+    first = numpy.array([0])
+    last = numpy.array([size - 1])
+    parent = numpy.array([numpy.inf])
+
+    while True:
+        wide = last - first > 1
+        first, last, parent = first[wide], last[wide], parent[wide]
+
+        if not len(first):
+            return ranks
+
+        counts = last - first - 1
+        offsets = numpy.cumsum(counts) - counts
+        group = numpy.repeat(numpy.arange(len(first)), counts)
+        interior = first[group] + 1 + numpy.arange(counts.sum()) - offsets[group]
+
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        length = numpy.sqrt(dx * dx + dy * dy)
+
+        rx = x[interior] - x[first][group]
+        ry = y[interior] - y[first][group]
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            distance = numpy.abs(dx[group] * ry - dy[group] * rx) * (1 / length)[group]
+
+        # When the endpoints of a range coincide, which happens on closed
+        # polylines, the distance to the segment is the distance to the point.
+        (degenerate,) = numpy.nonzero(length[group] == 0)
+        distance[degenerate] = numpy.hypot(rx[degenerate], ry[degenerate])
+
+        farthest = numpy.maximum.reduceat(distance, offsets)
+
+        # Ties go to the first vertex, as in the recursive formulation.
+        (candidates,) = numpy.nonzero(distance == farthest[group])
+        leading = numpy.ones(len(candidates), dtype=bool)
+        leading[1:] = group[candidates[1:]] != group[candidates[:-1]]
+        split = interior[candidates[leading]]
+
+        # A vertex is never ranked above the vertex that split its range,
+        # otherwise it could outlive it at some tolerance.
+        ranks[split] = numpy.minimum(farthest, parent)
+
+        first, last = (
+            numpy.concatenate([first, split]),
+            numpy.concatenate([split, last]),
+        )
+        parent = numpy.tile(ranks[split], 2)
+
+
+class Pyramid:
+    """
+    Levels of detail of a polyline, with one level per power of two of the
+    tolerance, built on demand from the Douglas-Peucker ranks.
+    """
+
+    def __init__(self, coords):
+        self._coords = coords
+        self._ranks = None
+        self._levels = {}
+
+    def transformed(self, coords, scale):
+        # Douglas-Peucker only depends on distances, so under a similarity
+        # transform the ranks just scale with it.
+        pyramid = Pyramid(coords)
+
+        if self._ranks is not None:
+            pyramid._ranks = self._ranks * scale
+
+        return pyramid
+
+    def rebound(self, coords):
+        # The same levels over another buffer holding the same coordinates.
+        # Levels are copies, so they don't keep the old buffer alive.
+        pyramid = Pyramid(coords)
+        pyramid._ranks = self._ranks
+        pyramid._levels = self._levels
+
+        return pyramid
+
+    def level(self, tolerance):
+        if tolerance <= 0:
+            return self._coords
+
+        exponent = math.floor(math.log2(tolerance))
+        level = self._levels.get(exponent)
+
+        if level is None:
+            if self._ranks is None:
+                self._ranks = importance(self._coords)
+
+            level = self._coords[self._ranks > 2.0**exponent]
+            level.flags.writeable = False
+            self._levels[exponent] = level
+
+        return level
@@ -0,0 +1,194 @@
+import math
+
+import numpy
+
+
+def overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class GridIndex:
+    """
+    A hierarchical uniform grid over axis-aligned bounding boxes.
+
+    Every entry lives in the level whose cells are at least as large as its
+    bounding box, so it touches at most four cells regardless of its size,
+    and a query visits only the cells overlapping the queried region.
+    """
+
+    def __init__(self, cell_size=16):
+        assert cell_size > 0
+
+        self._cell_size = cell_size
+        self._levels = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _level_of(self, bounds):
+        extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1])
+
+        if extent <= self._cell_size:
+            return 0
+
+        return math.ceil(math.log2(extent / self._cell_size))
+
+    def _cell_range(self, level, bounds):
+        size = self._cell_size * 2**level
+
+        return (
+            math.floor(bounds[0] / size),
+            math.floor(bounds[1] / size),
+            math.floor(bounds[2] / size),
+            math.floor(bounds[3] / size),
+        )
+
+    def insert(self, key, bounds):
+        level = self._level_of(bounds)
+        self._insert(key, bounds, level, self._cell_range(level, bounds))
+
+    def insert_many(self, keys, bounds):
+        # The levels and cells of all entries are found at once.
+        bounds = numpy.asarray(bounds, dtype=numpy.float64).reshape(-1, 4)
+        extents = numpy.maximum(
+            bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1]
+        )
+
+        levels = numpy.zeros(len(bounds), dtype=numpy.intp)
+        large = extents > self._cell_size
+        levels[large] = numpy.ceil(numpy.log2(extents[large] / self._cell_size))
+
+        sizes = self._cell_size * 2.0**levels
+        ranges = numpy.floor(bounds / sizes[:, None]).astype(numpy.int64)
+
+        keys = list(keys)
+
+        if not keys:
+            return
+
+        if self._entries and any(key in self._entries for key in keys):
+            for key, box, level, cell_range in zip(
+                keys, bounds.tolist(), levels.tolist(), ranges.tolist()
+            ):
+                self._insert(key, box, level, cell_range)
+        else:
+            self._insert_new(keys, bounds, levels, ranges)
+
+    def _insert_new(self, keys, bounds, levels, ranges):
+        # Entries are at most as large as the cells of their level, so each
+        # covers one or two cells along either axis. The cells of all entries
+        # are listed at once, in the order _insert visits them, then grouped
+        # so that every cell is filled once.
+        spans = numpy.minimum(ranges[:, 2:] - ranges[:, :2], 1)
+        parts = []
+
+        for di in (0, 1):
+            for dj in (0, 1):
+                (entries,) = numpy.nonzero((spans[:, 0] >= di) & (spans[:, 1] >= dj))
+                parts.append(
+                    numpy.column_stack(
+                        [entries, ranges[entries, 0] + di, ranges[entries, 1] + dj]
+                    )
+                )
+
+        cells = numpy.concatenate(parts)
+        cells = cells[numpy.argsort(cells[:, 0], kind="stable")]
+
+        pairs = list(zip(cells[:, 1].tolist(), cells[:, 2].tolist()))
+        ends = numpy.cumsum(numpy.bincount(cells[:, 0], minlength=len(keys)))
+        starts = ends - numpy.bincount(cells[:, 0], minlength=len(keys))
+
+        for key, box, level, start, end in zip(
+            keys, bounds.tolist(), levels.tolist(), starts.tolist(), ends.tolist()
+        ):
+            self._entries[key] = (tuple(box), level, pairs[start:end])
+
+        cell_levels = levels[cells[:, 0]]
+        order = numpy.lexsort((cells[:, 2], cells[:, 1], cell_levels))
+        cells, cell_levels = cells[order], cell_levels[order]
+
+        (changes,) = numpy.nonzero(
+            (numpy.diff(cells[:, 1:], axis=0) != 0).any(axis=1)
+            | (numpy.diff(cell_levels) != 0)
+        )
+        firsts = numpy.concatenate([[0], changes + 1]).tolist()
+        lasts = numpy.append(changes + 1, len(cells)).tolist()
+
+        members = [keys[entry] for entry in cells[:, 0].tolist()]
+        groups = zip(
+            cell_levels[firsts].tolist(),
+            cells[firsts, 1].tolist(),
+            cells[firsts, 2].tolist(),
+            firsts,
+            lasts,
+        )
+
+        for level, i, j, first, last in groups:
+            level_cells = self._levels.setdefault(level, {})
+            level_cells.setdefault((i, j), set()).update(members[first:last])
+
+    def _insert(self, key, bounds, level, cell_range):
+        if key in self._entries:
+            self.remove(key)
+
+        i0, j0, i1, j1 = cell_range
+        cells = self._levels.setdefault(level, {})
+
+        keys = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cells.setdefault((i, j), set()).add(key)
+                keys.append((i, j))
+
+        self._entries[key] = (tuple(bounds), level, keys)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        _, level, keys = entry
+        cells = self._levels[level]
+
+        for cell in keys:
+            members = cells[cell]
+            members.discard(key)
+
+            if not members:
+                del cells[cell]
+
+        if not cells:
+            del self._levels[level]
+
+    def bounds(self, key):
+        return self._entries[key][0]
+
+    def query(self, xmin, ymin, xmax, ymax):
+        region = (xmin, ymin, xmax, ymax)
+        candidates = set()
+
+        for level, cells in self._levels.items():
+            i0, j0, i1, j1 = self._cell_range(level, region)
+
+            # Past a certain zoom level the region covers more cells than
+            # there are occupied ones, so walking the occupied cells is cheaper.
+            if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+                for (i, j), members in cells.items():
+                    if i0 <= i <= i1 and j0 <= j <= j1:
+                        candidates.update(members)
+            else:
+                for i in range(i0, i1 + 1):
+                    for j in range(j0, j1 + 1):
+                        members = cells.get((i, j))
+
+                        if members:
+                            candidates.update(members)
+
+        entries = self._entries
+
+        return sorted(key for key in candidates if overlaps(entries[key][0], region))
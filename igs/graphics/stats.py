@@ -0,0 +1,258 @@
+import contextlib
+import json
+import time
+
+import numpy
+
+_DISABLED = contextlib.nullcontext()
+
+
+class Stats:
+    """
+    Rolling measurements of the stages of drawing and editing a scene.
+
+    Every metric keeps its last samples in a ring buffer, from which
+    summaries and histograms are computed on demand. Stages timed within a
+    frame add up to a single sample per frame, together with the frame time
+    and the counters of the frame, while stages timed outside of frames are
+    samples of their own.
+
+    Stats are disabled by default, and then timing a stage costs a method
+    call and nothing is recorded.
+    """
+
+    def __init__(self, capacity=256, enabled=False):
+        """
+        Create new stats.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Number of samples kept per metric, by default 256.
+        enabled : bool, optional
+            Whether to record measurements, by default False.
+        """
+        self._capacity = capacity
+        self._enabled = enabled
+        self._samples = {}
+        self._frame = None
+
+    def enabled(self):
+        return self._enabled
+
+    def set_enabled(self, enabled):
+        self._enabled = enabled
+
+    def record(self, name, value):
+        """
+        Add a sample to a metric.
+
+        Parameters
+        ----------
+        name : str
+            The metric.
+        value : float
+            The sample.
+        """
+        if self._frame is not None:
+            self._frame[name] = self._frame.get(name, 0) + value
+            return
+
+        ring = self._samples.get(name)
+
+        if ring is None:
+            ring = self._samples[name] = _Ring(self._capacity)
+
+        ring.append(value)
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter of the current frame.
+
+        Parameters
+        ----------
+        name : str
+            The counter.
+        amount : int, optional
+            How much to add, by default 1.
+        """
+        if self._enabled:
+            self.record(name, amount)
+
+    def stage(self, name):
+        """
+        Time a stage.
+
+        Parameters
+        ----------
+        name : str
+            The metric the time taken is recorded as, in seconds.
+
+        Returns
+        -------
+        context manager
+            A context timing its body.
+        """
+        if not self._enabled:
+            return _DISABLED
+
+        return self._timed(name)
+
+    def frame(self, name="frame"):
+        """
+        Time a frame, collecting the stages and counters within it.
+
+        Parameters
+        ----------
+        name : str, optional
+            The metric the frame time is recorded as, by default "frame".
+
+        Returns
+        -------
+        context manager
+            A context timing its body.
+        """
+        if not self._enabled or self._frame is not None:
+            return self.stage(name)
+
+        return self._framed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def _framed(self, name):
+        self._frame = {}
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            frame, self._frame = self._frame, None
+            frame[name] = time.perf_counter() - start
+
+            for metric, value in frame.items():
+                self.record(metric, value)
+
+    def samples(self, name):
+        """
+        Return the samples of a metric, oldest first.
+
+        Parameters
+        ----------
+        name : str
+            The metric.
+
+        Returns
+        -------
+        numpy.ndarray
+            The samples kept.
+        """
+        ring = self._samples.get(name)
+
+        return numpy.empty(0) if ring is None else ring.values()
+
+    def names(self):
+        return sorted(self._samples)
+
+    def summary(self, name):
+        """
+        Summarize the samples of a metric.
+
+        Parameters
+        ----------
+        name : str
+            The metric.
+
+        Returns
+        -------
+        dict
+            The number of samples kept, the last one, and their mean,
+            median, 95th percentile and maximum, or None if there are no
+            samples.
+        """
+        samples = self.samples(name)
+
+        if not len(samples):
+            return None
+
+        return {
+            "count": len(samples),
+            "last": float(samples[-1]),
+            "mean": float(samples.mean()),
+            "p50": float(numpy.percentile(samples, 50)),
+            "p95": float(numpy.percentile(samples, 95)),
+            "max": float(samples.max()),
+        }
+
+    def histogram(self, name, bins=16):
+        """
+        Return a histogram of the samples of a metric.
+
+        Parameters
+        ----------
+        name : str
+            The metric.
+        bins : int, optional
+            Number of bins, by default 16.
+
+        Returns
+        -------
+        tuple of numpy.ndarray
+            The count of samples in every bin and the edges of the bins.
+        """
+        return numpy.histogram(self.samples(name), bins=bins)
+
+    def clear(self):
+        self._samples = {}
+
+    def dump(self, path, bins=16):
+        """
+        Write the summary and the histogram of every metric to a file, as
+        JSON.
+
+        Parameters
+        ----------
+        path : str
+            The file to write.
+        bins : int, optional
+            Number of bins of the histograms, by default 16.
+        """
+        report = {}
+
+        for name in self.names():
+            counts, edges = self.histogram(name, bins)
+
+            report[name] = {
+                **self.summary(name),
+                "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+            }
+
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+class _Ring:
+    def __init__(self, capacity):
+        self._values = numpy.empty(capacity)
+        self._size = 0
+
+    def append(self, value):
+        self._values[self._size % len(self._values)] = value
+        self._size += 1
+
+    def values(self):
+        capacity = len(self._values)
+
+        if self._size <= capacity:
+            return self._values[: self._size].copy()
+
+        start = self._size % capacity
+
+        return numpy.concatenate([self._values[start:], self._values[:start]])
@@ -0,0 +1,287 @@
+from collections import OrderedDict
+
+import numpy
+from PyQt5 import QtGui
+
+from igs.graphics.transform import Scaling
+
+
+class TileCache:
+    """
+    Rendered tiles of a scene, kept between frames.
+
+    The scene is drawn on a grid of square images per zoom level, which is
+    anchored to the world origin rather than to the window, so panning only
+    changes where tiles are drawn, and only the tiles that were never seen
+    before have to be rendered. Tiles are evicted least recently used first
+    once they take more memory than a budget.
+    """
+
+    def __init__(self, tile_size=256, budget=64 * 2**20):
+        """
+        Create a new tile cache.
+
+        Parameters
+        ----------
+        tile_size : int, optional
+            The width and height of tiles, in pixels, by default 256.
+        budget : int, optional
+            The most memory tiles can take, in bytes, by default 64 MiB.
+        """
+        self._tile_size = tile_size
+        self._budget = budget
+
+        self._tiles = OrderedDict()
+        self._size = 0
+
+        # Invalidated regions are only checked against tiles when tiles are
+        # needed, so a burst of changes is handled all at once.
+        self._invalid = []
+
+    def tile_size(self):
+        """
+        Return the width and height of tiles.
+
+        Returns
+        -------
+        int
+            The size of tiles in pixels.
+        """
+        return self._tile_size
+
+    def budget(self):
+        """
+        Return the most memory tiles can take.
+
+        Returns
+        -------
+        int
+            A size in bytes.
+        """
+        return self._budget
+
+    def memory(self):
+        """
+        Return the memory taken by tiles.
+
+        Returns
+        -------
+        int
+            A size in bytes.
+        """
+        return self._size
+
+    def __len__(self):
+        return len(self._tiles)
+
+    @staticmethod
+    def level(xscale, yscale):
+        """
+        Return the zoom level for a pixel size.
+
+        Parameters
+        ----------
+        xscale, yscale : float
+            The world width and height of a pixel.
+
+        Returns
+        -------
+        tuple
+            The zoom level, which identifies the tiles drawn at that size.
+            Nearly equal sizes share a level, so rounding errors in the
+            window don't keep tiles from being reused.
+        """
+        return (float(f"{xscale:.12g}"), float(f"{yscale:.12g}"))
+
+    @staticmethod
+    def projection(level):
+        """
+        Return the transform from world coordinates to the pixels of a level.
+
+        Parameters
+        ----------
+        level : tuple
+            A zoom level.
+
+        Returns
+        -------
+        Transform
+            The transform, which maps the world origin to the origin of tile
+            (0, 0) and flips the y axis downwards.
+        """
+        xscale, yscale = level
+
+        return Scaling(1 / xscale, -1 / yscale)
+
+    def levels(self):
+        """
+        Return the zoom levels tiles are kept for.
+
+        Returns
+        -------
+        list of tuple
+            The levels.
+        """
+        self._validate()
+
+        return list(dict.fromkeys(level for level, _ in self._tiles))
+
+    def covering(self, rect):
+        """
+        Return the tiles covering a region of a level.
+
+        Parameters
+        ----------
+        rect : tuple
+            The region as (xmin, ymin, xmax, ymax) in level pixels.
+
+        Returns
+        -------
+        list of tuple
+            The (column, row) of every tile covering the region.
+        """
+        size = self._tile_size
+        xmin, ymin, xmax, ymax = rect
+
+        columns = range(int(xmin // size), int(-(-xmax // size)))
+        rows = range(int(ymin // size), int(-(-ymax // size)))
+
+        return [(column, row) for row in rows for column in columns]
+
+    def get(self, level, tile):
+        """
+        Return a rendered tile.
+
+        Parameters
+        ----------
+        level : tuple
+            The zoom level of the tile.
+        tile : tuple
+            The (column, row) of the tile.
+
+        Returns
+        -------
+        QImage or None
+            The tile, or None if it must be rendered.
+        """
+        self._validate()
+
+        key = (level, tile)
+        image = self._tiles.get(key)
+
+        if image is not None:
+            self._tiles.move_to_end(key)
+
+        return image
+
+    def put(self, level, tile, image):
+        """
+        Keep a rendered tile.
+
+        Parameters
+        ----------
+        level : tuple
+            The zoom level of the tile.
+        tile : tuple
+            The (column, row) of the tile.
+        image : QImage
+            The tile.
+        """
+        key = (level, tile)
+
+        self._drop(key)
+        self._tiles[key] = image
+        self._size += image.sizeInBytes()
+
+        while self._size > self._budget and self._tiles:
+            self._drop(next(iter(self._tiles)))
+
+    def _drop(self, key):
+        image = self._tiles.pop(key, None)
+
+        if image is not None:
+            self._size -= image.sizeInBytes()
+
+    def invalidate(self, regions, padding=0):
+        """
+        Drop the tiles showing some world regions.
+
+        Parameters
+        ----------
+        regions : list of tuple
+            Regions as (xmin, ymin, xmax, ymax) tuples in world coordinates.
+        padding : int, optional
+            How far drawing reaches beyond the regions, in pixels, by default
+            0.
+        """
+        if regions:
+            self._invalid.append((numpy.array(regions, dtype=float), padding))
+
+    def clear(self):
+        """
+        Drop every tile.
+        """
+        self._tiles.clear()
+        self._size = 0
+        self._invalid = []
+
+    def _validate(self):
+        invalid, self._invalid = self._invalid, []
+
+        if not invalid or not self._tiles:
+            return
+
+        keys = list(self._tiles)
+        size = self._tile_size
+
+        scales = numpy.array([level for level, _ in keys])
+        tiles = numpy.array([tile for _, tile in keys], dtype=float)
+
+        # The world bounds of every tile. Rows grow downwards, against the
+        # world y axis.
+        xmin = tiles[:, 0] * size * scales[:, 0]
+        xmax = xmin + size * scales[:, 0]
+        ymax = -tiles[:, 1] * size * scales[:, 1]
+        ymin = ymax - size * scales[:, 1]
+
+        stale = numpy.zeros(len(keys), dtype=bool)
+
+        for regions, padding in invalid:
+            dx = padding * scales[:, 0]
+            dy = padding * scales[:, 1]
+
+            # Regions are checked in chunks to keep the overlap tables small
+            # when a lot of shapes changed at once.
+            for chunk in range(0, len(regions), 4096):
+                region = regions[chunk : chunk + 4096, :, None]
+
+                stale |= numpy.any(
+                    (region[:, 0] <= xmax + dx)
+                    & (region[:, 2] >= xmin - dx)
+                    & (region[:, 1] <= ymax + dy)
+                    & (region[:, 3] >= ymin - dy),
+                    axis=0,
+                )
+
+        for index in numpy.nonzero(stale)[0]:
+            self._drop(keys[index])
+
+
+def new_tile_image(width, height):
+    """
+    Create a transparent image to render tiles on.
+
+    Parameters
+    ----------
+    width, height : int
+        The size of the image in pixels.
+
+    Returns
+    -------
+    QImage
+        The image.
+    """
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(0)
+
+    return image
@@ -2,8 +2,11 @@ import copy
 
 
 class Clonable:
+    # Clones are shallow: they share buffers with the original, which is safe
+    # as long as subclasses replace (rather than modify) shared state when
+    # mutated. Subclasses holding mutable state must copy it in clone().
     def clone(self):
-        return copy.deepcopy(self)
+        return copy.copy(self)
 
 
 class Drawable:
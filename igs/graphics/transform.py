@@ -3,17 +3,21 @@ import math
 import numpy
 
 from igs.graphics.shape import Position
+from igs.graphics.traits import Clonable
 
 
-class Transform:
-    def __init__(self):
-        self._matrix = numpy.array(
-            [
-                [1, 0, 0],
-                [0, 1, 0],
-                [0, 0, 1],
-            ]
-        )
+class Transform(Clonable):
+    def __init__(self, matrix=None):
+        if matrix is None:
+            matrix = numpy.array(
+                [
+                    [1, 0, 0],
+                    [0, 1, 0],
+                    [0, 0, 1],
+                ]
+            )
+
+        self._matrix = matrix
 
     def __call__(self, point):
         vector = numpy.array([[point.x(), point.y(), 1]])
@@ -21,9 +25,18 @@ class Transform:
 
         return Position(result[0, 0], result[0, 1])
 
+    def map(self, coords):
+        return coords @ self._matrix[:2, :2] + self._matrix[2, :2]
+
+    def matrix(self):
+        return self._matrix
+
     def combine(self, transform):
         self._matrix = numpy.matmul(self._matrix, transform._matrix)
 
+    def inverse(self):
+        return Transform(numpy.linalg.inv(self._matrix))
+
 
 class Translation(Transform):
     def __init__(self, dx, dy):
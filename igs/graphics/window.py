@@ -1,10 +1,11 @@
 from enum import Enum, auto
 
 from igs.graphics.shape import Position, Rectangle
-from igs.graphics.transform import Scaling, Translation
+from igs.graphics.traits import Clonable
+from igs.graphics.transform import Scaling, Translation, combine
 
 
-class Movement:
+class Movement(Clonable):
     class Direction(Enum):
         Left = auto()
         Right = auto()
@@ -47,24 +48,58 @@ class Movement:
 
 class Window(Rectangle):
     def __init__(self, top_left, width, height):
+        # Counts changes to the window, so views can tell whether it moved
+        # since they last looked.
+        self._version = 0
+
         super().__init__(top_left, width, height)
 
         self._move = Movement(1, 10)
         self._zoom = Movement(0.01, 0.1)
 
+        # Movement scheduled but not applied yet, as a translation and a zoom
+        # rate about the center.
+        self._pending_pan = (0.0, 0.0)
+        self._pending_zoom = 1.0
+
+    def _set_coords(self, coords):
+        super()._set_coords(coords)
+        self._version += 1
+
+    def version(self):
+        return self._version
+
+    def clone(self):
+        window = super().clone()
+        window._move = self._move.clone()
+        window._zoom = self._zoom.clone()
+
+        return window
+
     def zoom_in(self):
         new_window = self.try_zoom(1 - self._zoom.speed())
 
         if new_window.width() >= 1 or new_window.height() >= 1:
-            self._points = new_window._points
+            self._adopt(new_window)
             self._zoom.move(Movement.Direction.In)
 
     def zoom_out(self):
         new_window = self.try_zoom(1 + self._zoom.speed())
 
-        self._points = new_window._points
+        self._adopt(new_window)
         self._zoom.move(Movement.Direction.Out)
 
+    def _adopt(self, window):
+        window.flush()
+
+        self._set_coords(window._coords)
+        self._bounds = window._bounds
+
+    def apply(self, transform):
+        # A window only has four vertices, so there is nothing to gain from
+        # deferring its transforms.
+        return super().apply(transform).flush()
+
     def move_left(self):
         self.apply(Translation(-self._move.speed(), 0))
         self._move.move(Movement.Direction.Left)
@@ -81,12 +116,111 @@ class Window(Rectangle):
         self.apply(Translation(0, -self._move.speed()))
         self._move.move(Movement.Direction.Down)
 
+    def schedule_move(self, direction):
+        """
+        Schedule a move of the window, at the speed of the moves before it,
+        to be applied by `step`.
+
+        Parameters
+        ----------
+        direction : Movement.Direction
+            Left, Right, Up or Down.
+        """
+        dx, dy = _PAN_DIRECTIONS[direction]
+        speed = self._move.speed()
+        x, y = self._pending_pan
+
+        self._pending_pan = (x + dx * speed, y + dy * speed)
+        self._move.move(direction)
+
+    def schedule_zoom(self, direction):
+        """
+        Schedule a zoom of the window, at the speed of the zooms before it,
+        to be applied by `step`.
+
+        Parameters
+        ----------
+        direction : Movement.Direction
+            In or Out.
+        """
+        if direction is Movement.Direction.In:
+            rate = self._pending_zoom * (1 - self._zoom.speed())
+
+            # Like zoom_in, zooming in stops short of a window smaller than a
+            # unit both ways.
+            if self.width() * rate < 1 and self.height() * rate < 1:
+                return
+        else:
+            rate = self._pending_zoom * (1 + self._zoom.speed())
+
+        self._pending_zoom = rate
+        self._zoom.move(direction)
+
+    def pending_movement(self):
+        """
+        Return the movement scheduled but not applied yet.
+
+        Returns
+        -------
+        tuple
+            The translation as (dx, dy) and the zoom rate about the center,
+            as (dx, dy, rate).
+        """
+        return (*self._pending_pan, self._pending_zoom)
+
+    def step(self, fraction=1):
+        """
+        Apply part of the movement scheduled, with a single transform.
+
+        The zoom is split geometrically, so applying a movement in any number
+        of steps adds up to applying it at once.
+
+        Parameters
+        ----------
+        fraction : float, optional
+            The part of the movement left to apply, by default all of it.
+        """
+        x, y = self._pending_pan
+        rate = self._pending_zoom
+
+        if (x, y, rate) == (0, 0, 1):
+            return
+
+        if fraction < 1:
+            x, y = fraction * x, fraction * y
+            rate = rate**fraction
+
+        center = self.center()
+
+        self.apply(
+            combine(
+                Translation(-center.x(), -center.y()),
+                Scaling(rate, rate),
+                Translation(center.x() + x, center.y() + y),
+            )
+        )
+
+        if fraction < 1:
+            pan_x, pan_y = self._pending_pan
+            self._pending_pan = (pan_x - x, pan_y - y)
+            self._pending_zoom /= rate
+        else:
+            self._pending_pan = (0.0, 0.0)
+            self._pending_zoom = 1.0
+
     def normalize(self, point):
         x = (point.x() - self.xmin()) / self.width()
         y = 1 - (point.y() - self.ymin()) / self.height()
 
         return Position(x, y)
 
+    def normalization(self):
+        return combine(
+            Translation(-self.xmin(), -self.ymin()),
+            Scaling(1 / self.width(), -1 / self.height()),
+            Translation(0, 1),
+        )
+
     def center(self):
         x = self.xmin() + self.width() / 2
         y = self.ymin() + self.height() / 2
@@ -111,13 +245,21 @@ class Window(Rectangle):
         )
 
     def xmin(self):
-        return min(p.x() for p in self._points)
+        return self.bounds()[0]
 
     def xmax(self):
-        return max(p.x() for p in self._points)
+        return self.bounds()[2]
 
     def ymin(self):
-        return min(p.y() for p in self._points)
+        return self.bounds()[1]
 
     def ymax(self):
-        return max(p.y() for p in self._points)
+        return self.bounds()[3]
+
+
+_PAN_DIRECTIONS = {
+    Movement.Direction.Left: (-1, 0),
+    Movement.Direction.Right: (1, 0),
+    Movement.Direction.Up: (0, 1),
+    Movement.Direction.Down: (0, -1),
+}
@@ -1,18 +1,44 @@
+import argparse
 import sys
 
 from PyQt5 import QtWidgets
 
+from igs.graphics.engine import ProcessEngine
 from igs.ui.main_window import MainWindow
 
 
 def main():
-    app = QtWidgets.QApplication(sys.argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--stats",
+        metavar="FILE",
+        help="record frame stats and write them to FILE on exit, as JSON",
+    )
+    parser.add_argument(
+        "--processes",
+        metavar="N",
+        type=int,
+        help="transform large selections on N worker processes",
+    )
+    args, qt_args = parser.parse_known_args()
+
+    engine = ProcessEngine(args.processes) if args.processes else None
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
 
     ui = MainWindow()
+    ui.stats().set_enabled(args.stats is not None)
+    ui.display_file().set_engine(engine)
     ui.show()
 
     app.exec()
 
+    if engine is not None:
+        engine.close()
+
+    if args.stats:
+        ui.stats().dump(args.stats)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,232 @@
+import os
+from collections import deque
+
+from PyQt5 import QtCore, QtWidgets
+
+from igs.graphics import importer
+
+
+class ImportWorker(QtCore.QObject):
+    """
+    Reads the shapes of a file in chunks, meant to run on a worker thread.
+    """
+
+    # Emitted with the shapes of every chunk read.
+    chunkRead = QtCore.pyqtSignal(list)
+
+    # Emitted with the number of bytes read so far and the size of the file.
+    progress = QtCore.pyqtSignal(int, int)
+
+    # Emitted once the whole file was read, or reading was cancelled.
+    finished = QtCore.pyqtSignal()
+
+    # Emitted with a message if the file can't be read.
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, format=None, chunk_size=2000):
+        """
+        Create a new import worker.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+        format : str, optional
+            One of the supported formats, by default guessed from the file.
+        chunk_size : int, optional
+            The number of lines read per chunk, by default 2000.
+        """
+        super().__init__()
+
+        self._path = path
+        self._format = format
+        self._chunk_size = chunk_size
+        self._cancelled = False
+
+    def cancel(self):
+        """
+        Stop reading after the current chunk.
+        """
+        self._cancelled = True
+
+    def run(self):
+        """
+        Read the file, emitting its shapes chunk by chunk.
+        """
+        try:
+            size = os.path.getsize(self._path)
+
+            with open(self._path, "rb") as file:
+                format = self._format or importer.guess_format(
+                    self._path, file.readline().decode()
+                )
+                file.seek(0)
+
+                for shapes, read in importer.read_chunks(
+                    file, format, self._chunk_size
+                ):
+                    if self._cancelled:
+                        break
+
+                    self.chunkRead.emit(shapes)
+                    self.progress.emit(read, size)
+
+        except (OSError, UnicodeDecodeError, ValueError) as error:
+            self.failed.emit(str(error))
+
+        self.finished.emit()
+
+
+class ImportDialog(QtWidgets.QProgressDialog):
+    """
+    A progress dialog that imports a file into a display file, reading it on
+    a worker thread.
+    """
+
+    # Shapes are added at most this many at a time, so events are processed
+    # between insertions however fast the file is read.
+    _SLICE = 2000
+
+    # Emitted with the number of shapes imported, once they were all added or
+    # importing was cancelled.
+    completed = QtCore.pyqtSignal(int)
+
+    def __init__(self, display_file, path, format=None, parent=None):
+        """
+        Create a new import dialog.
+
+        Parameters
+        ----------
+        display_file : DisplayFile
+            The display file the shapes are added to.
+        path : str
+            The path of the file.
+        format : str, optional
+            One of the supported formats, by default guessed from the file.
+        parent : QWidget, optional
+            The parent widget, by default None.
+        """
+        super().__init__(
+            f"Importing {os.path.basename(path)}", "Cancel", 0, 1000, parent
+        )
+
+        self.setWindowTitle("Import")
+        self.setMinimumDuration(500)
+
+        self._display_file = display_file
+        self._imported = 0
+        self._error = None
+
+        # Shapes read but not added yet, taken from the front a slice at a
+        # time.
+        self._buffer = deque()
+        self._scheduled = False
+        self._read = False
+        self._completed = False
+
+        self._thread = QtCore.QThread(self)
+        self._worker = ImportWorker(path, format)
+        self._worker.moveToThread(self._thread)
+
+        # Chunks are queued to this thread, where the display file lives, so
+        # each one is added with a single row insertion between events.
+        self._worker.chunkRead.connect(self._add, QtCore.Qt.QueuedConnection)
+        self._worker.progress.connect(self._progress, QtCore.Qt.QueuedConnection)
+        self._worker.failed.connect(self._fail, QtCore.Qt.QueuedConnection)
+        self._worker.finished.connect(self._thread.quit)
+        self._thread.started.connect(self._worker.run)
+        self._thread.finished.connect(self._finish)
+
+        # The worker is busy reading, so it is cancelled from this thread
+        # rather than through its own event loop.
+        self.canceled.connect(self._cancel)
+
+    def start(self):
+        """
+        Start importing.
+        """
+        self._thread.start()
+
+    def imported(self):
+        """
+        Return the number of shapes imported so far.
+
+        Returns
+        -------
+        int
+            The number of shapes.
+        """
+        return self._imported
+
+    def error(self):
+        """
+        Return why importing failed.
+
+        Returns
+        -------
+        str or None
+            The error message, or None if importing didn't fail.
+        """
+        return self._error
+
+    def _cancel(self):
+        self._worker.cancel()
+
+    def _add(self, shapes):
+        if self.wasCanceled():
+            return
+
+        self._buffer.extend(shapes)
+        self._schedule()
+
+    def _schedule(self):
+        if self._buffer and not self._scheduled:
+            self._scheduled = True
+            QtCore.QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+
+        if self.wasCanceled():
+            self._buffer.clear()
+            self._complete()
+            return
+
+        count = min(self._SLICE, len(self._buffer))
+        shapes = [self._buffer.popleft() for _ in range(count)]
+
+        self._display_file.add_many(shapes)
+        self._imported += len(shapes)
+
+        self.setLabelText(f"Imported {self._imported} shapes")
+        self._schedule()
+        self._complete()
+
+    def _progress(self, read, size):
+        if size and not self.wasCanceled():
+            self.setValue(min(999, read * 1000 // size))
+
+    def _fail(self, message):
+        self._error = message
+
+    def _finish(self):
+        self._read = True
+        self._complete()
+
+    def _complete(self):
+        # Importing is over once the file was read and every shape read was
+        # added.
+        if self._completed or not self._read:
+            return
+
+        if self._buffer and not self.wasCanceled():
+            return
+
+        self._completed = True
+        self.setValue(self.maximum())
+        self.completed.emit(self._imported)
+
+        if self._error is not None:
+            QtWidgets.QMessageBox.warning(
+                self.parentWidget(), "Import failed", self._error
+            )
@@ -1,11 +1,16 @@
-from PyQt5 import QtWidgets
+from PyQt5 import QtGui, QtWidgets
 from PyQt5.QtCore import Qt
 
 from igs.graphics.displayfile import DisplayFile
+from igs.graphics.history import History
+from igs.graphics.stats import Stats
 from igs.graphics.transform import Rotation, Transform, Translation, Scaling, combine
 from igs.ui import util
 from igs.ui.view import Viewport, ListView
 from igs.ui.dialog import dialog_factory
+from igs.ui.importer import ImportDialog
+
+_SCENE_FILTER = "Scenes (*.igs);;All files (*)"
 
 
 class MainWindow(QtWidgets.QWidget):
@@ -18,9 +23,12 @@ class MainWindow(QtWidgets.QWidget):
         self.setFixedWidth(800)
 
         self._display_file = DisplayFile()
+        self._history = History(self._display_file)
+        self._stats = Stats()
 
         self._shape_list = ListView()
         self._shape_list.setModel(self._display_file)
+        self._shape_list.deleteRequested.connect(self.remove_shapes)
 
         self._transform_group = TransformGroup()
 
@@ -54,8 +62,29 @@ class MainWindow(QtWidgets.QWidget):
         shape_create_button = QtWidgets.QPushButton("Create")
         shape_create_button.clicked.connect(self.add_shape)
 
+        shape_import_button = QtWidgets.QPushButton("Import...")
+        shape_import_button.clicked.connect(self.import_shapes)
+
+        scene_open_button = QtWidgets.QPushButton("Open...")
+        scene_open_button.clicked.connect(self.open_scene)
+
+        scene_save_button = QtWidgets.QPushButton("Save...")
+        scene_save_button.clicked.connect(self.save_scene)
+
+        undo_button = QtWidgets.QPushButton("Undo")
+        undo_button.clicked.connect(self.undo)
+
+        redo_button = QtWidgets.QPushButton("Redo")
+        redo_button.clicked.connect(self.redo)
+
+        QtWidgets.QShortcut(QtGui.QKeySequence.Undo, self, self.undo)
+        QtWidgets.QShortcut(QtGui.QKeySequence.Redo, self, self.redo)
+
         shape_creator = QtWidgets.QFormLayout()
         shape_creator.addRow(self._shape_selector, shape_create_button)
+        shape_creator.addRow(shape_import_button)
+        shape_creator.addRow(scene_open_button, scene_save_button)
+        shape_creator.addRow(undo_button, redo_button)
 
         control_group = QtWidgets.QVBoxLayout()
         control_group.addWidget(util.create_label("Shapes"))
@@ -63,16 +92,15 @@ class MainWindow(QtWidgets.QWidget):
         control_group.addWidget(self._transform_group)
         control_group.addLayout(shape_creator)
 
-        viewport = Viewport()
+        viewport = Viewport(stats=self._stats)
         viewport.set_display_file(self._display_file, True)
 
         viewport_group = QtWidgets.QVBoxLayout()
         viewport_group.addWidget(util.create_label("Viewport"))
         viewport_group.addWidget(viewport, 1, Qt.AlignTop)
 
-        self._display_file.rowsRemoved.connect(viewport.update)
-        self._display_file.rowsInserted.connect(viewport.update)
-        self._display_file.dataChanged.connect(viewport.update)
+        self._display_file.regionsChanged.connect(viewport.update_regions)
+        viewport.picked.connect(self._shape_list.select_rows)
 
         layout = QtWidgets.QHBoxLayout()
         layout.addLayout(control_group)
@@ -80,60 +108,111 @@ class MainWindow(QtWidgets.QWidget):
 
         self.setLayout(layout)
 
+    def stats(self):
+        return self._stats
+
+    def display_file(self):
+        return self._display_file
+
+    def history(self):
+        return self._history
+
     def add_shape(self):
         dialog = dialog_factory.get(self._shape_selector.currentText())
 
         if dialog.exec() == QtWidgets.QDialog.Accepted:
-            self._display_file.add(dialog.shape())
+            self._history.add(dialog.shape())
+
+    def remove_shapes(self, rows):
+        with self._stats.stage("remove_shapes"):
+            self._history.remove_many(rows)
+
+    def undo(self):
+        with self._stats.stage("undo"):
+            self._history.undo()
+
+    def redo(self):
+        with self._stats.stage("redo"):
+            self._history.redo()
+
+    def import_shapes(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Import shapes",
+            "",
+            "Shapes (*.csv *.txt *.wkt *.geojson *.geojsonl *.json *.jsonl *.ndjson);;"
+            "All files (*)",
+        )
 
-    def apply_scaling(self):
-        scaling = self._transform_group.scaling()
+        if path:
+            self._import = ImportDialog(self._display_file, path, parent=self)
+            self._import.start()
 
-        for index in self._shape_list.selectionModel().selectedIndexes():
-            shape = self._display_file.data(index, Qt.UserRole)
-            center = shape.center()
+    def open_scene(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Open scene", "", _SCENE_FILTER
+        )
 
-            transform = combine(
-                Translation(-center.x(), -center.y()),
-                scaling,
-                Translation(center.x(), center.y()),
-            )
+        if not path:
+            return
 
-            self._display_file.setData(index, shape.apply(transform), Qt.UserRole)
+        try:
+            self._display_file.load(path)
+        except (OSError, ValueError) as error:
+            QtWidgets.QMessageBox.warning(self, "Open failed", str(error))
+            return
+
+        self._history.clear()
+
+    def save_scene(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save scene", "", _SCENE_FILTER
+        )
+
+        if not path:
+            return
+
+        try:
+            self._display_file.save(path)
+        except OSError as error:
+            QtWidgets.QMessageBox.warning(self, "Save failed", str(error))
+
+    def apply_scaling(self):
+        scaling = self._transform_group.scaling()
+
+        with self._stats.stage("apply_scaling"):
+            self._history.transform_rows(self._selected_rows(), scaling, pivot="center")
 
     def apply_translation(self):
         translation = self._transform_group.translation()
 
-        for index in self._shape_list.selectionModel().selectedIndexes():
-            shape = self._display_file.data(index, Qt.UserRole)
-            self._display_file.setData(index, shape.apply(translation), Qt.UserRole)
+        with self._stats.stage("apply_translation"):
+            self._history.transform_rows(self._selected_rows(), translation)
 
     def apply_rotation_center(self):
         rotation = self._transform_group.rotation_center()
 
-        for index in self._shape_list.selectionModel().selectedIndexes():
-            shape = self._display_file.data(index, Qt.UserRole)
-
-            center = shape.center()
-            x = center.x()
-            y = center.y()
-
-            transform = combine(Translation(-x, -y), rotation, Translation(x, y))
-            self._display_file.setData(index, shape.apply(transform), Qt.UserRole)
+        with self._stats.stage("apply_rotation_center"):
+            self._history.transform_rows(
+                self._selected_rows(), rotation, pivot="center"
+            )
 
     def apply_rotation_origin(self):
         rotation = self._transform_group.rotation_origin()
 
-        for index in self._shape_list.selectionModel().selectedIndexes():
-            shape = self._display_file.data(index, Qt.UserRole)
-            self._display_file.setData(index, shape.apply(rotation), Qt.UserRole)
+        with self._stats.stage("apply_rotation_origin"):
+            self._history.transform_rows(self._selected_rows(), rotation)
 
     def apply_rotation_point(self):
         rotation = self._transform_group.rotation_point()
 
-        for index in self._shape_list.selectionModel().selectedIndexes():
-            shape = self._display_file.data(index, Qt.UserRole)
-            self._display_file.setData(index, shape.apply(rotation), Qt.UserRole)
+        with self._stats.stage("apply_rotation_point"):
+            self._history.transform_rows(self._selected_rows(), rotation)
+
+    def _selected_rows(self):
+        indexes = self._shape_list.selectionModel().selectedIndexes()
+
+        return [index.row() for index in indexes]
 
 
 class TransformGroup(QtWidgets.QGroupBox):
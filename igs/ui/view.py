@@ -1,8 +1,12 @@
-from PyQt5 import QtGui, QtWidgets
+import numpy
+from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import Qt
 
-from igs.graphics.window import Window
-from igs.graphics.shape import Mark, Position
+from igs.graphics import picking, render
+from igs.graphics.render import Renderer
+from igs.graphics.stats import Stats
+from igs.graphics.window import Movement, Window
+from igs.graphics.shape import Mark, Position, map_bounds
 
 
 class ListView(QtWidgets.QListView):
@@ -10,12 +14,23 @@ class ListView(QtWidgets.QListView):
     A list view that that can delete objects.
     """
 
+    # Emitted with the selected rows when delete is pressed, if anything is
+    # connected, which then deletes them instead of the view.
+    deleteRequested = QtCore.pyqtSignal(list)
+
     def __init__(self):
         """
         Creates a new list view.
         """
         super().__init__()
 
+        # Rows all have the same height, so the view doesn't need to ask for
+        # the size of every row, and they are laid out a batch at a time, so
+        # inserting many rows doesn't block the interface.
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setBatchSize(10000)
+
     def keyPressEvent(self, event):
         """
         Handles key press events.
@@ -29,8 +44,57 @@ class ListView(QtWidgets.QListView):
             super().keyPressEvent(event)
             return
 
-        for index in self.selectionModel().selectedIndexes():
-            self.model().removeRow(index.row())
+        rows = [index.row() for index in self.selectionModel().selectedIndexes()]
+
+        if self.receivers(self.deleteRequested):
+            self.deleteRequested.emit(rows)
+        else:
+            self.model().remove_many(rows)
+
+    def select_rows(self, rows, extend=False):
+        """
+        Select rows with a single selection change, however many there are.
+
+        Parameters
+        ----------
+        rows : list of int
+            The rows, in any order.
+        extend : bool, optional
+            Boolean indicating whether to add the rows to the selection
+            instead of replacing it, by default False.
+        """
+        model = self.model()
+        selection_model = self.selectionModel()
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+
+        current = [
+            numpy.arange(selected.top(), selected.bottom() + 1)
+            for selected in selection_model.selection()
+        ]
+        current = numpy.unique(numpy.concatenate([[], *current]).astype(numpy.intp))
+
+        if extend:
+            rows = numpy.concatenate([rows, current])
+
+        rows = numpy.unique(rows)
+        selection, firsts = _row_selection(model, rows)
+
+        # Qt compares every range of a selection being replaced with every
+        # new one, which takes a minute for tens of thousands of ranges, so
+        # the selection is replaced quietly and the change announced once,
+        # as Qt would, from the rows selected and deselected.
+        selected, _ = _row_selection(model, numpy.setdiff1d(rows, current, True))
+        deselected, _ = _row_selection(model, numpy.setdiff1d(current, rows, True))
+
+        selection_model.blockSignals(True)
+        selection_model.reset()
+        selection_model.select(selection, QtCore.QItemSelectionModel.Select)
+        selection_model.blockSignals(False)
+
+        selection_model.selectionChanged.emit(selected, deselected)
+
+        if firsts:
+            self.scrollTo(model.index(firsts[0]))
 
 
 class Viewport(QtWidgets.QFrame):
@@ -40,9 +104,60 @@ class Viewport(QtWidgets.QFrame):
 
     _MARGIN = 10
 
-    def __init__(self):
+    # Clicks this many pixels away from a shape still pick it.
+    _PICK_TOLERANCE = 4
+
+    # The longest the renderer works between input events, in seconds, well
+    # within a frame.
+    _SLICE_BUDGET = 0.008
+
+    # Navigation scheduled by input is applied once per frame, this many
+    # milliseconds apart, easing out over about this many seconds.
+    _FRAME_INTERVAL = 16
+    _NAVIGATION_EASING = 0.05
+
+    _PAN_KEYS = {
+        Qt.Key_Left: Movement.Direction.Left,
+        Qt.Key_Right: Movement.Direction.Right,
+        Qt.Key_Up: Movement.Direction.Up,
+        Qt.Key_Down: Movement.Direction.Down,
+    }
+
+    # Emitted with the rows of the shapes picked with the mouse, by clicking
+    # or dragging a box, and whether they add to the selection.
+    picked = QtCore.pyqtSignal(list, bool)
+
+    # Metrics shown by the overlay, and which of them are times.
+    _OVERLAY_METRICS = [
+        ("frame", "frame"),
+        ("query", "query"),
+        ("project", "project"),
+        ("paint", "paint"),
+        ("blit", "blit"),
+        ("raster", "raster"),
+        ("refine", "refine"),
+        ("shapes", "shapes"),
+        ("vertices", "vertices"),
+        ("draw_calls", "draw calls"),
+        ("tiles_rendered", "tiles rendered"),
+        ("tiles_sketched", "tiles sketched"),
+        ("tiles_queued", "tiles queued"),
+        ("tiles_coarse", "coarse tiles"),
+    ]
+    _OVERLAY_TIMES = {"frame", "query", "project", "paint", "blit", "raster", "refine"}
+
+    def __init__(self, tile_budget=64 * 2**20, stats=None):
         """
         Create a new viewport.
+
+        Parameters
+        ----------
+        tile_budget : int, optional
+            The most memory the tiles the scene is drawn from can take, in
+            bytes, by default 64 MiB.
+        stats : Stats, optional
+            Where to record how long frames take and what they draw, by
+            default disabled stats of its own.
         """
         super().__init__()
 
@@ -60,6 +175,20 @@ class Viewport(QtWidgets.QFrame):
             window_size,
         )
 
+        self._projection_key = None
+        self._tile_budget = tile_budget
+        self._stats = stats or Stats()
+        self._overlay = False
+
+        self._press = None
+        self._rubber_band = QtWidgets.QRubberBand(QtWidgets.QRubberBand.Rectangle, self)
+
+        self._navigator = QtCore.QTimer(self)
+        self._navigator.setTimerType(Qt.PreciseTimer)
+        self._navigator.setInterval(self._FRAME_INTERVAL)
+        self._navigator.timeout.connect(self.step_navigation)
+        self._frame_clock = QtCore.QElapsedTimer()
+
     def set_display_file(self, display_file, center_marker=False):
         """
         Set the display file to draw.
@@ -74,6 +203,18 @@ class Viewport(QtWidgets.QFrame):
         """
         self._display_file = display_file
 
+        # Tiles are queued on the global thread pool in short slices, so
+        # painting never waits for them, and repainted where they are once
+        # ready.
+        self._renderer = Renderer(
+            display_file,
+            self._tile_budget,
+            self._stats,
+            QtCore.QThreadPool.globalInstance(),
+            self._SLICE_BUDGET,
+        )
+        self._renderer.tilesRendered.connect(self.update_regions)
+
         if center_marker:
             self._display_file.add(Mark(Position(0, 0)))
 
@@ -115,63 +256,368 @@ class Viewport(QtWidgets.QFrame):
             self.height() - 2 * self._MARGIN,
         )
 
-    def transform(self, point):
+    def clip_rect(self):
+        """
+        Return the region drawing is clipped to, which is the area inside the
+        margin.
+
+        Returns
+        -------
+        tuple
+            The clipping rectangle as (xmin, ymin, xmax, ymax) in viewport
+            coordinates.
+        """
+        return (
+            self._MARGIN,
+            self._MARGIN,
+            self.width() - self._MARGIN,
+            self.height() - self._MARGIN,
+        )
+
+    def pixel_size(self):
+        """
+        Return the size of a viewport pixel in world coordinates.
+
+        Returns
+        -------
+        float
+            The largest world distance covered by a pixel on either axis,
+            which bounds how much detail can be seen.
+        """
+        return max(
+            self._window.width() / self.width(),
+            self._window.height() / self.height(),
+        )
+
+    def stats(self):
+        """
+        Return the stats frames are recorded in.
+
+        Returns
+        -------
+        Stats
+            The stats.
+        """
+        return self._stats
+
+    def set_overlay(self, overlay):
+        """
+        Show or hide the frame stats on top of the viewport. Showing them
+        enables the stats.
+
+        Parameters
+        ----------
+        overlay : bool
+            Boolean indicating whether to show the stats.
+        """
+        self._overlay = overlay
+
+        if overlay:
+            self._stats.set_enabled(True)
+
+        self.update()
+
+    def update_regions(self, regions):
         """
-        Apply the viewport transform to a point.
+        Schedule a repaint of the viewport where some world regions are.
 
         Parameters
         ----------
-        point : Point
-            Point to apply the transform.
+        regions : list of tuple
+            Regions as (xmin, ymin, xmax, ymax) tuples in world coordinates.
+        """
+        if not regions:
+            return
+
+        # Only one rectangle is repainted anyway, so the regions are merged
+        # before being projected, which the window allows since it is never
+        # rotated.
+        regions = numpy.asarray(regions)
+        merged = (*regions[:, :2].min(axis=0), *regions[:, 2:].max(axis=0))
+
+        # Far away regions are clamped to the viewport first, so the rect
+        # doesn't overflow.
+        xmin, ymin, xmax, ymax = numpy.clip(
+            map_bounds(self.projection(), merged),
+            -1,
+            [self.width() + 1, self.height() + 1] * 2,
+        )
+        padding = self._renderer.padding()
+
+        damaged = QtCore.QRectF(xmin, ymin, xmax - xmin, ymax - ymin).toAlignedRect()
+        damaged = damaged.adjusted(-padding, -padding, padding, padding)
+        damaged = damaged.intersected(self.rect())
+
+        if not damaged.isEmpty():
+            self.update(damaged)
+
+    def projection(self):
+        """
+        Return the window-to-viewport transform.
 
         Returns
         -------
-        Point
-            The transformed point.
+        Transform
+            A transform mapping world coordinates to viewport coordinates,
+            suitable for applying to whole shapes at once.
         """
-        point = self._window.normalize(point)
+        key = (self._window.version(), self.width(), self.height())
 
-        x = round(point.x() * self.width())
-        y = round(point.y() * self.height())
+        if key != self._projection_key:
+            self._projection_key = key
+            self._projection = render.projection(
+                self._window, self.width(), self.height()
+            )
 
-        return Position(x, y)
+        return self._projection
 
     def keyPressEvent(self, event):
         super().keyPressEvent(event)
 
         key = event.key()
 
-        if key == Qt.Key_Left:
-            self._window.move_left()
-            self.update()
+        if key == Qt.Key_F3:
+            self.set_overlay(not self._overlay)
 
-        elif key == Qt.Key_Right:
-            self._window.move_right()
-            self.update()
+        elif key in self._PAN_KEYS:
+            self._window.schedule_move(self._PAN_KEYS[key])
+            self.schedule_navigation()
 
-        elif key == Qt.Key_Up:
-            self._window.move_up()
-            self.update()
+    def schedule_navigation(self):
+        """
+        Apply the movement scheduled on the window over the next frames.
 
-        elif key == Qt.Key_Down:
-            self._window.move_down()
-            self.update()
+        However many input events schedule movement, the window is moved and
+        the viewport repainted once per frame.
+        """
+        if not self._navigator.isActive():
+            self._frame_clock.start()
+            self._navigator.start()
+
+    def step_navigation(self, fraction=None):
+        """
+        Apply the part of the movement scheduled on the window that is due
+        by now, and repaint.
+
+        Parameters
+        ----------
+        fraction : float, optional
+            The part of the movement left to apply instead, by default None.
+        """
+        seconds = self._frame_clock.restart() / 1000
+
+        if fraction is None:
+            fraction = 1 - numpy.exp(-seconds / self._NAVIGATION_EASING)
+
+        # The rest of a movement too small to see is applied at once.
+        dx, dy, rate = self._window.pending_movement()
+        pixel_size = self.pixel_size()
+
+        if max(abs(dx), abs(dy)) < pixel_size / 2 and abs(rate - 1) < 1e-3:
+            fraction = 1
+
+        self._window.step(fraction)
+        self.update()
+
+        if fraction == 1:
+            self._navigator.stop()
+
+    def pick(self, x, y):
+        """
+        Find the rows of the shape under a point of the viewport.
+
+        Parameters
+        ----------
+        x : float
+            The x coordinate of the point, in viewport coordinates.
+        y : float
+            The y coordinate of the point, in viewport coordinates.
+
+        Returns
+        -------
+        list of int
+            The row of the nearest shape within a few pixels of the point, or
+            nothing if there is none.
+        """
+        ((world_x, world_y),) = self.projection().inverse().map(numpy.array([[x, y]]))
+        tolerance = self._PICK_TOLERANCE * self.pixel_size()
+
+        with self._stats.stage("pick"):
+            slot = picking.pick(self._display_file, (world_x, world_y), tolerance)
+
+        if slot is None:
+            return []
+
+        return self._display_file.rows([slot]).tolist()
+
+    def pick_box(self, rect):
+        """
+        Find the rows of the shapes across a rectangle of the viewport.
+
+        Parameters
+        ----------
+        rect : tuple
+            The rectangle as (xmin, ymin, xmax, ymax), in viewport
+            coordinates.
+
+        Returns
+        -------
+        list of int
+            The rows of the shapes, in ascending order.
+        """
+        region = map_bounds(self.projection().inverse(), rect)
+
+        with self._stats.stage("pick"):
+            slots = picking.pick_box(self._display_file, region)
+
+        return numpy.sort(self._display_file.rows(slots)).tolist()
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            super().mousePressEvent(event)
+            return
+
+        self._press = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self._press is None:
+            super().mouseMoveEvent(event)
+            return
+
+        # Moving a few pixels still counts as a click.
+        distance = (event.pos() - self._press).manhattanLength()
+
+        if distance >= QtWidgets.QApplication.startDragDistance():
+            rect = QtCore.QRect(self._press, event.pos()).normalized()
+            self._rubber_band.setGeometry(rect)
+            self._rubber_band.show()
+
+    def mouseReleaseEvent(self, event):
+        if self._press is None or event.button() != Qt.LeftButton:
+            super().mouseReleaseEvent(event)
+            return
+
+        self._press = None
+        extend = bool(event.modifiers() & (Qt.ControlModifier | Qt.ShiftModifier))
+
+        if self._rubber_band.isVisible():
+            self._rubber_band.hide()
+            rect = self._rubber_band.geometry()
+            rows = self.pick_box(
+                (rect.left(), rect.top(), rect.right() + 1, rect.bottom() + 1)
+            )
+        else:
+            rows = self.pick(event.pos().x(), event.pos().y())
+
+        self.picked.emit(rows, extend)
 
     def wheelEvent(self, event):
         if event.angleDelta().y() > 0:
-            self._window.zoom_in()
+            self._window.schedule_zoom(Movement.Direction.In)
         else:
-            self._window.zoom_out()
+            self._window.schedule_zoom(Movement.Direction.Out)
 
-        self.update()
+        self.schedule_navigation()
 
     def paintEvent(self, event):
         super().paintEvent(event)
 
         painter = QtGui.QPainter(self)
 
-        self.draw_margin(painter)
+        with self._stats.frame():
+            self.draw_margin(painter)
+
+            rect = _intersect(self.clip_rect(), _as_tuple(event.rect()))
+
+            if rect is not None:
+                self._renderer.draw(
+                    painter, self._window, self.width(), self.height(), rect
+                )
+
+        if self._overlay:
+            self.draw_overlay(painter, event.rect())
+
+    def draw_overlay(self, painter, damaged):
+        """
+        Draw the frame stats on top of the viewport.
+
+        Parameters
+        ----------
+        painter : QPainter
+            Painter used to paint.
+        damaged : QRect
+            The region being repainted.
+        """
+        stats = self._stats
+        lines = []
+
+        for name, label in self._OVERLAY_METRICS:
+            summary = stats.summary(name)
+
+            if summary is None:
+                continue
+
+            if name in self._OVERLAY_TIMES:
+                lines.append(
+                    f"{label}: {summary['last'] * 1000:.1f} ms"
+                    f" (p95 {summary['p95'] * 1000:.1f} ms)"
+                )
+            else:
+                lines.append(f"{label}: {summary['last']:.0f}")
+
+        metrics = painter.fontMetrics()
+        width = max((metrics.horizontalAdvance(line) for line in lines), default=0)
+        overlay = QtCore.QRect(
+            self._MARGIN + 1,
+            self._MARGIN + 1,
+            width + 8,
+            len(lines) * metrics.height() + 8,
+        )
+
+        # Drawing only part of the overlay would mix old and new numbers.
+        if not damaged.contains(overlay):
+            self.update(overlay)
+            return
+
+        painter.fillRect(overlay, QtGui.QColor(255, 255, 255, 200))
+        painter.setPen(QtGui.QColor("black"))
+
+        for number, line in enumerate(lines):
+            painter.drawText(
+                overlay.left() + 4,
+                overlay.top() + 4 + number * metrics.height() + metrics.ascent(),
+                line,
+            )
+
+
+def _row_selection(model, rows):
+    # A selection of sorted and unique rows, with consecutive rows making up
+    # a single range, and the first row of every range.
+    (breaks,) = numpy.nonzero(numpy.diff(rows) != 1)
+    firsts = numpy.append(rows[:1], rows[breaks + 1]).tolist()
+    lasts = numpy.append(rows[breaks], rows[-1:]).tolist()
+
+    # Ranges are appended rather than selected, which would merge every one
+    # into those before it.
+    selection = QtCore.QItemSelection()
+
+    for first, last in zip(firsts, lasts):
+        selection.append(
+            QtCore.QItemSelectionRange(model.index(first), model.index(last))
+        )
+
+    return selection, firsts
+
+
+def _as_tuple(rect):
+    return (rect.left(), rect.top(), rect.right() + 1, rect.bottom() + 1)
+
+
+def _intersect(a, b):
+    xmin, ymin = max(a[0], b[0]), max(a[1], b[1])
+    xmax, ymax = min(a[2], b[2]), min(a[3], b[3])
+
+    if xmin > xmax or ymin > ymax:
+        return None
 
-        for shape in self._display_file:
-            transformed_shape = shape.clone().apply(self.transform)
-            transformed_shape.draw(painter)
+    return (xmin, ymin, xmax, ymax)
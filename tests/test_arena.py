@@ -0,0 +1,60 @@
+import numpy
+
+from igs.graphics.arena import VertexArena, gather_ranges
+
+
+def test_gather_ranges():
+    indices = gather_ranges(numpy.array([5, 0, 9]), numpy.array([2, 3, 0]))
+
+    assert indices.tolist() == [5, 6, 0, 1, 2]
+
+
+def test_store_and_gather():
+    arena = VertexArena(capacity=4)
+    a = arena.allocate()
+    b = arena.allocate()
+
+    arena.store(a, numpy.array([[0, 0], [1, 1]]))
+    arena.store(b, numpy.array([[2, 2], [3, 3], [4, 4]]))
+
+    assert arena.gather(numpy.array([b, a])).tolist() == [
+        [2, 2],
+        [3, 3],
+        [4, 4],
+        [0, 0],
+        [1, 1],
+    ]
+    assert arena.lengths(numpy.array([a, b])).tolist() == [2, 3]
+
+
+def test_storing_the_current_view_is_free():
+    arena = VertexArena()
+    slot = arena.allocate()
+    view = arena.store(slot, numpy.ones((10, 2)))
+
+    assert arena.store(slot, view).base is view.base
+    assert arena.num_vertices() == 10
+
+
+def test_views_survive_compaction_and_slots_are_reused():
+    arena = VertexArena(capacity=8)
+    views = {}
+
+    for i in range(200):
+        slot = arena.allocate()
+        views[slot] = arena.store(slot, numpy.full((20, 2), i))
+
+    generation = arena.generation()
+
+    freed = [slot for slot in range(200) if slot % 4]
+
+    for slot in freed:
+        arena.free(slot)
+        del views[slot]
+
+    assert arena.generation() != generation
+    assert arena.num_vertices() == 50 * 20
+    assert arena.allocate() in freed
+
+    for slot, view in views.items():
+        assert numpy.array_equal(arena.view(slot), view)
@@ -0,0 +1,56 @@
+import numpy
+
+from igs.graphics.clipping import clip_points, clip_polygon, clip_segments
+
+RECT = (0, 0, 10, 10)
+
+
+def test_clip_points():
+    points = numpy.array([[5, 5], [-1, 5], [10, 10], [5, 11]])
+
+    assert clip_points(points, RECT).tolist() == [True, False, True, False]
+
+
+def test_clip_segments():
+    segments = numpy.array(
+        [
+            [1, 1, 9, 9],  # inside
+            [-5, 5, 15, 5],  # crosses both sides
+            [-5, -5, -1, 20],  # outside
+            [5, 5, 5, 20],  # leaves through the top
+            [-5, 12, 12, -5],  # crosses a corner region
+        ],
+        dtype=float,
+    )
+
+    clipped, visible = clip_segments(segments, RECT)
+
+    assert visible.tolist() == [True, True, False, True, True]
+    assert numpy.allclose(
+        clipped[:3],
+        [[1, 1, 9, 9], [0, 5, 10, 5], [5, 5, 5, 10]],
+    )
+    assert numpy.allclose(clipped[3], [0, 7, 7, 0])
+
+
+def test_clip_segments_keeps_unclipped_endpoints_exact():
+    segments = numpy.array([[0.1, 0.2, 20.3, 0.7]])
+
+    clipped, _ = clip_segments(segments, RECT)
+
+    assert tuple(clipped[0, :2]) == (0.1, 0.2)
+
+
+def area(polygon):
+    x, y = polygon.T
+    return abs(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(y, numpy.roll(x, -1))) / 2
+
+
+def test_clip_polygon():
+    triangle = numpy.array([[-5, 5], [5, -5], [15, 5]], dtype=float)
+
+    clipped = clip_polygon(triangle, RECT)
+
+    assert clip_points(clipped, RECT).all()
+    assert numpy.isclose(area(clipped), 50)
+    assert len(clip_polygon(triangle + 100, RECT)) == 0
@@ -0,0 +1,246 @@
+import gc
+import weakref
+
+import numpy
+from PyQt5.QtCore import Qt
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.shape import Line, Point, Polyline, Position
+from igs.graphics.transform import Rotation, Scaling, Translation, combine
+
+
+def test_query_follows_rows():
+    display_file = DisplayFile()
+    near = Point(Position(1, 1))
+    far = Line(Position(100, 100), Position(200, 150))
+
+    display_file.add(near)
+    display_file.add(far)
+
+    assert display_file.query(0, 0, 10, 10) == [near]
+    assert display_file.query(-500, -500, 500, 500) == [near, far]
+
+    display_file.removeRows(0, 1)
+
+    assert display_file.query(-500, -500, 500, 500) == [far]
+
+
+def test_shapes_share_arena_storage():
+    display_file = DisplayFile()
+    line = Line(Position(0, 0), Position(1, 1))
+
+    display_file.add(line)
+    clone = display_file.data(display_file.index(0), Qt.UserRole)
+
+    assert clone.coordinates().base is display_file.arena().view(0).base
+    assert display_file.arena().num_vertices() == 2
+
+    display_file.setData(display_file.index(0), clone, Qt.UserRole)
+
+    assert display_file.arena().num_vertices() == 2
+
+
+def test_arena_owns_vertices_of_large_shapes():
+    display_file = DisplayFile()
+    angles = numpy.linspace(0, 2 * numpy.pi, 100_000)
+    shape = Polyline(numpy.column_stack([numpy.cos(angles), numpy.sin(angles)]))
+    simplified = shape.simplified(0.01)
+    original = weakref.ref(shape.coordinates())
+
+    display_file.add(shape)
+    gc.collect()
+
+    assert original() is None
+    assert shape.coordinates().base is display_file.arena().view(0).base
+    assert numpy.array_equal(shape.simplified(0.01), simplified)
+
+
+def test_empty_shapes_are_kept_but_not_indexed():
+    display_file = DisplayFile()
+    regions = []
+    display_file.regionsChanged.connect(regions.extend)
+
+    display_file.add(Polyline([]))
+    display_file.add_many([Polyline([]), Point(Position(1, 2))])
+
+    assert display_file.rowCount() == 3
+    assert regions == [(1, 2, 1, 2)]
+    assert display_file.query(-500, -500, 500, 500) == [display_file.shape_at(2)]
+
+    # Filling an empty shape indexes it, and emptying one drops it.
+    display_file.setData(
+        display_file.index(0), Line(Position(0, 0), Position(3, 4)), Qt.UserRole
+    )
+    display_file.setData(display_file.index(2), Polyline([]), Qt.UserRole)
+
+    assert display_file.query(-500, -500, 500, 500) == [display_file.shape_at(0)]
+
+
+def test_changes_report_damaged_regions():
+    display_file = DisplayFile()
+    regions = []
+    display_file.regionsChanged.connect(regions.extend)
+
+    display_file.add(Point(Position(1, 2)))
+    assert regions[0] == (1, 2, 1, 2)
+
+    moved = display_file.data(display_file.index(0), Qt.UserRole)
+    moved.apply(Translation(10, 0))
+    regions.clear()
+    display_file.setData(display_file.index(0), moved, Qt.UserRole)
+
+    assert sorted(regions) == [(1, 2, 1, 2), (11, 2, 11, 2)]
+
+    regions.clear()
+    display_file.removeRows(0, 1)
+
+    assert regions == [(11, 2, 11, 2)]
+
+
+def test_add_many_inserts_rows_once():
+    display_file = DisplayFile()
+    inserted = []
+    regions = []
+    display_file.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last))
+    )
+    display_file.regionsChanged.connect(regions.append)
+
+    display_file.add(Point(Position(0, 0)))
+    display_file.add_many([Point(Position(i, i)) for i in range(1, 4)])
+
+    assert inserted == [(0, 0), (1, 3)]
+    assert len(regions) == 2 and len(regions[-1]) == 3
+    assert display_file.query(2, 2, 3, 3) == list(display_file)[2:]
+    assert display_file.arena().num_vertices() == 4
+
+
+def test_remove_many_coalesces_runs():
+    display_file = DisplayFile()
+    points = [Point(Position(i, 0)) for i in range(10)]
+    display_file.add_many(points)
+
+    removed = []
+    display_file.rowsRemoved.connect(
+        lambda parent, first, last: removed.append((first, last))
+    )
+
+    display_file.remove_many([7, 2, 3, 8, 4])
+
+    assert removed == [(7, 8), (2, 4)]
+    assert list(display_file) == [points[i] for i in [0, 1, 5, 6, 9]]
+    assert display_file.query(-1, -1, 10, 1) == list(display_file)
+    assert display_file.arena().num_vertices() == 5
+
+
+def test_remove_many_resets_for_scattered_rows():
+    display_file = DisplayFile()
+    display_file.add_many([Point(Position(i, 0)) for i in range(100)])
+
+    resets = []
+    display_file.modelReset.connect(lambda: resets.append(True))
+
+    display_file.remove_many(range(0, 100, 2))
+
+    assert resets == [True]
+    assert [shape.point_at(0).x() for shape in display_file] == list(range(1, 100, 2))
+
+
+def test_replace_many():
+    display_file = DisplayFile()
+    display_file.add_many([Point(Position(i, 0)) for i in range(5)])
+
+    changed = []
+    display_file.dataChanged.connect(
+        lambda first, last, roles: changed.append((first.row(), last.row()))
+    )
+
+    display_file.replace_many([3, 1, 2], [Point(Position(i, 10)) for i in range(3)])
+
+    assert changed == [(1, 3)]
+    assert [shape.point_at(0).y() for shape in display_file] == [0, 10, 10, 10, 0]
+    assert len(display_file.query(-1, 9, 5, 11)) == 3
+
+
+def test_transform_rows_matches_shape_transforms():
+    rng = numpy.random.default_rng(0)
+    shapes = [Polyline(rng.uniform(-10, 10, (size, 2))) for size in (3, 5, 4, 6)]
+
+    display_file = DisplayFile()
+    display_file.add_many(shape.clone() for shape in shapes)
+
+    changed = []
+    regions = []
+    display_file.dataChanged.connect(
+        lambda first, last, roles: changed.append((first.row(), last.row()))
+    )
+    display_file.regionsChanged.connect(regions.append)
+
+    scaling = Scaling(2, 3)
+    display_file.transform_rows([3, 0, 1], scaling, pivot="center")
+
+    assert changed == [(0, 1), (3, 3)]
+    assert len(regions) == 1
+
+    for row, shape in enumerate(shapes):
+        if row != 2:
+            center = shape.center()
+            shape.apply(
+                combine(
+                    Translation(-center.x(), -center.y()),
+                    scaling,
+                    Translation(center.x(), center.y()),
+                )
+            )
+
+        transformed = display_file.data(display_file.index(row), Qt.UserRole)
+
+        assert numpy.allclose(transformed.coordinates(), shape.coordinates())
+        assert numpy.allclose(transformed.bounds(), shape.bounds())
+
+    rotation = Rotation(30)
+    display_file.transform_rows(range(4), rotation, pivot=Position(1, 2))
+
+    for row, shape in enumerate(shapes):
+        shape.apply(combine(Translation(-1, -2), rotation, Translation(1, 2)))
+        transformed = display_file.data(display_file.index(row), Qt.UserRole)
+
+        assert numpy.allclose(transformed.coordinates(), shape.coordinates())
+        assert numpy.allclose(transformed.center().x(), shape.center().x())
+
+    display_file.transform_rows([2], Translation(100, 100))
+
+    assert display_file.query(80, 80, 120, 120) == [list(display_file)[2]]
+
+
+def test_transform_rows_flushes_pending_transforms():
+    display_file = DisplayFile()
+    display_file.add(Line(Position(0, 0), Position(1, 0)).apply(Rotation(90)))
+
+    display_file.transform_rows([0], Translation(0, 5))
+
+    shape = display_file.data(display_file.index(0), Qt.UserRole)
+
+    assert shape.pending() is None
+    assert numpy.allclose(shape.coordinates(), [[0, 5], [0, 6]])
+    assert numpy.allclose(display_file.arena().vertices()[-2:], [[0, 5], [0, 6]])
+
+
+def test_insert_many_puts_shapes_at_rows():
+    display_file = DisplayFile()
+    display_file.add_many(Point(Position(i, 0)) for i in range(0, 100, 2))
+
+    display_file.insert_many([3, 1], [Point(Position(3, 0)), Point(Position(1, 0))])
+
+    assert [shape.point_at(0).x() for shape in display_file][:6] == [0, 1, 2, 3, 4, 6]
+
+    # Past a few runs the model is reset instead.
+    resets = []
+    display_file.modelReset.connect(lambda: resets.append(True))
+    rows = list(range(5, 100, 2))
+
+    display_file.insert_many(rows, [Point(Position(row, 0)) for row in rows])
+
+    assert resets == [True]
+    assert [shape.point_at(0).x() for shape in display_file] == list(range(100))
+    assert len(display_file.query(40.5, -1, 45.5, 1)) == 5
@@ -0,0 +1,54 @@
+import numpy
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.engine import ProcessEngine, transform_shapes
+from igs.graphics.shape import Polyline, Position
+from igs.graphics.transform import Rotation, Scaling
+
+
+def scene():
+    display_file = DisplayFile()
+    display_file.add_many(
+        Polyline([(i, 0), (i + 1, 2), (i + 3, 1)][: 2 + i % 2]) for i in range(100)
+    )
+
+    return display_file
+
+
+def test_transform_shapes_around_centers():
+    vertices = numpy.array([[0, 0], [2, 0], [10, 10], [10, 12]], dtype=numpy.float64)
+    lengths = numpy.array([2, 2])
+
+    transformed, bounds, centers = transform_shapes(
+        vertices, lengths, Scaling(2, 2).matrix(), "center"
+    )
+
+    assert numpy.allclose(transformed, [[-1, 0], [3, 0], [10, 9], [10, 13]])
+    assert numpy.allclose(bounds, [[-1, 0, 3, 0], [10, 9, 10, 13]])
+    assert numpy.allclose(centers, [[1, 0], [10, 11]])
+
+
+def test_process_engine_matches_local_transforms():
+    engine = ProcessEngine(processes=2, min_vertices=0)
+
+    try:
+        local = scene()
+        shared = scene()
+        shared.set_engine(engine)
+
+        shapes = list(shared)
+
+        for display_file in [local, shared]:
+            display_file.transform_rows(range(0, 100, 3), Rotation(30), "center")
+            display_file.transform_rows(range(50), Scaling(2, 1), Position(5, 5))
+
+        for expected, actual in zip(local, shared):
+            assert numpy.allclose(expected.coordinates(), actual.coordinates())
+            assert numpy.allclose(expected.bounds(), actual.bounds())
+            assert numpy.isclose(expected.center().x(), actual.center().x())
+
+        # Shapes see the vertices written by the workers, in place.
+        assert numpy.allclose(shapes[3].coordinates(), list(local)[3].coordinates())
+        assert len(shared.query(-1, -1, 1, 1)) == len(local.query(-1, -1, 1, 1))
+    finally:
+        engine.close()
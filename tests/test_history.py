@@ -0,0 +1,111 @@
+import numpy
+from PyQt5.QtCore import Qt
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.history import History
+from igs.graphics.shape import Line, Point, Polyline, Position
+from igs.graphics.transform import Rotation, Scaling, Translation
+
+
+def coordinates(display_file):
+    return [shape.coordinates().copy() for shape in display_file]
+
+
+def scene(size=10):
+    display_file = DisplayFile()
+    display_file.add_many(
+        Polyline([(i, 0), (i + 1, 2), (i + 3, 1)]) for i in range(size)
+    )
+
+    return display_file
+
+
+def test_transforms_undo_and_redo():
+    display_file = scene()
+    history = History(display_file, checkpoint_interval=1000)
+    before = coordinates(display_file)
+
+    history.transform_rows(range(0, 10, 2), Scaling(2, 3), pivot="center")
+    history.transform_rows([1, 2, 3], Rotation(30), pivot=Position(4, 4))
+    after = coordinates(display_file)
+
+    assert history.undo()
+    assert history.undo()
+    assert not history.undo()
+
+    for expected, actual in zip(before, coordinates(display_file)):
+        assert numpy.allclose(expected, actual)
+
+    assert history.redo()
+    assert history.redo()
+    assert not history.redo()
+
+    for expected, actual in zip(after, coordinates(display_file)):
+        assert numpy.allclose(expected, actual)
+
+
+def test_checkpoints_restore_exact_geometry():
+    display_file = scene()
+    history = History(display_file, checkpoint_interval=1)
+    before = coordinates(display_file)
+
+    history.transform_rows(range(10), Rotation(1 / 3))
+    history.undo()
+
+    for expected, actual in zip(before, coordinates(display_file)):
+        assert numpy.array_equal(expected, actual)
+
+    # Flattening shapes can't be undone with an inverse, so it is always
+    # kept along with the geometry it replaced.
+    history = History(display_file)
+    history.transform_rows([4], Scaling(0, 1))
+    history.undo()
+
+    assert numpy.array_equal(coordinates(display_file)[4], before[4])
+
+
+def test_removals_and_additions():
+    display_file = scene()
+    history = History(display_file)
+    names = [str(shape) for shape in display_file]
+
+    display_file.setData(display_file.index(3), "three", Qt.EditRole)
+    history.remove_many([7, 2, 3, 8])
+    history.add(Line(Position(0, 0), Position(5, 5)))
+
+    assert display_file.rowCount() == 7
+
+    history.undo()
+    history.undo()
+
+    assert display_file.rowCount() == 10
+    assert str(display_file.data(display_file.index(3), Qt.UserRole)) == "three"
+    assert len(display_file.query(7.5, 0.5, 8.5, 1.5)) == 4
+
+    history.undo()
+
+    assert [str(shape) for shape in display_file] == names
+
+    history.redo()
+    history.redo()
+    history.redo()
+
+    assert display_file.rowCount() == 7
+    assert str(list(display_file)[-1]) == "Line"
+
+
+def test_memory_limit_forgets_oldest_edits():
+    display_file = scene(100)
+    history = History(display_file, memory_limit=2048)
+
+    history.remove_many(range(50))
+    history.transform_rows(range(10), Translation(1, 1))
+
+    assert history.memory() <= 2048
+    assert history.undo()
+    assert not history.undo()
+    assert display_file.rowCount() == 50
+
+    history.add(Point(Position(0, 0)))
+
+    assert not history.can_redo()
@@ -0,0 +1,73 @@
+import io
+
+import numpy
+import pytest
+
+from igs.graphics.importer import (
+    guess_format,
+    parse_csv,
+    parse_geojson,
+    parse_wkt,
+    read_chunks,
+)
+from igs.graphics.shape import ClosedPolyline, Line, Point, Polyline
+
+
+def test_csv_shapes_follow_vertex_count():
+    (point,) = parse_csv("1,2")
+    (line,) = parse_csv("0,0,1,1")
+    (polyline,) = parse_csv("0,0,1,1,2,0")
+    (polygon,) = parse_csv("0,0,1,0,1,1,0,0")
+
+    assert isinstance(point, Point)
+    assert isinstance(line, Line)
+    assert isinstance(polyline, Polyline)
+    assert isinstance(polygon, ClosedPolyline)
+    assert polygon.num_of_points() == 3
+
+
+def test_wkt():
+    (line,) = parse_wkt("LINESTRING Z (0 0 5, 1 1 5, 2 0 5)")
+    assert numpy.array_equal(line.coordinates(), [[0, 0], [1, 1], [2, 0]])
+
+    (polygon,) = parse_wkt("POLYGON ((0 0, 4 0, 4 4, 0 0), (1 1, 2 1, 1 2, 1 1))")
+    assert isinstance(polygon, ClosedPolyline)
+    assert polygon.num_of_points() == 3
+
+    shapes = parse_wkt("MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))")
+    assert [shape.point_at(0).x() for shape in shapes] == [0, 5]
+
+    assert len(parse_wkt("MULTIPOINT ((1 2), (3 4))")) == 2
+    assert parse_wkt("POINT EMPTY") == []
+
+
+def test_geojson_features_are_named():
+    shapes = parse_geojson(
+        '{"type": "FeatureCollection", "features": ['
+        '{"type": "Feature", "properties": {"name": "road"},'
+        ' "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1], [2, 2]]}},'
+        '{"type": "Feature", "properties": null,'
+        ' "geometry": {"type": "Point", "coordinates": [3, 4]}}]}'
+    )
+
+    assert [str(shape) for shape in shapes] == ["road", "Point"]
+
+
+def test_read_chunks():
+    lines = ["x,y", "# comment", ""] + [f"{i},{i},{i + 1},{i}" for i in range(5)]
+    data = "\n".join(lines).encode()
+
+    chunks = list(read_chunks(io.BytesIO(data), "csv", chunk_size=4))
+
+    assert [len(shapes) for shapes, _ in chunks] == [1, 4]
+    assert chunks[-1][1] == len(data)
+
+    with pytest.raises(ValueError, match="line 3"):
+        list(read_chunks(io.BytesIO(b"0,0\n1,1\n1,2,3\n"), "csv"))
+
+
+def test_guess_format():
+    assert guess_format("scene.geojson") == "geojson"
+    assert guess_format("scene", '{"type": "Point"}') == "geojson"
+    assert guess_format("scene", "LINESTRING (0 0, 1 1)") == "wkt"
+    assert guess_format("scene", "0,0,1,1") == "csv"
@@ -0,0 +1,79 @@
+import numpy
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.picking import pick, pick_box, point_segment_distances
+from igs.graphics.shape import Line, Point, Position, Rectangle
+from igs.graphics.transform import Translation
+
+
+def test_point_segment_distances():
+    segments = numpy.array(
+        [
+            [0, 0, 10, 0],
+            [0, 0, 10, 0],
+            [0, 0, 10, 0],
+            [3, 4, 3, 4],
+        ],
+        dtype=numpy.float64,
+    )
+
+    distances = point_segment_distances((5, 2), segments[:1])
+    assert numpy.allclose(distances, [2])
+
+    distances = point_segment_distances((13, 4), segments)
+    assert numpy.allclose(distances, [5, 5, 5, 10])
+
+
+def scene():
+    display_file = DisplayFile()
+    display_file.add_many(
+        [
+            Line(Position(0, 0), Position(10, 0)),
+            Rectangle(Position(20, 10), 10, 10),
+            Point(Position(5, 3)),
+            Line(Position(100, 100), Position(110, 100)).apply(Translation(0, 50)),
+        ]
+    )
+
+    return display_file
+
+
+def test_pick_nearest_shape():
+    display_file = scene()
+
+    def row(point, tolerance=1.5):
+        slot = pick(display_file, point, tolerance)
+
+        return None if slot is None else int(display_file.rows([slot])[0])
+
+    assert row((5, 1)) == 0
+    assert row((5, 2.5)) == 2
+    assert row((29.5, 5)) == 1
+
+    # The closing edge of the rectangle counts, its inside doesn't.
+    assert row((20.5, 5)) == 1
+    assert row((25, 5)) is None
+
+    # Shapes with a pending transform are picked where they are drawn.
+    assert row((105, 150)) == 3
+    assert row((105, 100)) is None
+
+
+def test_pick_box():
+    display_file = scene()
+
+    rows = display_file.rows(pick_box(display_file, (4, -1, 6, 4)))
+    assert sorted(rows.tolist()) == [0, 2]
+
+    # A box inside the rectangle doesn't cross any of its edges.
+    assert not len(pick_box(display_file, (22, 2, 28, 8)))
+    assert display_file.rows(pick_box(display_file, (25, 5, 35, 6))).tolist() == [1]
+
+
+def test_rows_follow_removals():
+    display_file = scene()
+    slots = display_file.slots([1, 3])
+
+    display_file.remove_many([0])
+
+    assert display_file.rows(slots).tolist() == [0, 2]
@@ -0,0 +1,53 @@
+import numpy
+
+from igs.graphics.arena import VertexArena
+from igs.graphics.projection import ProjectionCache
+from igs.graphics.transform import Rotation, Scaling, Translation, combine
+
+
+def views():
+    yield Scaling(2, -2)
+
+    for i in range(1, 5):
+        yield combine(Translation(i, -i), Scaling(2, -2))
+
+    yield combine(Scaling(1.5, 1.5), Translation(3, 1))
+    yield combine(Rotation(10), Scaling(2, 2))
+
+
+def test_cache_matches_direct_projection():
+    rng = numpy.random.default_rng(0)
+    arena = VertexArena()
+    cache = ProjectionCache(arena)
+
+    slots = []
+    for _ in range(50):
+        slot = arena.allocate()
+        arena.store(slot, rng.normal(size=(rng.integers(1, 6), 2)))
+        slots.append(slot)
+
+    slots = numpy.array(slots)
+
+    for key, projection in enumerate(views()):
+        cache.set_projection(key, projection)
+
+        # Only a changing subset of the shapes is visible, and one is edited.
+        visible = slots[key % 3 :: 2]
+        arena.store(visible[0], rng.normal(size=(3, 2)))
+
+        expected = projection.map(arena.gather(visible))
+
+        assert numpy.allclose(cache.project(visible), expected)
+
+
+def test_cache_of_individual_shapes():
+    cache = ProjectionCache(VertexArena())
+    coords = numpy.arange(8.0).reshape(4, 2)
+    pending = Rotation(30)
+
+    for key, projection in enumerate(views()):
+        cache.set_projection(key, projection)
+
+        expected = combine(pending, projection).map(coords)
+
+        assert numpy.allclose(cache.project_shape(0, coords, pending), expected)
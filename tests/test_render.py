@@ -0,0 +1,171 @@
+import numpy
+from PyQt5 import QtCore, QtGui
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.render import Renderer
+from igs.graphics.shape import Line, Position, Rectangle
+from igs.graphics.transform import Translation
+from igs.graphics.window import Window
+
+
+def test_render_array_without_display():
+    line = Line(Position(-50, 0), Position(50, 0))
+    line.set_style(color="red")
+
+    renderer = Renderer([line])
+    raster = renderer.render_array(Window(Position(-50, 50), 100, 100), 100, 100)
+
+    assert raster.shape == (100, 100, 4)
+    assert tuple(raster[50, 25]) == (255, 0, 0, 255)
+    assert tuple(raster[25, 25]) == (255, 255, 255, 255)
+
+
+def test_tiles_match_direct_rendering():
+    display_file = DisplayFile()
+    display_file.add(Line(Position(-40, -30), Position(45, 35)))
+    display_file.add(Rectangle(Position(-20, 20), 30, 25))
+
+    renderer = Renderer(display_file)
+    window = Window(Position(-64, 64), 128, 128)
+
+    direct = renderer.render_array(window, 128, 128, background=None)
+
+    assert direct[..., 3].any()
+    assert numpy.array_equal(direct, draw(renderer, window))
+
+
+def draw(renderer, window):
+    image = QtGui.QImage(128, 128, QtGui.QImage.Format_RGBA8888)
+    image.fill(0)
+    painter = QtGui.QPainter(image)
+    renderer.draw(painter, window, 128, 128)
+    painter.end()
+
+    pixels = image.constBits()
+    pixels.setsize(image.sizeInBytes())
+
+    return numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(128, 128, 4).copy()
+
+
+def test_tiles_rendered_on_thread_pool():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    # Lines crossing tiles are drawn a pixel off here and there unless the
+    # tiles are painted on one image.
+    display_file = DisplayFile()
+
+    for x0, y0, x1, y1 in numpy.random.default_rng(0).uniform(-60, 60, (20, 4)):
+        display_file.add(Line(Position(x0, y0), Position(x1, y1)))
+
+    display_file.add(Rectangle(Position(5, -5), 30, 25).apply(Translation(5, -10)))
+
+    pool = QtCore.QThreadPool()
+    renderer = Renderer(display_file, thread_pool=pool)
+    window = Window(Position(-64, 64), 128, 128)
+    direct = renderer.render_array(window, 128, 128, background=None)
+
+    rendered = []
+    renderer.tilesRendered.connect(rendered.extend)
+
+    # Nothing is drawn until the tiles come back from the pool.
+    assert not draw(renderer, window).any()
+
+    pool.waitForDone()
+    app.processEvents()
+
+    assert len(rendered) == 4
+    assert numpy.array_equal(direct, draw(renderer, window))
+
+    # A tile invalidated while being rendered isn't kept, but is still
+    # announced, so it is drawn and queued again.
+    display_file.add(Rectangle(Position(-50, -10), 30, 25))
+    draw(renderer, window)
+    display_file.add(Line(Position(10, 50), Position(50, 10)))
+
+    pool.waitForDone()
+    app.processEvents()
+
+    assert len(rendered) == 5
+
+    draw(renderer, window)
+    pool.waitForDone()
+    app.processEvents()
+
+    direct = renderer.render_array(window, 128, 128, background=None)
+    assert numpy.array_equal(direct, draw(renderer, window))
+
+
+def test_progressive_rendering():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    display_file = DisplayFile()
+    display_file.add(Line(Position(-40, 30), Position(-5, 10)))
+    display_file.add(Rectangle(Position(5, -5), 30, 25))
+
+    renderer = Renderer(display_file, slice_budget=0.001)
+    window = Window(Position(-64, 64), 128, 128)
+    direct = renderer.render_array(window, 128, 128, background=None)
+
+    # Tiles are sketched in later slices, then rendered in the slices after
+    # them, at least one per slice.
+    assert not draw(renderer, window).any()
+    assert renderer.refining()
+
+    while renderer.refining():
+        app.processEvents()
+
+    assert numpy.array_equal(direct, draw(renderer, window))
+
+    # Zooming in draws the tiles of the last zoom level, stretched, until
+    # the new ones are ready.
+    window.zoom_in()
+    coarse = draw(renderer, window)
+
+    assert coarse[..., 3].any()
+    assert renderer.refining()
+
+    # Going back cancels them, with the first tiles still kept.
+    assert numpy.array_equal(
+        direct, draw(renderer, Window(Position(-64, 64), 128, 128))
+    )
+    assert not renderer.refining()
+
+    # So does editing the display file.
+    draw(renderer, window)
+    assert renderer.refining()
+
+    display_file.add(Line(Position(0, 0), Position(1, 1)))
+
+    assert not renderer.refining()
+
+
+def test_sketches_stand_in_for_missing_tiles():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+    display_file = DisplayFile()
+    display_file.add(Line(Position(-40, 30), Position(-5, 10)))
+
+    renderer = Renderer(display_file, slice_budget=1)
+    window = Window(Position(-64, 64), 128, 128)
+    direct = renderer.render_array(window, 128, 128, background=None)
+
+    sketched = []
+    renderer.tilesRendered.connect(sketched.extend)
+
+    # The first slice sketches the bounding boxes of the shapes of every
+    # missing tile, which stand in for them until the next slices render
+    # them.
+    draw(renderer, window)
+    app.processEvents()
+
+    sketch = draw(renderer, window)
+
+    assert len(sketched) == 4
+    assert renderer.refining()
+    assert sketch[34, 24:60, 3].all()
+    assert not numpy.array_equal(direct, sketch)
+
+    while renderer.refining():
+        app.processEvents()
+
+    assert numpy.array_equal(direct, draw(renderer, window))
@@ -0,0 +1,94 @@
+import numpy
+import pytest
+from PyQt5.QtCore import Qt
+
+from igs.graphics.displayfile import DisplayFile
+from igs.graphics.scene import SceneFile
+from igs.graphics.shape import Line, Mark, Point, Polyline, Position, Rectangle
+from igs.graphics.transform import Rotation, Translation
+
+
+def scene():
+    rectangle = Rectangle(Position(0, 10), 4, 2)
+    rectangle.set_name("door")
+    rectangle.set_style("red", 3)
+
+    line = Line(Position(-5, -5), Position(5, 5)).apply(Rotation(45))
+
+    return [rectangle, line, Point(Position(7, 7)), Mark(Position(1, 2))]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "scene.igs")
+    shapes = scene()
+
+    saved = DisplayFile()
+    saved.add_many(shape.clone() for shape in shapes)
+    saved.save(path)
+
+    loaded = DisplayFile()
+    loaded.load(path)
+
+    assert loaded.rowCount() == len(shapes)
+    assert isinstance(loaded.shape_at(0).clone(), Rectangle)
+
+    for row, shape in enumerate(shapes):
+        copy = loaded.data(loaded.index(row), Qt.UserRole)
+
+        assert type(copy) is type(shape)
+        assert str(copy) == str(shape)
+        assert copy.style() == shape.style()
+        assert numpy.allclose(copy.coordinates(), shape.coordinates())
+
+    assert len(loaded.query(6, 6, 8, 8)) == 1
+
+
+def test_loaded_shapes_are_memory_mapped(tmp_path):
+    path = str(tmp_path / "scene.igs")
+
+    saved = DisplayFile()
+    saved.add_many(Polyline([(i, 0), (i, 1), (i + 1, 1)]) for i in range(100))
+    saved.save(path)
+
+    loaded = DisplayFile()
+    loaded.load(path)
+
+    assert isinstance(loaded.arena().vertices().base, numpy.memmap)
+    assert numpy.array_equal(
+        loaded.arena().gather(numpy.arange(100)), SceneFile(path).vertices()
+    )
+    assert [str(shape) for shape in loaded.query(10.2, 0, 10.8, 1)] == ["Polyline"]
+
+
+def test_edits_after_loading(tmp_path):
+    path = str(tmp_path / "scene.igs")
+
+    saved = DisplayFile()
+    saved.add_many(scene())
+    saved.save(path)
+
+    loaded = DisplayFile()
+    loaded.load(path)
+    loaded.transform_rows([0], Translation(100, 0))
+    loaded.remove_many([2])
+    loaded.add(Point(Position(-3, -3)))
+
+    # Saving over the file being read replaces it without disturbing the
+    # shapes mapped from it.
+    loaded.save(path)
+
+    reloaded = DisplayFile()
+    reloaded.load(path)
+
+    assert [str(shape) for shape in reloaded] == ["door", "Line", "Mark", "Point"]
+    assert numpy.allclose(
+        reloaded.data(reloaded.index(0), Qt.UserRole).bounds(), (100, 8, 104, 10)
+    )
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "scene.igs"
+    path.write_bytes(b"0,0,1,1\n")
+
+    with pytest.raises(ValueError):
+        DisplayFile().load(str(path))
@@ -0,0 +1,139 @@
+import numpy
+
+from igs.graphics.shape import Line, Polyline, Position, Rectangle
+from igs.graphics.transform import Rotation, Scaling, Translation, combine
+
+
+def test_polyline_stores_contiguous_coordinates():
+    polyline = Polyline([Position(0, 0), Position(1, 2), Position(3, 4)])
+
+    coords = polyline.coordinates()
+
+    assert coords.shape == (3, 2)
+    assert coords.dtype == numpy.float64
+    assert coords.flags.c_contiguous
+    assert polyline.num_of_points() == 3
+    assert polyline.point_at(1).x() == 1
+    assert polyline.point_at(1).y() == 2
+
+
+def test_polyline_accepts_arrays():
+    polyline = Polyline(numpy.arange(10).reshape(5, 2))
+
+    assert polyline.num_of_points() == 5
+    assert polyline.point_at(-1).y() == 9
+
+
+def test_apply_matches_per_point_transform():
+    transform = combine(Rotation(30), Translation(5, -2))
+    points = [Position(x, x * x) for x in range(10)]
+
+    shape = Polyline(points).apply(transform)
+
+    for i, p in enumerate(points):
+        expected = transform(p)
+        assert numpy.isclose(shape.point_at(i).x(), expected.x())
+        assert numpy.isclose(shape.point_at(i).y(), expected.y())
+
+
+def test_apply_accepts_plain_callables():
+    line = Line(Position(0, 0), Position(2, 2))
+
+    line.apply(lambda p: Position(p.x() + 1, p.y()))
+
+    assert line.point_at(1).x() == 3
+
+
+def test_center():
+    center = Rectangle(Position(0, 4), 2, 4).center()
+
+    assert (center.x(), center.y()) == (1, 2)
+
+
+def test_clone_shares_coordinates_until_mutated():
+    shape = Polyline([Position(0, 0), Position(1, 1)])
+    clone = shape.clone()
+
+    assert clone.coordinates() is shape.coordinates()
+
+    clone.apply(Translation(1, 0))
+    clone.add(Position(5, 5))
+
+    assert shape.num_of_points() == 2
+    assert shape.point_at(1).x() == 1
+    assert clone.num_of_points() == 3
+
+
+def test_coordinates_are_read_only():
+    shape = Polyline([Position(0, 0), Position(1, 1)])
+
+    assert not shape.coordinates().flags.writeable
+
+
+def test_bounds_and_center_follow_mutations():
+    shape = Polyline([Position(0, 0), Position(2, 4)])
+
+    assert shape.bounds() == (0, 0, 2, 4)
+    assert (shape.center().x(), shape.center().y()) == (1, 2)
+
+    shape.add(Position(-1, 5))
+
+    assert shape.bounds() == (-1, 0, 2, 5)
+    assert numpy.isclose(shape.center().y(), 3)
+
+    shape.apply(combine(Translation(1, 1), Rotation(90)))
+    expected = Polyline(shape.coordinates())
+
+    assert numpy.allclose(shape.bounds(), expected.bounds())
+    assert numpy.isclose(shape.center().x(), expected.center().x())
+    assert numpy.isclose(shape.center().y(), expected.center().y())
+
+
+def test_style():
+    shape = Line(Position(0, 0), Position(1, 1))
+
+    shape.set_style(color="red")
+    clone = shape.clone()
+    clone.set_style(width=3)
+
+    assert shape.style() == ("red", 1)
+    assert clone.style() == ("red", 3)
+
+
+def test_simplified_follows_similarity_transforms():
+    t = numpy.linspace(0, 4 * numpy.pi, 1000)
+    shape = Polyline(numpy.c_[t * numpy.cos(t), t * numpy.sin(t)])
+
+    coarse = shape.simplified(1)
+    shape.apply(combine(Rotation(30), Scaling(2, 2), Translation(3, 3)))
+
+    assert len(shape.simplified(2)) == len(coarse)
+    assert numpy.allclose(shape.simplified(0), shape.coordinates())
+
+
+def test_transforms_are_deferred_until_needed():
+    shape = Polyline([Position(0, 0), Position(2, 0), Position(2, 2)])
+    base = shape.coordinates()
+
+    shape.apply(Translation(1, 1)).apply(Rotation(90)).apply(Scaling(2, 2))
+
+    coords, pending = shape.deferred()
+    assert coords is base
+    assert pending is not None
+
+    expected = combine(Translation(1, 1), Rotation(90), Scaling(2, 2)).map(base)
+    center = shape.center()
+
+    assert numpy.allclose((center.x(), center.y()), expected.mean(axis=0))
+    assert numpy.allclose(shape.coordinates(), expected)
+    assert shape.pending() is None
+
+
+def test_loose_bounds_contain_bounds():
+    shape = Rectangle(Position(0, 4), 2, 4).apply(Rotation(45))
+
+    xmin, ymin, xmax, ymax = shape.loose_bounds()
+    assert shape.pending() is not None
+
+    bxmin, bymin, bxmax, bymax = shape.bounds()
+    assert xmin <= bxmin and ymin <= bymin and bxmax <= xmax and bymax <= ymax
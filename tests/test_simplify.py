@@ -0,0 +1,52 @@
+import numpy
+
+from igs.graphics.simplify import Pyramid, importance
+
+
+def douglas_peucker(coords, tolerance):
+    start, end = coords[0], coords[-1]
+
+    if len(coords) < 3:
+        return coords
+
+    direction = end - start
+    relative = coords[1:-1] - start
+    length = numpy.hypot(*direction)
+
+    if length > 0:
+        cross = direction[0] * relative[:, 1] - direction[1] * relative[:, 0]
+        distance = numpy.abs(cross) / length
+    else:
+        distance = numpy.hypot(relative[:, 0], relative[:, 1])
+
+    farthest = numpy.argmax(distance) + 1
+
+    if distance[farthest - 1] <= tolerance:
+        return coords[[0, -1]]
+
+    left = douglas_peucker(coords[: farthest + 1], tolerance)
+    right = douglas_peucker(coords[farthest:], tolerance)
+
+    return numpy.vstack([left[:-1], right])
+
+
+def test_ranks_reproduce_douglas_peucker():
+    rng = numpy.random.default_rng(0)
+    coords = numpy.cumsum(rng.normal(size=(500, 2)), axis=0)
+    ranks = importance(coords)
+
+    for tolerance in [0.1, 0.5, 2, 8]:
+        expected = douglas_peucker(coords, tolerance)
+
+        assert numpy.array_equal(coords[ranks > tolerance], expected)
+
+
+def test_pyramid_levels_shrink_with_tolerance():
+    t = numpy.linspace(0, 4 * numpy.pi, 2000)
+    pyramid = Pyramid(numpy.c_[numpy.cos(t), numpy.sin(t)] * 100)
+
+    sizes = [len(pyramid.level(tolerance)) for tolerance in [0, 0.01, 1, 10]]
+
+    assert sizes[0] == 2000
+    assert sizes == sorted(sizes, reverse=True)
+    assert sizes[-1] < 50
@@ -0,0 +1,37 @@
+import random
+
+from igs.graphics.spatial import GridIndex, overlaps
+
+
+def test_query_matches_brute_force():
+    rng = random.Random(0)
+    index = GridIndex(cell_size=4)
+    boxes = {}
+
+    for key in range(500):
+        x, y = rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)
+        w, h = rng.expovariate(1 / 20), rng.expovariate(1 / 20)
+        boxes[key] = (x, y, x + w, y + h)
+        index.insert(key, boxes[key])
+
+    for key in range(0, 500, 3):
+        index.remove(key)
+        del boxes[key]
+
+    for _ in range(50):
+        x, y = rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)
+        region = (x, y, x + rng.uniform(0, 500), y + rng.uniform(0, 500))
+
+        expected = sorted(k for k, b in boxes.items() if overlaps(b, region))
+
+        assert index.query(*region) == expected
+
+
+def test_reinsert_moves_entry():
+    index = GridIndex()
+    index.insert("a", (0, 0, 1, 1))
+    index.insert("a", (100, 100, 101, 101))
+
+    assert index.query(0, 0, 2, 2) == []
+    assert index.query(99, 99, 102, 102) == ["a"]
+    assert len(index) == 1
@@ -0,0 +1,57 @@
+import json
+
+import numpy
+
+from igs.graphics.stats import Stats
+
+
+def test_disabled_stats_record_nothing():
+    stats = Stats()
+
+    with stats.frame():
+        with stats.stage("paint"):
+            pass
+
+        stats.count("shapes", 10)
+
+    assert stats.names() == []
+
+
+def test_frames_collect_stages_and_counters():
+    stats = Stats(enabled=True)
+
+    for shapes in range(3):
+        with stats.frame():
+            for _ in range(2):
+                with stats.stage("paint"):
+                    pass
+                stats.count("shapes", shapes)
+
+    assert stats.names() == ["frame", "paint", "shapes"]
+    assert numpy.array_equal(stats.samples("shapes"), [0, 2, 4])
+    assert len(stats.samples("paint")) == 3
+    assert all(stats.samples("frame") >= stats.samples("paint"))
+
+
+def test_samples_roll_over():
+    stats = Stats(capacity=4, enabled=True)
+
+    for value in range(10):
+        stats.record("metric", value)
+
+    assert numpy.array_equal(stats.samples("metric"), [6, 7, 8, 9])
+    assert stats.summary("metric")["max"] == 9
+    assert stats.histogram("metric", bins=2)[0].tolist() == [2, 2]
+
+
+def test_dump(tmp_path):
+    stats = Stats(enabled=True)
+    stats.record("frame", 0.5)
+
+    stats.dump(tmp_path / "stats.json")
+
+    with open(tmp_path / "stats.json") as file:
+        report = json.load(file)
+
+    assert report["frame"]["mean"] == 0.5
+    assert sum(report["frame"]["histogram"]["counts"]) == 1
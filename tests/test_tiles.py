@@ -0,0 +1,50 @@
+from igs.graphics.tiles import TileCache, new_tile_image
+
+
+def test_covering_tiles():
+    tiles = TileCache(tile_size=10)
+
+    assert tiles.covering((0, 0, 10, 10)) == [(0, 0)]
+    assert tiles.covering((-1, 5, 11, 15)) == [
+        (-1, 0),
+        (0, 0),
+        (1, 0),
+        (-1, 1),
+        (0, 1),
+        (1, 1),
+    ]
+
+
+def test_least_recently_used_tiles_are_evicted():
+    tile_bytes = new_tile_image(10, 10).sizeInBytes()
+    tiles = TileCache(tile_size=10, budget=2 * tile_bytes)
+    level = TileCache.level(1, 1)
+
+    tiles.put(level, (0, 0), new_tile_image(10, 10))
+    tiles.put(level, (1, 0), new_tile_image(10, 10))
+    tiles.get(level, (0, 0))
+    tiles.put(level, (2, 0), new_tile_image(10, 10))
+
+    assert tiles.get(level, (0, 0)) is not None
+    assert tiles.get(level, (1, 0)) is None
+    assert tiles.memory() == 2 * tile_bytes
+
+
+def test_invalidation_drops_overlapping_tiles():
+    tiles = TileCache(tile_size=10)
+    level = TileCache.level(2, 2)
+
+    # At this level, tile (0, 0) covers x in [0, 20] and y in [-20, 0].
+    for tile in [(0, 0), (1, 0), (0, 1)]:
+        tiles.put(level, tile, new_tile_image(10, 10))
+
+    tiles.invalidate([(5, -5, 6, -4)])
+
+    assert tiles.get(level, (0, 0)) is None
+    assert tiles.get(level, (1, 0)) is not None
+    assert tiles.get(level, (0, 1)) is not None
+
+    tiles.invalidate([(41, -5, 42, -4)], padding=1)
+
+    assert tiles.get(level, (1, 0)) is None
+    assert len(tiles) == 1
@@ -0,0 +1,43 @@
+import os
+
+from PyQt5 import QtCore, QtWidgets
+
+from igs.ui.view import ListView
+
+# Widgets need an application with a GUI, which has to be created before the
+# tests creating a core application run.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def selected_rows(selection):
+    return [
+        row
+        for selected in selection
+        for row in range(selected.top(), selected.bottom() + 1)
+    ]
+
+
+def test_select_rows_announces_changes():
+    view = ListView()
+    view.setModel(QtCore.QStringListModel([str(row) for row in range(10)]))
+
+    changes = []
+    view.selectionModel().selectionChanged.connect(
+        lambda selected, deselected: changes.append(
+            (selected_rows(selected), selected_rows(deselected))
+        )
+    )
+
+    view.select_rows([5, 1, 2])
+    view.select_rows([8], extend=True)
+    view.select_rows([2, 3])
+
+    assert changes == [
+        ([1, 2, 5], []),
+        ([8], []),
+        ([3], [1, 5, 8]),
+    ]
+
+    rows = view.selectionModel().selectedRows()
+    assert sorted(index.row() for index in rows) == [2, 3]
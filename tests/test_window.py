@@ -0,0 +1,58 @@
+import numpy
+
+from igs.graphics.shape import Position
+from igs.graphics.window import Movement, Window
+
+
+def test_extents_track_movement_and_zoom():
+    window = Window(Position(-50, 50), 100, 100)
+
+    window.move_right()
+    assert (window.xmin(), window.xmax()) == (-49, 51)
+
+    window.zoom_in()
+    assert numpy.isclose(window.width(), 99)
+    assert numpy.isclose(window.center().x(), 1)
+
+
+def test_normalize():
+    window = Window(Position(0, 10), 10, 10)
+
+    top_left = window.normalize(Position(0, 10))
+    bottom_right = window.normalize(Position(10, 0))
+
+    assert (top_left.x(), top_left.y()) == (0, 0)
+    assert (bottom_right.x(), bottom_right.y()) == (1, 1)
+
+
+def test_scheduled_movement_adds_up_to_immediate_movement():
+    immediate = Window(Position(-50, 50), 100, 100)
+    scheduled = Window(Position(-50, 50), 100, 100)
+
+    for _ in range(3):
+        immediate.move_up()
+        immediate.zoom_in()
+        immediate.zoom_in()
+
+        scheduled.schedule_move(Movement.Direction.Up)
+        scheduled.schedule_zoom(Movement.Direction.In)
+        scheduled.schedule_zoom(Movement.Direction.In)
+
+    # Nothing moves until the movement is applied, in any number of steps.
+    version = scheduled.version()
+    assert scheduled.bounds() == (-50, -50, 50, 50)
+
+    scheduled.step(0.3)
+    scheduled.step(0.5)
+    scheduled.step()
+
+    assert scheduled.version() == version + 3
+    assert scheduled.pending_movement() == (0, 0, 1)
+    assert numpy.allclose(scheduled.bounds(), immediate.bounds())
+
+
+def test_scheduled_zoom_stops_short_of_a_unit():
+    window = Window(Position(0, 1), 1, 1)
+    window.schedule_zoom(Movement.Direction.In)
+
+    assert window.pending_movement() == (0, 0, 1)